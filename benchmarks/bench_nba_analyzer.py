@@ -0,0 +1,242 @@
+"""Offline benchmarks replaying recorded stats.nba.com responses.
+
+Run from the repository root:
+
+    python benchmarks/bench_nba_analyzer.py                    # compare with baseline.json
+    python benchmarks/bench_nba_analyzer.py --latency 0.05     # inject 50 ms per upstream request
+    python benchmarks/bench_nba_analyzer.py --update-baseline  # record a new baseline
+    python benchmarks/bench_nba_analyzer.py --record 2544      # re-record fixtures from the live API
+
+Exits with status 1 when a benchmark is slower, or peaks at more memory,
+than the baseline allows.
+"""
+import argparse
+import copy
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(bench_dir)
+sys.path.insert(0, parent_dir)
+
+import nba_analyzer
+import nba_transport
+from tests.stub_stats_server import StubStatsServer
+
+FIXTURE_DIR = os.path.join(bench_dir, 'fixtures')
+BASELINE_PATH = os.path.join(bench_dir, 'baseline.json')
+FIXTURE_ENDPOINTS = ('commonplayerinfo', 'playergamelog', 'playercareerstats')
+DEFAULT_SIZES = (1, 100, 1000)
+# Largest size run by default per benchmark: charts take a few hundred
+# milliseconds per player, so 1,000 players only run with --full
+SIZE_LIMITS = {'plot_player_stats': 100}
+DEFAULT_REPEAT = 3
+# Allowed slowdown / memory growth over the baseline, as a fraction
+DEFAULT_TOLERANCE = 0.3
+# Timings this close to the baseline are noise whatever the ratio
+NOISE_SECONDS = 0.005
+NOISE_BYTES = 64 * 1024
+
+
+def load_fixtures():
+    fixtures = {}
+    for endpoint in FIXTURE_ENDPOINTS:
+        with open(os.path.join(FIXTURE_DIR, f'{endpoint}.json')) as f:
+            fixtures[endpoint] = json.load(f)
+    return fixtures
+
+
+def record_fixtures(player_id):
+    """Fetch one player's responses from the live API and save them as the fixtures"""
+    from nba_api.stats.endpoints import commonplayerinfo, playercareerstats, playergamelog
+    endpoints = {
+        'commonplayerinfo': (commonplayerinfo.CommonPlayerInfo, {'player_id': player_id}),
+        'playergamelog': (playergamelog.PlayerGameLog, {'player_id': player_id, 'season': nba_analyzer.current_season()}),
+        'playercareerstats': (playercareerstats.PlayerCareerStats, {'player_id': player_id}),
+    }
+    for endpoint, (endpoint_class, params) in endpoints.items():
+        body = nba_transport.request_endpoint(endpoint_class, **params)
+        with open(os.path.join(FIXTURE_DIR, f'{endpoint}.json'), 'w') as f:
+            f.write(body)
+        print(f'Recorded {endpoint} ({len(body)} bytes)')
+
+
+def stub_responses(fixtures):
+    """Stub server responses replaying the fixtures for any requested player id"""
+    info = fixtures['commonplayerinfo']
+    headers = info['resultSets'][0]['headers']
+    person_id = headers.index('PERSON_ID')
+
+    def player_info(params):
+        body = copy.deepcopy(info)
+        body['resultSets'][0]['rowSet'][0][person_id] = int(params['PlayerID'])
+        return json.dumps(body)
+
+    return {
+        'commonplayerinfo': player_info,
+        'playergamelog': json.dumps(fixtures['playergamelog']),
+        'playercareerstats': json.dumps(fixtures['playercareerstats']),
+    }
+
+
+def fixture_stats(fixtures):
+    """Build one player's stats dict straight from the fixtures"""
+    result_sets = {rs['name']: rs for body in fixtures.values() for rs in body['resultSets']}
+    sets = {name: [dict(zip(rs['headers'], row)) for row in rs['rowSet']] for name, rs in result_sets.items()}
+    games = nba_analyzer.nba_gamelog.GameLog.from_result_set(
+        result_sets['PlayerGameLog']['headers'], result_sets['PlayerGameLog']['rowSet'])
+    career = sets['CareerTotalsRegularSeason']
+    return nba_analyzer.build_player_stats(
+        sets['CommonPlayerInfo'][0], games[:5], games.arrays(),
+        sets['SeasonTotalsRegularSeason'], career[0] if career else None), games
+
+
+# Each benchmark takes (n, context), does the work for n players and is timed as a whole
+
+def bench_search_player(n, context):
+    names = context['search_names']
+    for i in range(n):
+        nba_analyzer.search_player(names[i % len(names)])
+
+
+def bench_get_player_stats(n, context):
+    results = dict(nba_analyzer.get_many_player_stats(range(1, n + 1)))
+    missing = [player_id for player_id, stats in results.items() if not stats]
+    if missing:
+        raise RuntimeError(f'{len(missing)} lookups failed')
+
+
+def bench_averages(n, context):
+    games = context['games']
+    for _ in range(n):
+        nba_analyzer.nba_analytics.recent_averages(games.arrays(), window=5)
+
+
+def bench_display_player_stats(n, context):
+    out = io.StringIO()
+    for _ in range(n):
+        nba_analyzer.display_player_stats(context['stats'], out=out)
+
+
+def bench_plot_player_stats(n, context):
+    with tempfile.TemporaryDirectory() as output_dir:
+        nba_analyzer.plot_many_player_stats([context['stats']] * n, output_dir)
+
+
+BENCHMARKS = {
+    'search_player': bench_search_player,
+    'get_player_stats': bench_get_player_stats,
+    'averages': bench_averages,
+    'display_player_stats': bench_display_player_stats,
+    'plot_player_stats': bench_plot_player_stats,
+}
+
+
+def run_benchmark(func, n, context, repeat, memory):
+    """Return (best seconds of `repeat` runs, peak traced bytes or None)"""
+    # Warm-up: lazy imports, fonts and pooled connections are not what is measured
+    func(1, context)
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(n, context)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    peak = None
+    if memory:
+        # Separate pass: tracing slows allocation-heavy code down too much to time it
+        tracemalloc.start()
+        try:
+            func(n, context)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return best, peak
+
+
+def check(result, baseline, tolerance):
+    """Return the regressions of one result against its baseline entry"""
+    problems = []
+    if baseline is None:
+        return problems
+    if result['seconds'] > baseline['seconds'] * (1 + tolerance) + NOISE_SECONDS:
+        problems.append(f"time {result['seconds']:.3f}s vs {baseline['seconds']:.3f}s")
+    if (result.get('peak_bytes') is not None and baseline.get('peak_bytes') is not None
+            and result['peak_bytes'] > baseline['peak_bytes'] * (1 + tolerance) + NOISE_BYTES):
+        problems.append(f"memory {result['peak_bytes'] / 2**20:.1f} MiB vs {baseline['peak_bytes'] / 2**20:.1f} MiB")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help='player counts')
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help='benchmarks to run (default: all)')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every upstream response')
+    parser.add_argument('--full', action='store_true', help='run every size, ignoring SIZE_LIMITS')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='runs per benchmark, best time kept')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc pass')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true', help='write the results as the new baseline')
+    parser.add_argument('--record', type=int, metavar='PLAYER_ID', help='re-record the fixtures from the live API')
+    args = parser.parse_args(argv)
+
+    if args.record:
+        record_fixtures(args.record)
+        return 0
+
+    fixtures = load_fixtures()
+    stats, games = fixture_stats(fixtures)
+    context = {
+        'stats': stats,
+        'games': games,
+        'search_names': [p['full_name'].split()[-1] for p in nba_analyzer.get_player_index().players[::37]],
+    }
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+
+    nba_analyzer.configure_cache(enabled=False)
+    results = {}
+    regressions = []
+    with StubStatsServer(stub_responses(fixtures), latency=args.latency) as stub:
+        nba_transport.configure_transport(requests_per_second=1e6, burst=1e6, base_url=stub.base_url)
+        print(f"{'benchmark':<24} {'players':>7} {'seconds':>9} {'players/s':>10} {'peak MiB':>9}  status")
+        for name, func in BENCHMARKS.items():
+            if args.only and name not in args.only:
+                continue
+            for n in args.sizes:
+                if not args.full and n > SIZE_LIMITS.get(name, n):
+                    continue
+                key = f'{name}[{n}]'
+                seconds, peak = run_benchmark(func, n, context, args.repeat, not args.no_memory)
+                results[key] = {'seconds': seconds, 'peak_bytes': peak}
+                problems = check(results[key], baseline.get(key), args.tolerance)
+                regressions.extend(f'{key}: {problem}' for problem in problems)
+                status = 'REGRESSION' if problems else ('ok' if key in baseline else 'new')
+                peak_text = f'{peak / 2**20:9.1f}' if peak is not None else f"{'-':>9}"
+                print(f'{name:<24} {n:>7} {seconds:>9.3f} {n / seconds:>10.1f} {peak_text}  {status}', flush=True)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'latency': args.latency, 'results': results}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'Baseline written to {args.baseline}')
+        return 0
+    if regressions:
+        print('\nRegressions:')
+        for regression in regressions:
+            print(f'  {regression}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,227 @@
+import heapq
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from nba_analytics import COMPARISON_COLUMNS, COMPARISON_TOTAL_COLUMNS, combined_season_rows, totals_matrix
+
+# Totals aggregated per season row and per career, one float64 column each
+AGGREGATE_COLUMNS = COMPARISON_TOTAL_COLUMNS
+
+# Leaderboard stat -> totals column
+LEADER_STATS = dict(COMPARISON_COLUMNS, games='GP', minutes='MIN')
+
+# Games needed to qualify for the per-game leaderboards and distributions
+# (the NBA's own thresholds: 400 career games, 58 of an 82-game season)
+CAREER_MIN_GAMES = 400
+SEASON_MIN_GAMES = 58
+
+DISTRIBUTION_PERCENTILES = (10, 25, 50, 75, 90, 99)
+
+# Players per job: small enough to balance uneven careers across workers
+DEFAULT_CHUNK_SIZE = 256
+
+BOARDS = ('career_totals', 'career_per_game', 'season_totals', 'season_per_game')
+
+_SELECT_COLUMNS = ('PLAYER_ID', 'SEASON_ID', 'TEAM_ABBREVIATION') + AGGREGATE_COLUMNS
+_SELECT_PARTITION = ('SELECT ' + ', '.join(f'"{c}"' for c in _SELECT_COLUMNS) + ' FROM season_totals '
+                     'WHERE "PLAYER_ID" BETWEEN ? AND ? ORDER BY "PLAYER_ID", rowid')
+
+
+class SharedArray:
+    """NumPy array in a multiprocessing.shared_memory block, attachable by name from worker processes"""
+
+    def __init__(self, shape, dtype, name=None):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        size = max(int(np.prod(self.shape)) * self.dtype.itemsize, 1)
+        self._owner = name is None
+        self.memory = shared_memory.SharedMemory(name=name, create=self._owner, size=size if self._owner else 0)
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=self.memory.buf)
+
+    @property
+    def spec(self):
+        """(name, shape, dtype) to attach to this array from another process"""
+        return self.memory.name, self.shape, self.dtype.str
+
+    @classmethod
+    def attach(cls, spec):
+        name, shape, dtype = spec
+        return cls(shape, dtype, name)
+
+    def close(self):
+        """Release this process's mapping; the creating process also frees the block"""
+        self.array = None
+        self.memory.close()
+        if self._owner:
+            self.memory.unlink()
+
+
+def _connect(path):
+    # Read-only, so workers never contend for the warehouse's write lock
+    return sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+
+
+def _aggregate_partition(job):
+    """Worker: fill the partition's rows of the shared arrays and return its local top-k lists"""
+    path, specs, first, last, start, count, season_start, k, career_min_games, season_min_games = job
+    arrays = {name: SharedArray.attach(spec) for name, spec in specs.items()}
+    try:
+        conn = _connect(path)
+        try:
+            rows = combined_season_rows([dict(zip(_SELECT_COLUMNS, row))
+                                         for row in conn.execute(_SELECT_PARTITION, (first, last))])
+        finally:
+            conn.close()
+        values = totals_matrix(rows, AGGREGATE_COLUMNS)
+        player_ids = np.array([row['PLAYER_ID'] for row in rows], dtype=np.int64)
+        end = season_start + len(rows)
+        arrays['seasons'].array[season_start:end] = values
+        arrays['season_players'].array[season_start:end] = player_ids
+        arrays['season_years'].array[season_start:end] = [int(str(row['SEASON_ID'])[:4]) for row in rows]
+
+        # Career totals: the partition owns `count` consecutive career rows
+        ids = arrays['player_ids'].array[start:start + count]
+        career = arrays['career'].array[start:start + count]
+        career[:] = 0
+        np.add.at(career, np.searchsorted(ids, player_ids), np.nan_to_num(values))
+
+        return _local_leaders(career, ids, values, player_ids, arrays['season_years'].array[season_start:end],
+                              k, career_min_games, season_min_games)
+    finally:
+        for array in arrays.values():
+            array.close()
+
+
+def _top(k, keys, items):
+    # Largest k of (value, *item) for the non-NaN values
+    present = ~np.isnan(keys)
+    return heapq.nlargest(k, zip(keys[present].tolist(), *(item[present].tolist() for item in items)))
+
+
+def _local_leaders(career, player_ids, seasons, season_players, season_years, k, career_min_games,
+                   season_min_games):
+    games = career[:, 0]
+    season_games = seasons[:, 0]
+    leaders = {board: {} for board in BOARDS}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for stat, column in LEADER_STATS.items():
+            j = AGGREGATE_COLUMNS.index(column)
+            leaders['career_totals'][stat] = _top(k, career[:, j], [player_ids])
+            leaders['season_totals'][stat] = _top(k, seasons[:, j], [season_players, season_years])
+            if column == 'GP':
+                continue
+            per_game = np.where(games >= career_min_games, career[:, j] / games, np.nan)
+            leaders['career_per_game'][stat] = _top(k, per_game, [player_ids])
+            per_game = np.where(season_games >= season_min_games, seasons[:, j] / season_games, np.nan)
+            leaders['season_per_game'][stat] = _top(k, per_game, [season_players, season_years])
+    return leaders
+
+
+def _season_label(year):
+    return f'{year}-{(year + 1) % 100:02d}'
+
+
+class LeagueAggregate:
+    """League-wide career and season totals with leaderboards and per-game distributions.
+
+    `career` is (players x AGGREGATE_COLUMNS) aligned with `player_ids`;
+    `seasons` holds one row per player season (a traded player's TOT row)
+    with `season_players` and `season_years`. `leaders` maps a board
+    ('career_totals', 'career_per_game', 'season_totals', 'season_per_game')
+    and a LEADER_STATS stat to [(value, player_id, season or None)], best
+    first.
+    """
+
+    def __init__(self, player_ids, career, seasons, season_players, season_years, leaders,
+                 career_min_games=CAREER_MIN_GAMES):
+        self.player_ids = player_ids
+        self.career = career
+        self.seasons = seasons
+        self.season_players = season_players
+        self.season_years = season_years
+        self.leaders = leaders
+        self.career_min_games = career_min_games
+
+    def distributions(self, percentiles=DISTRIBUTION_PERCENTILES):
+        """Career per-game distribution of each stat over qualifying players: {stat: {mean, std, p10, ...}}"""
+        games = self.career[:, 0]
+        qualified = self.career[games >= self.career_min_games]
+        result = {}
+        for stat, column in LEADER_STATS.items():
+            if column == 'GP':
+                continue
+            values = qualified[:, AGGREGATE_COLUMNS.index(column)] / qualified[:, 0]
+            if not len(values):
+                result[stat] = None
+                continue
+            result[stat] = {'players': len(values), 'mean': float(values.mean()), 'std': float(values.std()),
+                            **{f'p{p}': float(v) for p, v in zip(percentiles, np.percentile(values, percentiles))}}
+        return result
+
+
+def _partitions(counts, chunk_size):
+    # Contiguous (first id, last id, player offset, players, season row offset) ranges of `chunk_size` players
+    player_ids = [player_id for player_id, _ in counts]
+    offsets = np.concatenate([[0], np.cumsum([count for _, count in counts])]).astype(int).tolist()
+    for start in range(0, len(counts), chunk_size):
+        end = min(start + chunk_size, len(counts))
+        yield player_ids[start], player_ids[end - 1], start, end - start, offsets[start]
+
+
+def aggregate_league(path, k=10, processes=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                     career_min_games=CAREER_MIN_GAMES, season_min_games=SEASON_MIN_GAMES):
+    """Aggregate every player's season totals in the warehouse at `path` across a process pool.
+
+    Players are split into contiguous id ranges. Each worker reads its range
+    from SQLite, writes season and career totals straight into shared-memory
+    arrays (nothing but its local top-k lists is pickled back) and the
+    top-k lists are merged with heaps. Returns a LeagueAggregate.
+    """
+    conn = _connect(path)
+    try:
+        counts = conn.execute('SELECT "PLAYER_ID", COUNT(*) FROM season_totals '
+                              'GROUP BY "PLAYER_ID" ORDER BY "PLAYER_ID"').fetchall()
+    finally:
+        conn.close()
+    total_rows = sum(count for _, count in counts)
+
+    arrays = {
+        'player_ids': SharedArray((len(counts),), np.int64),
+        'career': SharedArray((len(counts), len(AGGREGATE_COLUMNS)), np.float64),
+        # Sized for every stored row; rows dropped in favour of TOT rows stay NaN
+        'seasons': SharedArray((total_rows, len(AGGREGATE_COLUMNS)), np.float64),
+        'season_players': SharedArray((total_rows,), np.int64),
+        'season_years': SharedArray((total_rows,), np.int32),
+    }
+    try:
+        arrays['player_ids'].array[:] = [player_id for player_id, _ in counts]
+        arrays['seasons'].array[:] = np.nan
+        arrays['season_players'].array[:] = -1
+        specs = {name: array.spec for name, array in arrays.items()}
+        jobs = [(path, specs, *partition, k, career_min_games, season_min_games)
+                for partition in _partitions(counts, chunk_size)]
+        if processes == 1 or len(jobs) <= 1:
+            partials = [_aggregate_partition(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=processes or os.cpu_count()) as executor:
+                partials = list(executor.map(_aggregate_partition, jobs))
+
+        leaders = {board: {} for board in BOARDS}
+        for board in BOARDS:
+            for stat in partials[0][board] if partials else ():
+                merged = heapq.nlargest(k, chain.from_iterable(partial[board][stat] for partial in partials))
+                leaders[board][stat] = [(value, player_id, _season_label(year[0]) if year else None)
+                                        for value, player_id, *year in merged]
+        # Boolean indexing copies out of the shared blocks before they are freed
+        used = arrays['season_players'].array >= 0
+        return LeagueAggregate(
+            arrays['player_ids'].array.copy(), arrays['career'].array.copy(), arrays['seasons'].array[used],
+            arrays['season_players'].array[used], arrays['season_years'].array[used], leaders, career_min_games)
+    finally:
+        for array in arrays.values():
+            array.close()
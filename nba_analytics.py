@@ -0,0 +1,298 @@
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Numeric PlayerGameLog columns loaded into the columnar array
+STAT_COLUMNS = (
+    'MIN', 'PTS', 'REB', 'OREB', 'DREB', 'AST', 'STL', 'BLK', 'TOV', 'PF',
+    'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT', 'FTM', 'FTA', 'FT_PCT',
+    'PLUS_MINUS',
+)
+
+# Per-game averages in the recent_averages dict returned by get_player_stats;
+# its shooting percentages come from shooting_percentages instead
+RECENT_AVERAGE_COLUMNS = {
+    'points': 'PTS',
+    'rebounds': 'REB',
+    'assists': 'AST',
+    'steals': 'STL',
+    'blocks': 'BLK',
+}
+
+PERCENTAGE_KEYS = ('fg_pct', 'fg3_pct', 'ft_pct', 'ts_pct', 'efg_pct')
+
+# Totals needed to derive the shooting percentages
+SHOOTING_COLUMNS = ('PTS', 'FGM', 'FGA', 'FG3M', 'FG3A', 'FTM', 'FTA')
+
+DEFAULT_WINDOWS = (1, 5, 10, 20)
+
+# Counting stats compared across players: report key -> totals column
+COMPARISON_COLUMNS = {
+    'points': 'PTS',
+    'rebounds': 'REB',
+    'assists': 'AST',
+    'steals': 'STL',
+    'blocks': 'BLK',
+    'turnovers': 'TOV',
+}
+
+# Totals columns loaded into the comparison matrix
+COMPARISON_TOTAL_COLUMNS = ('GP', 'MIN') + tuple(COMPARISON_COLUMNS.values()) + SHOOTING_COLUMNS[1:]
+
+
+# Game days repeat across players and seasons' worth of logs, and strptime
+# is slow enough to dominate building the arrays
+@lru_cache(maxsize=8192)
+def parse_game_date(value):
+    """Parse a PlayerGameLog GAME_DATE such as 'APR 14, 2024'"""
+    return np.datetime64(datetime.strptime(value.title(), '%b %d, %Y').date(), 'D')
+
+
+def ewm_weights(window):
+    """Normalized exponential weights for a window, oldest game first (span = window)"""
+    alpha = 2 / (window + 1)
+    weights = (1 - alpha) ** np.arange(window - 1, -1, -1)
+    return weights / weights.sum()
+
+
+def shooting_percentages(totals):
+    """Derive shooting percentages from summed makes and attempts.
+
+    `totals` maps PTS, FGM, FGA, FG3M, FG3A, FTM and FTA to scalars or
+    arrays of equal shape. Percentages with no attempts are NaN.
+    """
+    pts, fgm, fga, fg3m, fg3a, ftm, fta = (np.asarray(totals[c], dtype=float) for c in SHOOTING_COLUMNS)
+    ts_attempts = 2 * (fga + 0.44 * fta)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'fg_pct': np.where(fga > 0, fgm / fga, np.nan),
+            'fg3_pct': np.where(fg3a > 0, fg3m / fg3a, np.nan),
+            'ft_pct': np.where(fta > 0, ftm / fta, np.nan),
+            'ts_pct': np.where(ts_attempts > 0, pts / ts_attempts, np.nan),
+            'efg_pct': np.where(fga > 0, (fgm + 0.5 * fg3m) / fga, np.nan),
+        }
+
+
+def career_shooting(totals):
+    """Return TS% and eFG% for a career or season totals row (None without attempts)"""
+    percentages = shooting_percentages(totals)
+    return {key: _optional(percentages[key]) for key in ('ts_pct', 'efg_pct')}
+
+
+def _optional(value):
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def combined_season_rows(rows):
+    """Drop a traded player's per-team season rows in favour of the season's TOT row.
+
+    Works for PlayerCareerStats SeasonTotalsRegularSeason rows and for rows
+    without SEASON_ID / TEAM_ABBREVIATION, which are all kept.
+    """
+    traded = {(row.get('PLAYER_ID'), row.get('SEASON_ID')) for row in rows if row.get('TEAM_ABBREVIATION') == 'TOT'}
+    return [row for row in rows if row.get('TEAM_ABBREVIATION') == 'TOT'
+            or (row.get('PLAYER_ID'), row.get('SEASON_ID')) not in traded]
+
+
+def totals_matrix(rows, columns):
+    """Stack totals rows into a (rows x columns) float array; missing rows and values are NaN"""
+    values = [[np.nan if row is None or row.get(c) is None else row[c] for c in columns] for row in rows]
+    return np.array(values, dtype=float).reshape(len(rows), len(columns))
+
+
+def percentile_ranks(matrix):
+    """Percentile rank (0-100) of every value within its column.
+
+    100 is the highest value of the column and 0 the lowest; tied values
+    share the midpoint of their ranks. NaN values stay NaN and are not ranked.
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    ranks = np.full(matrix.shape, np.nan)
+    for j in range(matrix.shape[1]):
+        column = matrix[:, j]
+        present = ~np.isnan(column)
+        count = int(present.sum())
+        if count == 1:
+            ranks[present, j] = 100.0
+        elif count:
+            ordered = np.sort(column[present])
+            below = np.searchsorted(ordered, column[present], side='left')
+            ties = np.searchsorted(ordered, column[present], side='right') - below
+            ranks[present, j] = 100 * (below + (ties - 1) / 2) / (count - 1)
+    return ranks
+
+
+def compare_totals(rows):
+    """Compare totals rows (career or season, None for a missing player) in one vectorized pass.
+
+    Returns per-player arrays: 'games', 'minutes', 'totals', 'per_game' and
+    'per_36' ({key: array} over COMPARISON_COLUMNS), 'shooting' (from summed
+    makes and attempts) and 'percentiles' (ranks of the per-game values and
+    shooting percentages among the compared players).
+    """
+    matrix = totals_matrix(rows, COMPARISON_TOTAL_COLUMNS)
+    column = {name: matrix[:, i] for i, name in enumerate(COMPARISON_TOTAL_COLUMNS)}
+    counts = matrix[:, 2:2 + len(COMPARISON_COLUMNS)]
+    games = column['GP'][:, None]
+    minutes = column['MIN'][:, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        per_game = np.where(games > 0, counts / games, np.nan)
+        per_36 = np.where(minutes > 0, counts * 36 / minutes, np.nan)
+    shooting = shooting_percentages(column)
+
+    keys = list(COMPARISON_COLUMNS) + list(PERCENTAGE_KEYS)
+    ranks = percentile_ranks(np.column_stack([per_game] + [shooting[key] for key in PERCENTAGE_KEYS]))
+    return {
+        'games': column['GP'],
+        'minutes': column['MIN'],
+        'totals': dict(zip(COMPARISON_COLUMNS, counts.T)),
+        'per_game': dict(zip(COMPARISON_COLUMNS, per_game.T)),
+        'per_36': dict(zip(COMPARISON_COLUMNS, per_36.T)),
+        'shooting': shooting,
+        'percentiles': dict(zip(keys, ranks.T)),
+    }
+
+
+class GameLogArrays:
+    """Columnar game log for one player, one row per game, oldest game first.
+
+    `values` is a (games x stats) float array; missing values are NaN.
+    Rolling statistics are computed for every stat column at once.
+    """
+
+    def __init__(self, values, columns, game_dates, season_ids):
+        self.values = values
+        self.columns = tuple(columns)
+        self.game_dates = game_dates
+        self.season_ids = season_ids
+        self._column_index = {name: i for i, name in enumerate(self.columns)}
+
+    @classmethod
+    def from_games(cls, games, columns=STAT_COLUMNS):
+        """Build the arrays from PlayerGameLog rows of one or more seasons, in any order"""
+        values = np.array([[game.get(c) for c in columns] for game in games], dtype=float).reshape(len(games), len(columns))
+        game_dates = np.array([parse_game_date(game['GAME_DATE']) for game in games], dtype='datetime64[D]')
+        season_ids = np.array([game.get('SEASON_ID', '') for game in games], dtype=str)
+        order = np.argsort(game_dates, kind='stable')
+        return cls(values[order], columns, game_dates[order], season_ids[order])
+
+    def __len__(self):
+        return len(self.values)
+
+    def column(self, name):
+        """Return one stat column as a 1-D array"""
+        return self.values[:, self._column_index[name]]
+
+    def seasons(self):
+        """Return the season ids present, oldest first"""
+        return list(dict.fromkeys(self.season_ids.tolist()))
+
+    def season(self, season_id):
+        """Return the games of a single season"""
+        mask = self.season_ids == season_id
+        return GameLogArrays(self.values[mask], self.columns, self.game_dates[mask], self.season_ids[mask])
+
+    def last(self, games):
+        """Return the most recent `games` games"""
+        start = max(len(self) - games, 0)
+        return GameLogArrays(self.values[start:], self.columns, self.game_dates[start:], self.season_ids[start:])
+
+    def windows(self, window):
+        """Return a (windows x stats x window) view of every run of `window` consecutive games"""
+        return sliding_window_view(self.values, window, axis=0)
+
+    def rolling_mean(self, window):
+        """Mean of every stat over each run of `window` games; row i ends at game i + window - 1.
+
+        Missing values are left out of their windows' means (NaN only when
+        a window has no values at all).
+        """
+        if window > len(self):
+            return np.empty((0, len(self.columns)))
+        start = np.zeros(len(self.columns))
+        sums = np.cumsum(np.vstack([start, np.nan_to_num(self.values)]), axis=0)
+        counts = np.cumsum(np.vstack([start, ~np.isnan(self.values)]), axis=0)
+        present = counts[window:] - counts[:-window]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(present > 0, (sums[window:] - sums[:-window]) / present, np.nan)
+
+    def rolling_sum(self, window):
+        """Total of every stat over each run of `window` games, missing values counted as 0"""
+        if window > len(self):
+            return np.empty((0, len(self.columns)))
+        sums = np.cumsum(np.vstack([np.zeros(len(self.columns)), np.nan_to_num(self.values)]), axis=0)
+        return sums[window:] - sums[:-window]
+
+    def rolling_shooting(self, window):
+        """Shooting percentages from summed makes and attempts over each run of `window` games"""
+        sums = self.rolling_sum(window)
+        return shooting_percentages({c: sums[:, self._column_index[c]] for c in SHOOTING_COLUMNS})
+
+    def rolling_median(self, window):
+        """Median of every stat over each run of `window` games"""
+        if window > len(self):
+            return np.empty((0, len(self.columns)))
+        return np.median(self.windows(window), axis=-1)
+
+    def rolling_std(self, window):
+        """Population standard deviation of every stat over each run of `window` games"""
+        if window > len(self):
+            return np.empty((0, len(self.columns)))
+        return np.std(self.windows(window), axis=-1)
+
+    def rolling_ewm(self, window):
+        """Exponentially weighted mean of every stat over each run of `window` games"""
+        if window > len(self):
+            return np.empty((0, len(self.columns)))
+        return self.windows(window) @ ewm_weights(window)
+
+    def window_summary(self, window):
+        """Return mean, median, std and EWM of every stat over the most recent `window` games,
+        plus shooting percentages computed from the window's totals.
+
+        Fewer games than `window` are summarized as they are, so a short
+        season still gets a summary; None is returned when there are no games.
+        """
+        recent = self.last(window)
+        if not len(recent):
+            return None
+        size = len(recent)
+        summary = {
+            'games': size,
+            'mean': recent.rolling_mean(size)[-1],
+            'median': recent.rolling_median(size)[-1],
+            'std': recent.rolling_std(size)[-1],
+            'ewm': recent.rolling_ewm(size)[-1],
+        }
+        result = {
+            key: value if key == 'games' else dict(zip(self.columns, value.tolist()))
+            for key, value in summary.items()
+        }
+        result['shooting'] = {key: _optional(value[-1]) for key, value in recent.rolling_shooting(size).items()}
+        return result
+
+
+def recent_averages(game_log, window=5):
+    """Return the recent_averages dict for the last `window` games.
+
+    Counting stats are per-game means; shooting percentages are derived from
+    the window's total makes and attempts (None when there were no attempts).
+    """
+    summary = game_log.window_summary(window)
+    if summary is None:
+        return None
+    means = summary['mean']
+    averages = {key: means[column] for key, column in RECENT_AVERAGE_COLUMNS.items()}
+    averages.update(summary['shooting'])
+    return averages
+
+
+def roster_window_summaries(game_logs, windows=DEFAULT_WINDOWS):
+    """Summarize several windows for many players: {player_id: {window: summary}}"""
+    return {
+        player_id: {window: game_log.window_summary(window) for window in windows}
+        for player_id, game_log in game_logs.items()
+    }
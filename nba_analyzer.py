@@ -1,9 +1,269 @@
-from nba_api.stats.static import players
-from nba_api.stats.endpoints import commonplayerinfo, playergamelog, playercareerstats
+import argparse
+import cProfile
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
 from datetime import datetime
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from itertools import islice
+from nba_cache import ResponseCache, DEFAULT_MAX_BYTES
+from nba_metrics import metrics, span
+from nba_search import PlayerIndex
+
+class _LazyModule:
+    """Stand-in for a module that is only imported on first attribute access"""
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(importlib.import_module(self._name), attr)
+
+# nba_api's endpoint package, numpy and matplotlib take most of a second to
+# import, so they are only loaded by the code paths that need them
+players = _LazyModule('nba_api.stats.static.players')
+teams = _LazyModule('nba_api.stats.static.teams')
+commonplayerinfo = _LazyModule('nba_api.stats.endpoints.commonplayerinfo')
+playergamelog = _LazyModule('nba_api.stats.endpoints.playergamelog')
+playercareerstats = _LazyModule('nba_api.stats.endpoints.playercareerstats')
+leaguedashplayerstats = _LazyModule('nba_api.stats.endpoints.leaguedashplayerstats')
+commonteamroster = _LazyModule('nba_api.stats.endpoints.commonteamroster')
+nba_stats_http = _LazyModule('nba_api.stats.library.http')
+nba_transport = _LazyModule('nba_transport')
+nba_analytics = _LazyModule('nba_analytics')
+nba_warehouse = _LazyModule('nba_warehouse')
+nba_charts = _LazyModule('nba_charts')
+nba_output = _LazyModule('nba_output')
+nba_league = _LazyModule('nba_league')
+nba_gamelog = _LazyModule('nba_gamelog')
+nba_watch = _LazyModule('nba_watch')
+nba_similarity = _LazyModule('nba_similarity')
+nba_reports = _LazyModule('nba_reports')
+nba_aggregate = _LazyModule('nba_aggregate')
+
+DEFAULT_BATCH_WORKERS = 8
+
+# First season LeagueDashPlayerStats has totals for
+SIMILARITY_FIRST_SEASON = '1996-97'
+
+# Game log season types: name -> (PlayerGameLog season_type_all_star, SEASON_ID prefix)
+SEASON_TYPES = {
+    'regular': ('Regular Season', '2'),
+    'playoffs': ('Playoffs', '4'),
+    'playin': ('PlayIn', '5'),
+}
+
+_response_cache = None
+_cache_disabled = False
+_player_index = None
+_player_index_lock = threading.Lock()
+_warehouse = None
+_league_indexes = {}
+_similarity_index = None
+
+def configure_cache(path=None, max_bytes=DEFAULT_MAX_BYTES, ttls=None, offline=False, enabled=True):
+    """Configure the on-disk response cache used for all nba_api requests"""
+    global _response_cache, _cache_disabled
+    if _response_cache is not None:
+        _response_cache.close()
+    _cache_disabled = not enabled
+    if enabled:
+        _response_cache = ResponseCache(path, max_bytes=max_bytes, ttls=ttls, offline=offline)
+    else:
+        _response_cache = None
+    return _response_cache
+
+def get_response_cache():
+    """Return the active response cache, opening the default one on first use"""
+    if _response_cache is None and not _cache_disabled:
+        configure_cache()
+    return _response_cache
+
+def fetch_response(endpoint_class, fresh=False, **params):
+    """Fetch an nba_api endpoint's response, serving it from the cache until it expires.
+
+    `fresh=True` always requests stats.nba.com and replaces the cached response.
+    """
+    endpoint = endpoint_class.endpoint
+    with span(f'fetch.{endpoint}'):
+        cache = get_response_cache()
+        body = cache.get(endpoint, params) if cache is not None and not fresh else None
+        if cache is not None and not fresh:
+            metrics.increment('cache_requests_total', endpoint=endpoint, result='miss' if body is None else 'hit')
+        if body is None:
+            body = nba_transport.request_endpoint(endpoint_class, **params)
+            response = nba_stats_http.NBAStatsResponse(response=body, status_code=200, url=None)
+            if cache is not None and response.valid_json():
+                cache.put(endpoint, params, body)
+        else:
+            metrics.increment('cache_hit_bytes_total', len(body.encode('utf-8')), endpoint=endpoint)
+            response = nba_stats_http.NBAStatsResponse(response=body, status_code=200, url=None)
+        return response
+
+def fetch_endpoint(endpoint_class, fresh=False, **params):
+    """Fetch an nba_api endpoint's normalized dict (a list of row dicts per result set)"""
+    response = fetch_response(endpoint_class, fresh, **params)
+    with span(f'parse.{endpoint_class.endpoint}'):
+        return response.get_normalized_dict()
+
+def fetch_result_set(endpoint_class, name, **params):
+    """Fetch one result set of an endpoint as (headers, rows) lists, without a dict per row"""
+    response = fetch_response(endpoint_class, **params)
+    with span(f'parse.{endpoint_class.endpoint}'):
+        data = response.get_dict()
+    result_sets = data.get('resultSets', data.get('resultSet', []))
+    for result_set in result_sets if isinstance(result_sets, list) else [result_sets]:
+        if result_set['name'] == name:
+            return result_set['headers'], result_set['rowSet']
+    raise KeyError(f'{endpoint_class.endpoint} response has no {name} result set')
+
+def configure_warehouse(path=None):
+    """Open the local stats warehouse at `path` (default location when None)"""
+    global _warehouse
+    if _warehouse is not None:
+        _warehouse.close()
+    _warehouse = nba_warehouse.StatsWarehouse(path)
+    return _warehouse
+
+def get_warehouse():
+    """Return the local stats warehouse, opening the default one on first use"""
+    if _warehouse is None:
+        configure_warehouse()
+    return _warehouse
+
+def build_league_index(season=None):
+    """Build a season's league index from one LeagueDashPlayerStats request and save it to disk"""
+    season = season or current_season()
+    rows = fetch_endpoint(leaguedashplayerstats.LeagueDashPlayerStats, season=season,
+                          per_mode_detailed='Totals')['LeagueDashPlayerStats']
+    index = nba_league.LeagueIndex.from_rows(season, rows)
+    index.save(nba_league.league_index_path(season))
+    _league_indexes[season] = index
+    return index
+
+def get_league_index(season=None, fetch=True):
+    """Return a season's league index from memory or disk, building it when missing and `fetch` is set.
+
+    Returns None when the index is not saved and `fetch` is False.
+    """
+    season = season or current_season()
+    if season not in _league_indexes:
+        path = nba_league.league_index_path(season)
+        if os.path.exists(path):
+            _league_indexes[season] = nba_league.LeagueIndex.load(path)
+        elif fetch:
+            return build_league_index(season)
+        else:
+            return None
+    return _league_indexes[season]
+
+def build_similarity_index(first_season=SIMILARITY_FIRST_SEASON, last_season=None,
+                           max_workers=DEFAULT_BATCH_WORKERS):
+    """Build the career similarity index from one LeagueDashPlayerStats request per season and save it.
+
+    Summing every player's season totals gives the same career totals as
+    PlayerCareerStats, at about 30 requests instead of one per player.
+    """
+    global _similarity_index
+    seasons = season_range(first_season, last_season or current_season())
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        season_rows = executor.map(lambda season: fetch_endpoint(
+            leaguedashplayerstats.LeagueDashPlayerStats, season=season,
+            per_mode_detailed='Totals')['LeagueDashPlayerStats'], seasons)
+        rows = [row for season in season_rows for row in season]
+    index = nba_similarity.SimilarityIndex.from_season_totals(rows, seasons=(seasons[0], seasons[-1]))
+    index.save(nba_similarity.similarity_index_path())
+    _similarity_index = index
+    return index
+
+def get_similarity_index(fetch=True):
+    """Return the similarity index from memory or disk, building it when missing and `fetch` is set (else None)"""
+    global _similarity_index
+    if _similarity_index is None:
+        path = nba_similarity.similarity_index_path()
+        if os.path.exists(path):
+            _similarity_index = nba_similarity.SimilarityIndex.load(path)
+        elif fetch:
+            return build_similarity_index()
+    return _similarity_index
+
+def find_similar_players(player_id, limit=10, metric='cosine'):
+    """Return the players whose careers are most similar to `player_id`'s, as [{player_id, name, score}].
+
+    Players missing from the index (e.g. whose careers ended before
+    1996-97) are compared using their own PlayerCareerStats totals.
+    """
+    index = get_similarity_index()
+    totals = None
+    if player_id not in index:
+        career = fetch_endpoint(playercareerstats.PlayerCareerStats, player_id=player_id)['CareerTotalsRegularSeason']
+        if not career:
+            raise ValueError(f'No career stats available for player {player_id}')
+        totals = career[0]
+    return [{'player_id': similar_id, 'name': name, 'score': score}
+            for similar_id, name, score in index.similar(player_id, limit, metric, totals)]
+
+def league_leaders(limit=10, processes=None):
+    """Aggregate every player synced into the local warehouse (see nba_aggregate.aggregate_league).
+
+    Returns the LeagueAggregate and {player_id: name} for its leaders.
+    """
+    aggregate = nba_aggregate.aggregate_league(get_warehouse().path, k=limit, processes=processes)
+    leader_ids = {player_id for board in aggregate.leaders.values() for leaders in board.values()
+                  for _, player_id, _ in leaders}
+    names = {player['id']: player['full_name'] for player in get_player_index().players
+             if player['id'] in leader_ids}
+    return aggregate, names
+
+def current_season(today=None):
+    """Return the current NBA season string, e.g. '2024-25' (seasons start in October)"""
+    today = today or datetime.now()
+    start_year = today.year if today.month >= 10 else today.year - 1
+    return f"{start_year}-{(start_year + 1) % 100:02d}"
+
+def season_id_for(season, season_type_prefix='2'):
+    """Return the SEASON_ID a game log uses for a season string ('2023-24' -> '22023')"""
+    return f"{season_type_prefix}{season[:4]}"
+
+def season_from_id(season_id):
+    """Return the season string for a SEASON_ID ('22023' -> '2023-24')"""
+    start_year = int(str(season_id)[1:5])
+    return f"{start_year}-{(start_year + 1) % 100:02d}"
+
+def season_range(first, last):
+    """List the seasons from `first` to `last` inclusive ('2021-22', '2023-24' -> three seasons)"""
+    start_year, end_year = int(first[:4]), int(last[:4])
+    return [f"{year}-{(year + 1) % 100:02d}" for year in range(start_year, end_year + 1)]
+
+def parse_seasons(values):
+    """Expand season arguments such as '2023-24' and '2019-20:2023-24' into a list of seasons"""
+    seasons = []
+    for value in values:
+        first, _, last = value.partition(':')
+        seasons.extend(season_range(first, last or first))
+    return seasons
+
+def available_seasons(info_response, season_type='regular'):
+    """Seasons a player has games of `season_type` in, oldest first, from a CommonPlayerInfo response"""
+    prefix = SEASON_TYPES[season_type][1]
+    season_ids = {str(row['SEASON_ID']) for row in info_response.get('AvailableSeasons') or []}
+    return sorted(season_from_id(season_id) for season_id in season_ids if season_id.startswith(prefix))
+
+def get_player_index():
+    """Return the player name search index, building it from the static player list on first use"""
+    global _player_index
+    if _player_index is None:
+        with _player_index_lock:
+            if _player_index is None:
+                _player_index = PlayerIndex(players.get_players())
+    return _player_index
 
 def search_player(player_name):
-    """Search for a player by name"""
+    """Search for a player by name (accent-insensitive, with prefix and fuzzy matching)"""
     try:
         # Validate input
         if not player_name or not player_name.strip():
@@ -14,217 +274,337 @@ def search_player(player_name):
         if not cleaned_name:
             return []
 
-        player_list = players.find_players_by_full_name(cleaned_name)
+        with span('search'):
+            player_list = get_player_index().search(cleaned_name)
         if not player_list:
             raise ValueError('No players found. Try using the player\'s full name.')
         return player_list
     except Exception as e:
-        print(f'Error searching for player: {str(e)}')
+        print(f'Error searching for player: {str(e)}', file=sys.stderr)
         return []
 
-def get_player_stats(player_id):
-    """Get comprehensive player stats"""
+def map_concurrently(func, items, max_workers=DEFAULT_BATCH_WORKERS):
+    """Run `func(item)` on a thread pool, yielding (item, result) in completion order.
+
+    At most `max_workers` calls are in flight: the next item is submitted
+    as each one finishes, and a result is released once it is yielded, so
+    memory stays bounded however many items there are. A failing call
+    raises from the generator.
+    """
+    items = iter(items)
+    executor = ThreadPoolExecutor(max_workers=max_workers)
     try:
-        # Get player info
-        player_info = commonplayerinfo.CommonPlayerInfo(player_id=player_id)
-        info = player_info.get_normalized_dict()['CommonPlayerInfo'][0]
-        
-        # Get recent games
-        game_log = playergamelog.PlayerGameLog(player_id=player_id, season='2023-24')
-        games = game_log.get_normalized_dict()['PlayerGameLog']
-        
-        # Get career stats
-        career = playercareerstats.PlayerCareerStats(player_id=player_id)
-        career_stats = career.get_normalized_dict()
-        
-        recent_games = games[:5] if games else []
-        
-        # Calculate recent averages
-        if recent_games:
-            recent_averages = {
-                'points': sum(game['PTS'] for game in recent_games) / len(recent_games),
-                'rebounds': sum(game['REB'] for game in recent_games) / len(recent_games),
-                'assists': sum(game['AST'] for game in recent_games) / len(recent_games),
-                'steals': sum(game['STL'] for game in recent_games) / len(recent_games),
-                'blocks': sum(game['BLK'] for game in recent_games) / len(recent_games),
-                'fg_pct': sum(game['FG_PCT'] for game in recent_games) / len(recent_games),
-                'fg3_pct': sum(game['FG3_PCT'] for game in recent_games) / len(recent_games),
-                'ft_pct': sum(game['FT_PCT'] for game in recent_games) / len(recent_games),
-            }
-        else:
-            recent_averages = None
-
-        return {
-            'info': {
-                'name': f"{info['FIRST_NAME']} {info['LAST_NAME']}",
-                'team': info['TEAM_NAME'],
-                'position': info['POSITION'],
-                'height': info['HEIGHT'],
-                'weight': info['WEIGHT'],
-                'country': info['COUNTRY'],
-                'experience': info['SEASON_EXP'],
-                'draft_year': info['DRAFT_YEAR'],
-                'jersey': info.get('JERSEY', 'N/A')
-            },
-            'recent_games': recent_games,
-            'recent_averages': recent_averages,
-            'season_by_season': career_stats['SeasonTotalsRegularSeason'],
-            'career_totals': career_stats['CareerTotalsRegularSeason'][0] if career_stats['CareerTotalsRegularSeason'] else None
-        }
+        pending = {executor.submit(func, item): item for item in islice(items, max_workers)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            while done:
+                future = done.pop()
+                item = pending.pop(future)
+                for next_item in islice(items, 1):
+                    pending[executor.submit(func, next_item)] = next_item
+                yield item, future.result()
+    finally:
+        # Stop queued calls if the caller stops consuming results early
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def fetch_game_log(player_id, season, season_type='regular'):
+    """Fetch one season's games (newest first) for a season type as a columnar GameLog"""
+    params = {'player_id': player_id, 'season': season}
+    # Regular season is nba_api's default; leaving it out keeps existing cache keys
+    if season_type != 'regular':
+        params['season_type_all_star'] = SEASON_TYPES[season_type][0]
+    headers, rows = fetch_result_set(playergamelog.PlayerGameLog, 'PlayerGameLog', **params)
+    return nba_gamelog.GameLog.from_result_set(headers, rows)
+
+def stream_game_logs(player_id, seasons=None, season_types=('regular',), max_workers=DEFAULT_BATCH_WORKERS):
+    """Fetch a player's game logs concurrently, yielding (season, season_type, GameLog) as each log arrives.
+
+    `seasons` defaults to the player's entire career: every season the
+    player has games of each type in, per CommonPlayerInfo. At most
+    `max_workers` seasons are fetched ahead of the consumer, so a long
+    career is never held in memory at once.
+    """
+    if seasons is None:
+        info_response = fetch_endpoint(commonplayerinfo.CommonPlayerInfo, player_id=player_id)
+        logs = [(season, season_type) for season_type in season_types
+                for season in available_seasons(info_response, season_type)]
+    else:
+        logs = [(season, season_type) for season_type in season_types for season in seasons]
+
+    for (season, season_type), games in map_concurrently(lambda log: fetch_game_log(player_id, *log), logs,
+                                                           max_workers):
+        yield season, season_type, games
+
+def iter_games(player_id, seasons=None, season_types=('regular',), max_workers=DEFAULT_BATCH_WORKERS):
+    """Yield a player's games (GameRow views) one at a time as each season's log arrives (see stream_game_logs)"""
+    for _, _, games in stream_game_logs(player_id, seasons, season_types, max_workers):
+        yield from games
+
+def get_player_stats(player_id, season=None, season_type='regular'):
+    """Get comprehensive player stats, with recent games from `season` (default: the latest played)"""
+    with span('get_player_stats'):
+        return _get_player_stats(player_id, season, season_type)
+
+def _get_player_stats(player_id, season, season_type):
+    latest = season is None
+    season = season or current_season()
+    # The three endpoints are independent, so fetch them concurrently
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        info_future = executor.submit(fetch_endpoint, commonplayerinfo.CommonPlayerInfo, player_id=player_id)
+        game_log_future = executor.submit(fetch_game_log, player_id, season, season_type)
+        career_future = executor.submit(fetch_endpoint, playercareerstats.PlayerCareerStats, player_id=player_id)
+
+    # Failures are handled per section: without the player info there is
+    # nothing to show, but a missing game log or career only blanks that section
+    # Diagnostics go to stderr, so they never end up in JSON or CSV output
+    try:
+        games = game_log_future.result()
+    except Exception as e:
+        print(f'Error getting game log: {str(e)}', file=sys.stderr)
+        games = nba_gamelog.GameLog.from_games([])
+
+    if latest and not games and info_future.exception() is None:
+        # Before a season starts (or after a player retires) show the last season played.
+        # A failed info fetch is reported with the player info below.
+        played = available_seasons(info_future.result(), season_type)
+        if played and played[-1] != season:
+            try:
+                games = fetch_game_log(player_id, played[-1], season_type)
+            except Exception as e:
+                print(f'Error getting game log: {str(e)}', file=sys.stderr)
+
+    try:
+        career_stats = career_future.result()
+        season_by_season = career_stats['SeasonTotalsRegularSeason']
+        career_totals = career_stats['CareerTotalsRegularSeason'][0] if career_stats['CareerTotalsRegularSeason'] else None
     except Exception as e:
-        print(f'Error getting player stats: {str(e)}')
+        print(f'Error getting career stats: {str(e)}', file=sys.stderr)
+        season_by_season = []
+        career_totals = None
+
+    try:
+        info = info_future.result()['CommonPlayerInfo'][0]
+    except Exception as e:
+        print(f'Error getting player info: {str(e)}', file=sys.stderr)
         return None
+    try:
+        return build_player_stats(info, games[:5], games.arrays(), season_by_season, career_totals)
+    except Exception as e:
+        print(f'Error getting player stats: {str(e)}', file=sys.stderr)
+        return None
+
+def build_player_stats(info, recent_games, game_log, season_by_season, career_totals):
+    """Assemble the stats dict from a CommonPlayerInfo row, the game log and career totals"""
+    # Calculate recent averages
+    with span('compute.recent_averages'):
+        recent_averages = nba_analytics.recent_averages(game_log, window=5)
+
+    return {
+        'info': {
+            'name': f"{info['FIRST_NAME']} {info['LAST_NAME']}",
+            'team': info['TEAM_NAME'],
+            'position': info['POSITION'],
+            'height': info['HEIGHT'],
+            'weight': info['WEIGHT'],
+            'country': info['COUNTRY'],
+            'experience': info['SEASON_EXP'],
+            'draft_year': info['DRAFT_YEAR'],
+            'jersey': info.get('JERSEY', 'N/A'),
+            'player_id': info.get('PERSON_ID')
+        },
+        'recent_games': recent_games,
+        'recent_averages': recent_averages,
+        'season_by_season': season_by_season,
+        'career_totals': career_totals
+    }
+
+def load_player_stats(player_id):
+    """Get player stats from the local warehouse, or None if the player has not been synced"""
+    warehouse = get_warehouse()
+    info = warehouse.player_info(player_id)
+    if info is None:
+        return None
+    return build_player_stats(
+        info,
+        warehouse.games(player_id, limit=5),
+        warehouse.game_log_arrays(player_id),
+        warehouse.season_totals(player_id),
+        warehouse.career_totals(player_id),
+    )
+
+def sync_player(player_id, season=None):
+    """Bring a player's warehouse data up to date, fetching only games newer than those stored.
+
+    The game log and career totals bypass the response cache, whose copies
+    predate tonight's games; career totals are only refetched when new games
+    arrived (or none are stored yet). Returns the number of new games.
+    """
+    warehouse = get_warehouse()
+    season = season or current_season()
+
+    info = fetch_endpoint(commonplayerinfo.CommonPlayerInfo, player_id=player_id)['CommonPlayerInfo'][0]
+    warehouse.store_player_info(player_id, info)
+
+    params = {'player_id': player_id, 'season': season}
+    latest = warehouse.latest_game_date(player_id, season_id=season_id_for(season))
+    if latest is not None:
+        params['date_from_nullable'] = (latest + 1).item().strftime('%m/%d/%Y')
+    games = fetch_endpoint(playergamelog.PlayerGameLog, fresh=True, **params)['PlayerGameLog']
+    new_games = warehouse.store_games(games)
+
+    if new_games or warehouse.career_totals(player_id) is None:
+        career_stats = fetch_endpoint(playercareerstats.PlayerCareerStats, fresh=True, player_id=player_id)
+        career_totals = career_stats['CareerTotalsRegularSeason']
+        warehouse.store_career(player_id, career_stats['SeasonTotalsRegularSeason'],
+                               career_totals[0] if career_totals else None)
+    return new_games
+
+def sync_warehouse(player_ids=None, season=None, max_workers=DEFAULT_BATCH_WORKERS):
+    """Sync many players (default: every stored player); returns {player_id: new games or None on error}"""
+    warehouse = get_warehouse()
+    if player_ids is None:
+        player_ids = warehouse.player_ids()
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(sync_player, player_id, season): player_id for player_id in player_ids}
+        for future in as_completed(futures):
+            player_id = futures[future]
+            try:
+                results[player_id] = future.result()
+            except Exception as e:
+                print(f'Error syncing player {player_id}: {str(e)}', file=sys.stderr)
+                results[player_id] = None
+    return results
+
+def fetch_new_games(player_id, season, date_from=None):
+    """Fetch a season's games played on or after `date_from` (a datetime64 day) straight from stats.nba.com.
 
-def display_player_stats(stats):
-    """Display comprehensive player stats"""
+    The response cache is bypassed: it would serve the game log fetched
+    before tonight's game.
+    """
+    params = {'player_id': player_id, 'season': season}
+    if date_from is not None:
+        params['date_from_nullable'] = date_from.item().strftime('%m/%d/%Y')
+    body = nba_transport.request_endpoint(playergamelog.PlayerGameLog, **params)
+    response = nba_stats_http.NBAStatsResponse(response=body, status_code=200, url=None)
+    result_set = response.get_dict()['resultSets'][0]
+    return nba_gamelog.GameLog.from_result_set(result_set['headers'], result_set['rowSet'])
+
+def watch_player(player_id, source='live', interval=None, max_interval=None, polls=None, out=None,
+                 sleep=time.sleep):
+    """Watch a player's games, writing stat changes as they happen and updated averages after each game.
+
+    `source` is 'live' (cdn.nba.com box scores, polled conditionally) or
+    'gamelog' (new PlayerGameLog rows). Polls back off from `interval` to
+    `max_interval` seconds while nothing changes. Returns the number of polls.
+    """
+    out = out or sys.stdout
+    season = current_season()
+    stats = get_player_stats(player_id, season)
+    if not stats:
+        raise ValueError(f'No stats available for player {player_id}')
+    # Same request as inside get_player_stats, so served by the response cache
+    games = fetch_game_log(player_id, season)
+    player = nba_watch.PlayerWatch(stats['info']['name'], games, stats['career_totals'])
+    if source == 'live':
+        poller = nba_watch.LiveSource(player_id, stats['info']['team'])
+    else:
+        poller = nba_watch.GameLogSource(lambda date_from: fetch_new_games(player_id, season, date_from), games)
+    out.write('\n'.join(player.summary()) + f'\nWatching the {poller.name} (Ctrl+C to stop)...\n')
+    out.flush()
+    return nba_watch.watch(player, poller, out, interval or nba_watch.DEFAULT_INTERVAL,
+                           max_interval or nba_watch.DEFAULT_MAX_INTERVAL, polls, sleep)
+
+def get_many_player_stats(player_ids, max_workers=DEFAULT_BATCH_WORKERS, **options):
+    """Fetch stats for many players concurrently, yielding (player_id, stats) as each completes.
+
+    `options` (season, season_type) are passed on to get_player_stats.
+    """
+    yield from map_concurrently(lambda player_id: get_player_stats(player_id, **options), player_ids, max_workers)
+
+def find_team(team):
+    """Look up a team by abbreviation ('LAL'), nickname ('Lakers') or full name; returns the static team dict"""
+    wanted = team.strip().lower()
+    for candidate in teams.get_teams():
+        if wanted in (candidate['abbreviation'].lower(), candidate['nickname'].lower(),
+                      candidate['full_name'].lower()):
+            return candidate
+    raise ValueError(f'Unknown team: {team}')
+
+def team_roster(team, season=None):
+    """Return the player ids on a team's roster for `season` (default: current)"""
+    roster = fetch_endpoint(commonteamroster.CommonTeamRoster, team_id=find_team(team)['id'],
+                            season=season or current_season())['CommonTeamRoster']
+    return [row['PLAYER_ID'] for row in roster]
+
+def active_player_ids():
+    """Return the ids of every active player in the bundled player list"""
+    return [player['id'] for player in get_player_index().players if player['is_active']]
+
+def generate_report(player_ids, path, title='NBA Player Report', fmt='svg', league=None, restart=False,
+                    progress=None):
+    """Write one HTML report with charts for many players (see nba_reports.build_report).
+
+    Synced players are read from the local warehouse, the rest fetched.
+    """
+    def fetch(player_id):
+        return load_player_stats(player_id) or get_player_stats(player_id)
+    return nba_reports.build_report(player_ids, path, fetch, title=title, league=league, fmt=fmt,
+                                    restart=restart, progress=progress)
+
+def display_player_stats(stats, out=None, league=None):
+    """Display comprehensive player stats, with league ranks when a LeagueIndex is given"""
+    out = out or sys.stdout
     if not stats:
-        print("No stats available")
+        out.write("No stats available\n")
         return
-        
-    # Display basic info
-    info = stats['info']
-    print("\nPlayer Details:")
-    print("=" * 50)
-    print(f"Name: {info['name']}")
-    print(f"Team: {info['team']}")
-    print(f"Position: {info['position']}")
-    print(f"Height: {info['height']}")
-    print(f"Weight: {info['weight']}")
-    print(f"Country: {info['country']}")
-    print(f"Experience: {info['experience']} years")
-    print(f"Draft Year: {info['draft_year']}")
-    print(f"Jersey Number: {info['jersey']}")
-
-    # Display recent averages
-    if stats['recent_averages']:
-        print("\nRecent Averages (Last 5 Games):")
-        print("=" * 50)
-        ra = stats['recent_averages']
-        print(f"Points: {ra['points']:.1f}")
-        print(f"Rebounds: {ra['rebounds']:.1f}")
-        print(f"Assists: {ra['assists']:.1f}")
-        print(f"Steals: {ra['steals']:.1f}")
-        print(f"Blocks: {ra['blocks']:.1f}")
-        print(f"FG%: {ra['fg_pct']*100:.1f}%")
-        print(f"3P%: {ra['fg3_pct']*100:.1f}%")
-        print(f"FT%: {ra['ft_pct']*100:.1f}%")
-    
-    # Display last game
-    if stats['recent_games']:
-        print("\nLast Game Performance:")
-        print("=" * 50)
-        lg = stats['recent_games'][0]
-        print(f"Date: {lg['GAME_DATE']}")
-        print(f"Points: {lg['PTS']}")
-        print(f"Rebounds: {lg['REB']}")
-        print(f"Assists: {lg['AST']}")
-        print(f"Steals: {lg['STL']}")
-        print(f"Blocks: {lg['BLK']}")
-        print(f"Minutes: {lg['MIN']}")
-        print(f"FG: {lg['FGM']}/{lg['FGA']} ({lg['FG_PCT']*100:.1f}%)")
-        print(f"3P: {lg['FG3M']}/{lg['FG3A']} ({lg['FG3_PCT']*100:.1f}%)")
-        print(f"FT: {lg['FTM']}/{lg['FTA']} ({lg['FT_PCT']*100:.1f}%)")
-    
-    # Display career stats
-    if stats['career_totals']:
-        print("\nCareer Averages:")
-        print("=" * 50)
-        ct = stats['career_totals']
-        games_played = ct['GP']
-        print(f"Games Played: {games_played}")
-        print(f"Points: {ct['PTS']/games_played:.1f}")
-        print(f"Rebounds: {ct['REB']/games_played:.1f}")
-        print(f"Assists: {ct['AST']/games_played:.1f}")
-        print(f"Steals: {ct['STL']/games_played:.1f}")
-        print(f"Blocks: {ct['BLK']/games_played:.1f}")
-        print(f"FG%: {ct['FG_PCT']*100:.1f}%")
-        print(f"3P%: {ct['FG3_PCT']*100:.1f}%")
-        print(f"FT%: {ct['FT_PCT']*100:.1f}%")
-        
-        # Career totals
-        print("\nCareer Totals:")
-        print("=" * 50)
-        print(f"Total Points: {ct['PTS']}")
-        print(f"Total Rebounds: {ct['REB']}")
-        print(f"Total Assists: {ct['AST']}")
-        print(f"Total Steals: {ct['STL']}")
-        print(f"Total Blocks: {ct['BLK']}")
-        print(f"Games Played: {ct['GP']}")
-        print(f"Minutes Played: {ct['MIN']}")
-
-def compare_players(player1_stats, player2_stats):
-    """Compare stats between two players"""
-    if not player1_stats or not player2_stats:
-        print("Cannot compare - stats missing for one or both players")
+    # Rendered as one block so the whole report is a single write
+    with span('display.report'):
+        report = nba_output.player_report(stats, league)
+    with span('display.format'):
+        text = nba_output.render_text(report)
+    with span('display.write'):
+        out.write(text)
+
+def compare_players(stats_list, out=None, fmt='text', league=None):
+    """Compare stats between any number of players in one table (text, json or csv)"""
+    out = out or sys.stdout
+    if len(stats_list) < 2 or not all(stats_list):
+        out.write("Cannot compare - stats missing for one or more players\n")
         return
-        
-    print("\nPlayer Comparison:")
-    print("=" * 70)
-    p1 = player1_stats['info']
-    p2 = player2_stats['info']
-    
-    # Basic Info Comparison
-    print(f"{'Attribute':<20} {p1['name']:<25} {p2['name']:<25}")
-    print("-" * 70)
-    print(f"{'Position':<20} {p1['position']:<25} {p2['position']:<25}")
-    print(f"{'Team':<20} {p1['team']:<25} {p2['team']:<25}")
-    print(f"{'Experience':<20} {p1['experience']:<25} {p2['experience']:<25}")
-    
-    # Recent Averages Comparison
-    if player1_stats['recent_averages'] and player2_stats['recent_averages']:
-        print("\nRecent Averages (Last 5 Games):")
-        print("-" * 70)
-        ra1 = player1_stats['recent_averages']
-        ra2 = player2_stats['recent_averages']
-        
-        print(f"{'Points':<20} {ra1['points']:>6.1f}{' ':>19} {ra2['points']:>6.1f}{' ':>19}")
-        print(f"{'Rebounds':<20} {ra1['rebounds']:>6.1f}{' ':>19} {ra2['rebounds']:>6.1f}{' ':>19}")
-        print(f"{'Assists':<20} {ra1['assists']:>6.1f}{' ':>19} {ra2['assists']:>6.1f}{' ':>19}")
-        print(f"{'Steals':<20} {ra1['steals']:>6.1f}{' ':>19} {ra2['steals']:>6.1f}{' ':>19}")
-        print(f"{'Blocks':<20} {ra1['blocks']:>6.1f}{' ':>19} {ra2['blocks']:>6.1f}{' ':>19}")
-        print(f"{'FG%':<20} {ra1['fg_pct']*100:>6.1f}%{' ':>18} {ra2['fg_pct']*100:>6.1f}%{' ':>18}")
-        print(f"{'3P%':<20} {ra1['fg3_pct']*100:>6.1f}%{' ':>18} {ra2['fg3_pct']*100:>6.1f}%{' ':>18}")
-        print(f"{'FT%':<20} {ra1['ft_pct']*100:>6.1f}%{' ':>18} {ra2['ft_pct']*100:>6.1f}%{' ':>18}")
-    
-    # Career Comparison
-    if player1_stats['career_totals'] and player2_stats['career_totals']:
-        print("\nCareer Averages:")
-        print("-" * 70)
-        ct1 = player1_stats['career_totals']
-        ct2 = player2_stats['career_totals']
-        gp1 = ct1['GP']
-        gp2 = ct2['GP']
-        
-        print(f"{'Games Played':<20} {ct1['GP']:>6}{' ':>19} {ct2['GP']:>6}{' ':>19}")
-        print(f"{'Points':<20} {ct1['PTS']/gp1:>6.1f}{' ':>19} {ct2['PTS']/gp2:>6.1f}{' ':>19}")
-        print(f"{'Rebounds':<20} {ct1['REB']/gp1:>6.1f}{' ':>19} {ct2['REB']/gp2:>6.1f}{' ':>19}")
-        print(f"{'Assists':<20} {ct1['AST']/gp1:>6.1f}{' ':>19} {ct2['AST']/gp2:>6.1f}{' ':>19}")
-        print(f"{'Steals':<20} {ct1['STL']/gp1:>6.1f}{' ':>19} {ct2['STL']/gp2:>6.1f}{' ':>19}")
-        print(f"{'Blocks':<20} {ct1['BLK']/gp1:>6.1f}{' ':>19} {ct2['BLK']/gp2:>6.1f}{' ':>19}")
-        print(f"{'FG%':<20} {ct1['FG_PCT']*100:>6.1f}%{' ':>18} {ct2['FG_PCT']*100:>6.1f}%{' ':>18}")
-        print(f"{'3P%':<20} {ct1['FG3_PCT']*100:>6.1f}%{' ':>18} {ct2['FG3_PCT']*100:>6.1f}%{' ':>18}")
-        print(f"{'FT%':<20} {ct1['FT_PCT']*100:>6.1f}%{' ':>18} {ct2['FT_PCT']*100:>6.1f}%{' ':>18}")
-        
-        # Career Totals
-        print("\nCareer Totals:")
-        print("-" * 70)
-        print(f"{'Total Points':<20} {ct1['PTS']:>6}{' ':>19} {ct2['PTS']:>6}{' ':>19}")
-        print(f"{'Total Rebounds':<20} {ct1['REB']:>6}{' ':>19} {ct2['REB']:>6}{' ':>19}")
-        print(f"{'Total Assists':<20} {ct1['AST']:>6}{' ':>19} {ct2['AST']:>6}{' ':>19}")
-        print(f"{'Total Steals':<20} {ct1['STL']:>6}{' ':>19} {ct2['STL']:>6}{' ':>19}")
-        print(f"{'Total Blocks':<20} {ct1['BLK']:>6}{' ':>19} {ct2['BLK']:>6}{' ':>19}")
+    with span('compare.report'):
+        report = nba_output.comparison_report(stats_list, league)
+    with span('compare.write'):
+        nba_output.write_comparison(report, out, fmt)
+
+def get_comparison_stats(player_ids, max_workers=DEFAULT_BATCH_WORKERS):
+    """Fetch the stats of players to compare concurrently, returned in the order of `player_ids`"""
+    results = dict(get_many_player_stats(player_ids, max_workers))
+    return [results[player_id] for player_id in player_ids]
+
+def write_player_reports(stats_list, fmt='ndjson', out=None, league=None):
+    """Write player reports in `fmt` (text, json, ndjson or csv); players without stats are skipped.
+
+    `stats_list` may be a generator such as get_many_player_stats: records
+    are written as they arrive. Returns the number of reports written.
+    """
+    out = out or sys.stdout
+    reports = (nba_output.player_report(stats, league) for stats in stats_list if stats)
+    return nba_output.write_reports(reports, out, fmt)
 
 def main():
     print("Welcome to NBA Stats Analyzer!")
     print("Loading data...")
+    get_player_index()
     
     while True:
         print("\nNBA Stats Analyzer")
         print("1. Search for a player")
         print("2. Compare two players")
-        print("3. Exit")
+        print("3. Sync local stats warehouse")
+        print("4. Exit")
         
-        choice = input("\nEnter your choice (1-3): ")
+        choice = input("\nEnter your choice (1-4): ")
         
         try:
             if choice == '1':
@@ -248,8 +628,10 @@ def main():
                         index = int(choice) - 1
                         if 0 <= index < len(players_found):
                             print("\nFetching comprehensive player stats...")
-                            stats = get_player_stats(players_found[index]['id'])
-                            display_player_stats(stats)
+                            player_id = players_found[index]['id']
+                            # Prefer synced local data over a network fetch
+                            stats = load_player_stats(player_id) or get_player_stats(player_id)
+                            display_player_stats(stats, league=get_league_index(fetch=False))
                             plot_player_stats(stats)
                         else:
                             print('Invalid selection.')
@@ -302,12 +684,27 @@ def main():
                     continue
                 
                 print("\nFetching stats for comparison...")
-                stats1 = get_player_stats(players1[index1]['id'])
-                stats2 = get_player_stats(players2[index2]['id'])
-                compare_players(stats1, stats2)
-                plot_comparison(stats1, stats2)
+                stats_list = get_comparison_stats([players1[index1]['id'], players2[index2]['id']])
+                compare_players(stats_list, league=get_league_index(fetch=False))
+                plot_comparison(stats_list)
                     
             elif choice == '3':
+                name = input('Enter a player name to add (or press Enter to refresh all stored players): ')
+                if name.strip():
+                    players_found = search_player(name)
+                    if not players_found:
+                        print('No players found.')
+                        continue
+                    player_ids = [players_found[0]['id']]
+                    print(f"Syncing {players_found[0]['full_name']}...")
+                else:
+                    player_ids = None
+                    print('Syncing all stored players...')
+                results = sync_warehouse(player_ids)
+                synced = [count for count in results.values() if count is not None]
+                print(f"Synced {len(synced)} player(s), {sum(synced)} new game(s).")
+
+            elif choice == '4':
                 print('Thanks for using NBA Stats Analyzer!')
                 break
                 
@@ -319,115 +716,339 @@ def main():
             
         input('\nPress Enter to continue...')
 
-import matplotlib.pyplot as plt
-
-def plot_player_stats(stats):
+def plot_player_stats(stats, output_dir=None, fmt='png'):
     """Graphically illustrate a player's recent averages as bar charts, saved to files."""
     if not stats or not stats['recent_averages']:
         print("No stats available to plot.")
         return
 
-    averages = stats['recent_averages']
-    categories = list(averages.keys())
-    values = list(averages.values())
-
-    # Separate percentages and other stats
-    percentage_categories = ['fg_pct', 'fg3_pct', 'ft_pct']
-    percentage_values = [averages[c] * 100 for c in percentage_categories if c in averages]
-    other_categories = [c for c in categories if c not in percentage_categories]
-    other_values = [averages[c] for c in other_categories]
-
-    # Plot other stats
-    plt.figure(figsize=(10, 6))
-    plt.bar(other_categories, other_values, color='blue', alpha=0.7)
-    plt.title(f"{stats['info']['name']} - Recent Averages (Counts)", fontsize=16)
-    plt.xlabel("Stat Categories", fontsize=14)
-    plt.ylabel("Values", fontsize=14)
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    count_file = f"{stats['info']['name'].replace(' ', '_').lower()}_recent_averages_counts.png"
-    plt.savefig(count_file)
-    print(f"Counts plot saved as {count_file}")
-    plt.close()
-
-    # Plot percentages
-    plt.figure(figsize=(8, 6))
-    plt.bar(percentage_categories, percentage_values, color='green', alpha=0.7)
-    plt.title(f"{stats['info']['name']} - Recent Averages (Percentages)", fontsize=16)
-    plt.xlabel("Stat Categories", fontsize=14)
-    plt.ylabel("Percentage (%)", fontsize=14)
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    percent_file = f"{stats['info']['name'].replace(' ', '_').lower()}_recent_averages_percentages.png"
-    plt.savefig(percent_file)
-    print(f"Percentages plot saved as {percent_file}")
-    plt.close()
-
-
-def plot_comparison(player1_stats, player2_stats):
-    """Graphically compare two players' recent averages and career averages, saved to files."""
-    if not player1_stats or not player2_stats:
-        print("Cannot compare - stats missing for one or both players.")
+    with span('plot.player'):
+        files = nba_charts.render_player_charts(stats, output_dir or nba_charts.default_chart_dir(), fmt)
+    print(f"Counts plot saved as {files['counts']}")
+    print(f"Percentages plot saved as {files['percentages']}")
+    return files
+
+
+def plot_comparison(stats_list, output_dir=None, fmt='png'):
+    """Graphically compare players' recent averages, saved to files."""
+    if len(stats_list) < 2 or not all(stats_list):
+        print("Cannot compare - stats missing for one or more players.")
         return
 
-    if not player1_stats['recent_averages'] or not player2_stats['recent_averages']:
+    if not all(stats['recent_averages'] for stats in stats_list):
         print("No recent averages available to compare.")
         return
 
-    # Extract stats
-    averages1 = player1_stats['recent_averages']
-    averages2 = player2_stats['recent_averages']
-
-    categories = list(averages1.keys())
-    percentage_categories = ['fg_pct', 'fg3_pct', 'ft_pct']
-    other_categories = [c for c in categories if c not in percentage_categories]
-
-    # Values for other stats
-    other_values1 = [averages1[c] for c in other_categories]
-    other_values2 = [averages2[c] for c in other_categories]
-
-    # Values for percentages
-    percentage_values1 = [averages1[c] * 100 for c in percentage_categories]
-    percentage_values2 = [averages2[c] * 100 for c in percentage_categories]
-
-    # Plot other stats comparison
-    x = range(len(other_categories))
-    plt.figure(figsize=(12, 6))
-    plt.bar(x, other_values1, width=0.4, label=player1_stats['info']['name'], color='blue', alpha=0.7)
-    plt.bar([i + 0.4 for i in x], other_values2, width=0.4, label=player2_stats['info']['name'], color='orange', alpha=0.7)
-    plt.title("Comparison of Recent Averages (Counts)", fontsize=16)
-    plt.xlabel("Stat Categories", fontsize=14)
-    plt.ylabel("Values", fontsize=14)
-    plt.xticks([i + 0.2 for i in x], other_categories, rotation=45)
-    plt.legend()
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
-    plt.tight_layout()
-    count_file = f"{player1_stats['info']['name'].replace(' ', '_').lower()}_vs_{player2_stats['info']['name'].replace(' ', '_').lower()}_counts_comparison.png"
-    plt.savefig(count_file)
-    print(f"Counts comparison plot saved as {count_file}")
-    plt.close()
-
-    # Plot percentages comparison
-    x = range(len(percentage_categories))
-    plt.figure(figsize=(10, 6))
-    plt.bar(x, percentage_values1, width=0.4, label=player1_stats['info']['name'], color='green', alpha=0.7)
-    plt.bar([i + 0.4 for i in x], percentage_values2, width=0.4, label=player2_stats['info']['name'], color='purple', alpha=0.7)
-    plt.title("Comparison of Recent Averages (Percentages)", fontsize=16)
-    plt.xlabel("Stat Categories", fontsize=14)
-    plt.ylabel("Percentage (%)", fontsize=14)
-    plt.xticks([i + 0.2 for i in x], percentage_categories, rotation=45)
-    plt.legend()
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
-    plt.tight_layout()
-    percent_file = f"{player1_stats['info']['name'].replace(' ', '_').lower()}_vs_{player2_stats['info']['name'].replace(' ', '_').lower()}_percentages_comparison.png"
-    plt.savefig(percent_file)
-    print(f"Percentages comparison plot saved as {percent_file}")
-    plt.close()
+    with span('plot.comparison'):
+        files = nba_charts.render_comparison_charts(stats_list, output_dir or nba_charts.default_chart_dir(), fmt)
+    print(f"Counts comparison plot saved as {files['counts']}")
+    print(f"Percentages comparison plot saved as {files['percentages']}")
+    return files
+
+
+def plot_many_player_stats(stats_list, output_dir=None, fmt='png', max_workers=None):
+    """Render chart files for many players in parallel worker processes; returns one result per player"""
+    # Stages inside the worker processes are not recorded, only the whole batch
+    with span('plot.many'):
+        return list(nba_charts.render_many_player_charts(
+            stats_list, output_dir or nba_charts.default_chart_dir(), fmt, max_workers))
+
+
+def build_parser():
+    """Build the argument parser for the non-interactive command line"""
+    parser = argparse.ArgumentParser(
+        prog='nba_analyzer',
+        description='NBA player stats analyzer. Run without a command for the interactive menu.')
+    parser.add_argument('--offline', action='store_true', help='serve requests from the response cache only')
+    profiling = parser.add_argument_group('profiling (reports go to stderr)')
+    profiling.add_argument('--profile', action='store_true',
+                           help='print the time spent in each fetch/compute/render stage')
+    profiling.add_argument('--cprofile', default=None, metavar='FILE',
+                           help='save cProfile statistics of the main thread to FILE (read with python -m pstats)')
+    profiling.add_argument('--tracemalloc', action='store_true',
+                           help='print peak traced memory and the top allocation sites')
+    profiling.add_argument('--metrics', default=None, metavar='FILE',
+                           help='write counters in the Prometheus text format to FILE (- for stderr)')
+    subparsers = parser.add_subparsers(dest='command')
+
+    search = subparsers.add_parser('search', help='search for players by name')
+    search.add_argument('name')
+    search.add_argument('--limit', type=int, default=None, help='maximum number of players to list')
+    search.add_argument('--json', action='store_true', help='print the matches as JSON')
+
+    stats = subparsers.add_parser('stats', help='show one or more players\' stats')
+    stats.add_argument('player_ids', type=int, nargs='+', metavar='player_id')
+    stats.add_argument('--format', dest='output_format', choices=['text', 'json', 'ndjson', 'csv'],
+                       default='text', help='output format (ndjson and csv stream one record per player)')
+    stats.add_argument('--json', dest='output_format', action='store_const', const='json',
+                       help='same as --format json')
+    stats.add_argument('--local', action='store_true', help='read the stats from the local warehouse')
+    stats.add_argument('--season', default=None, help='season of the recent games, e.g. 2023-24 '
+                                                      '(default: the latest season played)')
+    stats.add_argument('--season-type', choices=list(SEASON_TYPES), default='regular',
+                       help='season type of the recent games')
+    stats.add_argument('--plot', action='store_true', help='also save the charts')
+
+    compare = subparsers.add_parser('compare', help='compare two or more players in one table')
+    compare.add_argument('player_ids', type=int, nargs='+', metavar='player_id')
+    compare.add_argument('--format', dest='output_format', choices=['text', 'json', 'csv'], default='text',
+                         help='output format (csv has one row per player)')
+    compare.add_argument('--plot', action='store_true', help='also save the comparison charts')
+
+    games = subparsers.add_parser('games', help='stream a player\'s game logs over several seasons')
+    games.add_argument('player_id', type=int)
+    games.add_argument('--seasons', nargs='+', default=None, metavar='SEASON',
+                       help='seasons such as 2023-24 or ranges such as 2019-20:2023-24 (default: entire career)')
+    games.add_argument('--season-type', dest='season_types', nargs='+', choices=list(SEASON_TYPES),
+                       default=['regular'], help='season types to include')
+    games.add_argument('--format', dest='output_format', choices=['ndjson', 'csv'], default='ndjson',
+                       help='output format (one record per game, written as each season arrives)')
+
+    sync = subparsers.add_parser('sync', help='sync players into the local warehouse')
+    sync.add_argument('player_ids', type=int, nargs='*', metavar='player_id',
+                      help='players to sync (default: every stored player)')
+    sync.add_argument('--season', default=None, help='season to sync, e.g. 2024-25 (default: current)')
+
+    watch = subparsers.add_parser('watch', help='follow a player\'s games live, updating the averages as they change')
+    watch.add_argument('player_id', type=int)
+    watch.add_argument('--source', choices=['live', 'gamelog'], default='live',
+                       help='poll cdn.nba.com live box scores or the stats.nba.com game log')
+    watch.add_argument('--interval', type=float, default=None, metavar='SECONDS',
+                       help='seconds between polls while stats are changing (default: 20)')
+    watch.add_argument('--max-interval', type=float, default=None, metavar='SECONDS',
+                       help='longest wait between polls while nothing changes (default: 300)')
+
+    report = subparsers.add_parser('report', help='write one HTML report with charts for a team, a roster or '
+                                                  'every active player')
+    report.add_argument('player_ids', type=int, nargs='*', metavar='player_id')
+    roster = report.add_mutually_exclusive_group()
+    roster.add_argument('--team', default=None, help='every player on a team\'s current roster, e.g. LAL')
+    roster.add_argument('--all-active', action='store_true', help='every active player')
+    report.add_argument('--output', default='nba_report.html', help='report file (default: nba_report.html)')
+    report.add_argument('--chart-format', choices=['svg', 'png'], default='svg', help='embedded chart format')
+    report.add_argument('--restart', action='store_true',
+                        help='ignore the checkpoint of an interrupted run and start over')
+    report.add_argument('--league', nargs='?', const='current', default=None, metavar='SEASON',
+                        help='add league ranks, building the season\'s index if needed')
+
+    similar = subparsers.add_parser('similar', help='find the players with the most similar careers')
+    similar.add_argument('player_id', type=int)
+    similar.add_argument('--limit', type=int, default=10, help='number of players to list')
+    similar.add_argument('--metric', choices=['cosine', 'euclidean'], default='cosine',
+                         help='cosine similarity or Euclidean distance between standardized stat vectors')
+    similar.add_argument('--rebuild', action='store_true',
+                         help='rebuild the index from every season\'s league totals first')
+    similar.add_argument('--json', action='store_true', help='print the players as JSON')
+
+    leaders = subparsers.add_parser('leaders', help='career and season leaders across every synced player')
+    leaders.add_argument('--stat', choices=['points', 'rebounds', 'assists', 'steals', 'blocks', 'turnovers',
+                                            'games', 'minutes'], default='points', help='stat to rank by')
+    leaders.add_argument('--limit', type=int, default=10, help='players per leaderboard')
+    leaders.add_argument('--processes', type=int, default=None,
+                         help='worker processes (default: one per core)')
+    leaders.add_argument('--json', action='store_true', help='print the leaderboards and distribution as JSON')
+
+    league = subparsers.add_parser('league', help='build the league percentile index for a season')
+    league.add_argument('--season', default=None, help='season to index, e.g. 2024-25 (default: current)')
+
+    for subparser in (stats, compare):
+        subparser.add_argument('--output-dir', default=None, help='directory for chart files')
+        subparser.add_argument('--chart-format', choices=['png', 'svg'], default='png',
+                               help='chart image format')
+        subparser.add_argument('--league', nargs='?', const='current', default=None, metavar='SEASON',
+                               help='show league ranks, building the season\'s index if needed '
+                                    '(default: ranks from a saved current-season index only)')
+    return parser
+
+def cli(argv=None):
+    """Run one non-interactive command; returns the process exit status"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.offline:
+        configure_cache(offline=True)
+
+    profiler = cProfile.Profile() if args.cprofile else None
+    if args.tracemalloc:
+        tracemalloc.start()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        return run_command(parser, args)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.cprofile)
+        write_profile(args)
+
+def write_profile(args, out=None):
+    """Write the reports requested by the profiling options of `args`"""
+    out = out or sys.stderr
+    if args.profile:
+        out.write("\nStage timings:\n" + metrics.stage_report())
+    if args.tracemalloc:
+        snapshot = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        out.write(f"\nPeak traced memory: {peak / 2**20:.1f} MiB\nTop allocation sites:\n")
+        for stat in snapshot.statistics('lineno')[:10]:
+            out.write(f"  {stat}\n")
+    if args.cprofile:
+        out.write(f"\ncProfile statistics saved to {args.cprofile}\n")
+    if args.metrics == '-':
+        out.write(metrics.render_prometheus())
+    elif args.metrics:
+        with open(args.metrics, 'w') as f:
+            f.write(metrics.render_prometheus())
+
+def run_command(parser, args):
+    """Run the command parsed into `args`; returns the process exit status"""
+    if args.command is None:
+        main()
+        return 0
+
+    if args.command == 'search':
+        found = search_player(args.name)
+        if args.limit is not None:
+            found = found[:args.limit]
+        if args.json:
+            print(json.dumps(found))
+        else:
+            for player in found:
+                status = 'active' if player['is_active'] else 'inactive'
+                print(f"{player['id']:>10}  {player['full_name']} ({status})")
+        return 0 if found else 1
+
+    if args.command in ('stats', 'compare', 'report'):
+        if args.league is None:
+            league = get_league_index(fetch=False)
+        else:
+            league = get_league_index(None if args.league == 'current' else args.league)
+
+    if args.command == 'stats':
+        if args.local:
+            results = ((player_id, load_player_stats(player_id)) for player_id in args.player_ids)
+        elif len(args.player_ids) == 1:
+            results = [(args.player_ids[0], get_player_stats(args.player_ids[0], args.season, args.season_type))]
+        else:
+            results = get_many_player_stats(args.player_ids, season=args.season, season_type=args.season_type)
+        found = []
+        def available():
+            for player_id, stats in results:
+                if not stats:
+                    print(f'No stats available for player {player_id}', file=sys.stderr)
+                    continue
+                found.append(stats)
+                yield stats
+        write_player_reports(available(), args.output_format, league=league)
+        if args.plot:
+            for stats in found:
+                plot_player_stats(stats, args.output_dir, args.chart_format)
+        return 0 if len(found) == len(args.player_ids) else 1
+
+    if args.command == 'games':
+        seasons = parse_seasons(args.seasons) if args.seasons else None
+        count = nba_output.write_games(iter_games(args.player_id, seasons, args.season_types), sys.stdout,
+                                       args.output_format)
+        print(f"{count} game(s)", file=sys.stderr)
+        return 0 if count else 1
+
+    if args.command == 'compare':
+        if len(args.player_ids) < 2:
+            parser.error('compare needs at least two player ids')
+        stats_list = get_comparison_stats(args.player_ids)
+        missing = [player_id for player_id, stats in zip(args.player_ids, stats_list) if not stats]
+        if missing:
+            print(f"No stats available for player(s) {', '.join(map(str, missing))}", file=sys.stderr)
+            return 1
+        compare_players(stats_list, fmt=args.output_format, league=league)
+        if args.plot:
+            plot_comparison(stats_list, args.output_dir, args.chart_format)
+        return 0
+
+    if args.command == 'sync':
+        results = sync_warehouse(args.player_ids or None, season=args.season)
+        synced = [count for count in results.values() if count is not None]
+        print(f"Synced {len(synced)} player(s), {sum(synced)} new game(s).")
+        return 0 if len(synced) == len(results) else 1
+
+    if args.command == 'watch':
+        try:
+            watch_player(args.player_id, args.source, args.interval, args.max_interval)
+        except KeyboardInterrupt:
+            pass
+        except ValueError as e:
+            print(str(e), file=sys.stderr)
+            return 1
+        return 0
+
+    if args.command == 'report':
+        if args.team:
+            team = find_team(args.team)
+            player_ids, title = team_roster(args.team), f"{team['full_name']} {current_season()}"
+        elif args.all_active:
+            player_ids, title = active_player_ids(), 'Active Players'
+        elif args.player_ids:
+            player_ids, title = args.player_ids, 'NBA Player Report'
+        else:
+            parser.error('report needs player ids, --team or --all-active')
+        def progress(player_id, name):
+            print(f'{name} ({player_id})', file=sys.stderr)
+        result = generate_report(player_ids, args.output, title, args.chart_format, league, args.restart, progress)
+        for player_id, reason in result['failed'].items():
+            print(f'No report for player {player_id}: {reason}', file=sys.stderr)
+        print(f"Wrote {result['players'] - len(result['failed'])} of {result['players']} player(s) to "
+              f"{args.output} ({result['resumed']} from the checkpoint)", file=sys.stderr)
+        return 1 if result['failed'] else 0
+
+    if args.command == 'similar':
+        if args.rebuild:
+            index = build_similarity_index()
+            print(f"Indexed {len(index)} player(s), {index.seasons[0]} to {index.seasons[1]}.", file=sys.stderr)
+        try:
+            found = find_similar_players(args.player_id, args.limit, args.metric)
+        except ValueError as e:
+            print(str(e), file=sys.stderr)
+            return 1
+        if args.json:
+            print(json.dumps(found))
+        else:
+            for player in found:
+                print(f"{player['player_id']:>10}  {player['name']:<28} {player['score']:.3f}")
+        return 0 if found else 1
+
+    if args.command == 'leaders':
+        aggregate, names = league_leaders(args.limit, args.processes)
+        boards = {board: [{'player_id': player_id, 'name': names.get(player_id, str(player_id)),
+                           'season': season, 'value': value}
+                          for value, player_id, season in aggregate.leaders[board].get(args.stat, [])]
+                  for board in nba_aggregate.BOARDS}
+        distribution = aggregate.distributions().get(args.stat)
+        if args.json:
+            print(json.dumps({'stat': args.stat, 'leaders': boards, 'distribution': distribution}))
+            return 0 if len(aggregate.player_ids) else 1
+        for board, rows in boards.items():
+            if not rows:
+                continue
+            print(f"{board.replace('_', ' ').title()} ({args.stat})")
+            for rank, row in enumerate(rows, 1):
+                season = row['season'] or ''
+                print(f"{rank:>4}. {row['name']:<28} {season:<8} {row['value']:>10.1f}")
+            print()
+        if distribution:
+            print(f"Career {args.stat} per game over {distribution['players']} player(s): "
+                  f"mean {distribution['mean']:.1f}, std {distribution['std']:.1f}, "
+                  + ', '.join(f"p{p} {distribution[f'p{p}']:.1f}" for p in nba_aggregate.DISTRIBUTION_PERCENTILES))
+        print(f"{len(aggregate.player_ids)} player(s), {len(aggregate.seasons)} season(s) in the warehouse.",
+              file=sys.stderr)
+        return 0 if len(aggregate.player_ids) else 1
 
+    if args.command == 'league':
+        index = build_league_index(args.season)
+        print(f"Indexed {len(index)} player(s) for {index.season}.")
+        return 0
 
+    return 0
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    sys.exit(cli())
\ No newline at end of file
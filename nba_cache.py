@@ -0,0 +1,169 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+DAY = 24 * 60 * 60
+
+# Time-to-live per nba_api endpoint, in seconds. A value of None means the
+# entry is valid until the next game-night rollover (see game_night_expiry).
+DEFAULT_TTLS = {
+    'commonplayerinfo': 3 * DAY,
+    'playercareerstats': 3 * DAY,
+    'playergamelog': None,
+    'leaguedashplayerstats': None,
+}
+DEFAULT_TTL = DAY
+
+# Hour (UTC) after which the previous night's games are final. 10:00 UTC is
+# early morning on the US east coast, well after the last west coast tip-off.
+GAME_NIGHT_ROLLOVER_HOUR_UTC = 10
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def default_cache_path():
+    """Return the cache file location, honouring the NBA_ANALYZER_CACHE variable"""
+    path = os.environ.get('NBA_ANALYZER_CACHE')
+    if path:
+        return path
+    return os.path.join(os.path.expanduser('~'), '.cache', 'nba_analyzer', 'responses.sqlite3')
+
+
+def game_night_expiry(now):
+    """Return the timestamp of the first game-night rollover after `now`"""
+    current = datetime.fromtimestamp(now, tz=timezone.utc)
+    rollover = current.replace(hour=GAME_NIGHT_ROLLOVER_HOUR_UTC, minute=0, second=0, microsecond=0)
+    if rollover <= current:
+        rollover += timedelta(days=1)
+    return rollover.timestamp()
+
+
+def cache_key(endpoint, params):
+    """Build a stable cache key from an endpoint name and its request parameters"""
+    return f"{endpoint}?{json.dumps(params, sort_keys=True, default=str)}"
+
+
+class CacheMissError(LookupError):
+    """Raised in offline mode when a response is not in the cache"""
+
+
+class ResponseCache:
+    """SQLite-backed store of raw nba_api responses with per-endpoint TTLs and LRU eviction"""
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES, ttls=None, offline=False):
+        self.path = path or default_cache_path()
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        if self.path != ':memory:':
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            ' key TEXT PRIMARY KEY,'
+            ' endpoint TEXT NOT NULL,'
+            ' body TEXT NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' expires_at REAL NOT NULL,'
+            ' last_access REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)')
+        self._conn.commit()
+
+    def expiry_for(self, endpoint, now):
+        """Return when a response for `endpoint` fetched at `now` goes stale"""
+        ttl = self.ttls.get(endpoint, DEFAULT_TTL)
+        if ttl is None:
+            return game_night_expiry(now)
+        return now + ttl
+
+    def get(self, endpoint, params):
+        """Return the cached response body, or None if it is missing or stale.
+
+        In offline mode stale entries are still served, and a missing entry
+        raises CacheMissError instead of returning None.
+        """
+        key = cache_key(endpoint, params)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT body, expires_at FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+            if row is not None and (self.offline or row[1] > now):
+                self._conn.execute('UPDATE responses SET last_access = ? WHERE key = ?', (now, key))
+                self._conn.commit()
+                self.hits += 1
+                return row[0]
+            self.misses += 1
+        if self.offline:
+            raise CacheMissError(f'{endpoint} response not cached (offline mode)')
+        return None
+
+    def put(self, endpoint, params, body):
+        """Store a response body and evict least recently used entries over the size bound"""
+        key = cache_key(endpoint, params)
+        now = time.time()
+        size = len(body.encode('utf-8'))
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (key, endpoint, body, size, expires_at, last_access) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (key, endpoint, body, size, self.expiry_for(endpoint, now), now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute(
+            'SELECT key, size FROM responses ORDER BY last_access ASC'
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+            total -= size
+            self.evictions += 1
+
+    def invalidate(self, endpoint=None):
+        """Drop every cached response, or only those of one endpoint"""
+        with self._lock:
+            if endpoint is None:
+                self._conn.execute('DELETE FROM responses')
+            else:
+                self._conn.execute('DELETE FROM responses WHERE endpoint = ?', (endpoint,))
+            self._conn.commit()
+
+    def stats(self):
+        """Return hit/miss counters and the current size of the cache"""
+        with self._lock:
+            entries, size = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses'
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': entries,
+            'bytes': size,
+        }
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,160 @@
+import hashlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from nba_analytics import PERCENTAGE_KEYS, totals_matrix
+from nba_metrics import span
+
+# Charts are drawn with the object-oriented Figure API on an explicit Agg
+# canvas: no pyplot global state, so rendering is safe in threads and
+# worker processes and never needs a display.
+
+CHART_FORMATS = ('png', 'svg')
+
+
+def default_chart_dir():
+    """Return the directory charts are written to, honouring NBA_ANALYZER_CHART_DIR"""
+    return os.environ.get('NBA_ANALYZER_CHART_DIR', '.')
+
+
+def _slug(name):
+    return name.replace(' ', '_').lower()
+
+
+def _pct_value(value):
+    # No attempts plots as an empty bar
+    return float('nan') if value is None else value * 100
+
+
+def _split_averages(averages):
+    percentage_categories = [c for c in PERCENTAGE_KEYS if c in averages]
+    other_categories = [c for c in averages if c not in PERCENTAGE_KEYS]
+    return other_categories, percentage_categories
+
+
+def _new_figure(figsize):
+    figure = Figure(figsize=figsize)
+    FigureCanvasAgg(figure)
+    return figure, figure.subplots()
+
+
+def _finish(figure, ax, title, ylabel, output_dir, filename, fmt):
+    ax.set_title(title, fontsize=16)
+    ax.set_xlabel("Stat Categories", fontsize=14)
+    ax.set_ylabel(ylabel, fontsize=14)
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    ax.tick_params(axis='x', labelrotation=45)
+    with span('chart.layout'):
+        figure.tight_layout()
+
+    if output_dir is None:
+        buffer = io.BytesIO()
+        with span('chart.savefig'):
+            figure.savefig(buffer, format=fmt)
+        return buffer.getvalue()
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.normpath(os.path.join(output_dir, f"{filename}.{fmt}"))
+    with span('chart.savefig'):
+        figure.savefig(path, format=fmt)
+    return path
+
+
+def render_player_charts(stats, output_dir=None, fmt='png'):
+    """Render a player's recent-average charts.
+
+    Returns {'counts': ..., 'percentages': ...} holding file paths when
+    `output_dir` is given, or the encoded image bytes when it is None.
+    """
+    if fmt not in CHART_FORMATS:
+        raise ValueError(f"Unsupported chart format: {fmt}")
+    name = stats['info']['name']
+    averages = stats['recent_averages']
+    other_categories, percentage_categories = _split_averages(averages)
+
+    figure, ax = _new_figure((10, 6))
+    ax.bar(other_categories, [averages[c] for c in other_categories], color='blue', alpha=0.7)
+    counts = _finish(figure, ax, f"{name} - Recent Averages (Counts)", "Values",
+                     output_dir, f"{_slug(name)}_recent_averages_counts", fmt)
+
+    figure, ax = _new_figure((8, 6))
+    ax.bar(percentage_categories, [_pct_value(averages[c]) for c in percentage_categories], color='green', alpha=0.7)
+    percentages = _finish(figure, ax, f"{name} - Recent Averages (Percentages)", "Percentage (%)",
+                          output_dir, f"{_slug(name)}_recent_averages_percentages", fmt)
+
+    return {'counts': counts, 'percentages': percentages}
+
+
+def _grouped_bars(ax, categories, values, labels):
+    # One bar per player in each category; `values` is (players x categories)
+    x = np.arange(len(categories))
+    width = 0.8 / len(labels)
+    for i, (row, label) in enumerate(zip(values, labels)):
+        ax.bar(x + i * width, row, width=width, label=label, alpha=0.7)
+    ax.set_xticks(x + width * (len(labels) - 1) / 2, categories)
+    ax.legend(fontsize='small', ncol=max(1, len(labels) // 10))
+
+
+def _comparison_prefix(stats_list):
+    names = [stats['info']['name'] for stats in stats_list]
+    if len(names) <= 3:
+        return '_vs_'.join(_slug(name) for name in names)
+    # A short hash of every player keeps different comparisons with the same first player apart
+    players = sorted(str(stats['info'].get('player_id') or _slug(stats['info']['name'])) for stats in stats_list)
+    digest = hashlib.sha1(','.join(players).encode('utf-8')).hexdigest()[:8]
+    return f"{_slug(names[0])}_and_{len(names) - 1}_others_{digest}"
+
+
+def render_comparison_charts(stats_list, output_dir=None, fmt='png'):
+    """Render grouped bar charts comparing the recent averages of any number of players
+    (paths, or bytes without `output_dir`)"""
+    if fmt not in CHART_FORMATS:
+        raise ValueError(f"Unsupported chart format: {fmt}")
+    names = [stats['info']['name'] for stats in stats_list]
+    other_categories, percentage_categories = _split_averages(stats_list[0]['recent_averages'])
+    values = totals_matrix([stats['recent_averages'] for stats in stats_list],
+                           other_categories + percentage_categories)
+    counts_values = values[:, :len(other_categories)]
+    percentage_values = values[:, len(other_categories):] * 100
+    prefix = _comparison_prefix(stats_list)
+    # Widen the figure as players are added so bars stay readable
+    extra_width = max(0, len(names) - 2) * 0.6
+
+    figure, ax = _new_figure((12 + extra_width, 6))
+    _grouped_bars(ax, other_categories, counts_values, names)
+    counts = _finish(figure, ax, "Comparison of Recent Averages (Counts)", "Values",
+                     output_dir, f"{prefix}_counts_comparison", fmt)
+
+    figure, ax = _new_figure((10 + extra_width, 6))
+    _grouped_bars(ax, percentage_categories, percentage_values, names)
+    percentages = _finish(figure, ax, "Comparison of Recent Averages (Percentages)", "Percentage (%)",
+                          output_dir, f"{prefix}_percentages_comparison", fmt)
+
+    return {'counts': counts, 'percentages': percentages}
+
+
+def chart_input(stats):
+    """Return the part of a stats dict the player charts use, to send to a worker process"""
+    return {'info': {'name': stats['info']['name']}, 'recent_averages': stats['recent_averages']}
+
+
+def _render_player_job(job):
+    stats, output_dir, fmt = job
+    return render_player_charts(stats, output_dir, fmt)
+
+
+def render_many_player_charts(stats_list, output_dir=None, fmt='png', max_workers=None):
+    """Render charts for many players across a process pool, yielding results in input order.
+
+    Players without recent averages yield None.
+    """
+    stats_list = list(stats_list)
+    jobs = [(chart_input(stats), output_dir, fmt) for stats in stats_list if stats and stats['recent_averages']]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(_render_player_job, jobs, chunksize=max(1, len(jobs) // 32))
+        for stats in stats_list:
+            yield next(results) if stats and stats['recent_averages'] else None
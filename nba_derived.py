@@ -0,0 +1,159 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from nba_analytics import combined_season_rows, shooting_percentages, totals_matrix
+
+# Counting stats in the per-game, per-36 and per-100 tables
+RATE_COLUMNS = ('PTS', 'REB', 'OREB', 'DREB', 'AST', 'STL', 'BLK', 'TOV', 'PF',
+                'FGM', 'FGA', 'FG3M', 'FG3A', 'FTM', 'FTA')
+DERIVED_TOTAL_COLUMNS = ('GP', 'MIN') + RATE_COLUMNS
+
+ADVANCED_KEYS = ('fg_pct', 'fg3_pct', 'ft_pct', 'ts_pct', 'efg_pct', 'usage_pct', 'game_score',
+                 'game_score_per_36')
+
+# Possessions per 48 minutes assumed for per-100 rates and the usage proxy;
+# box score totals carry no team pace, so this is the recent league average
+DEFAULT_PACE = 99.0
+
+# Players whose tables are kept by the module-level cache
+DEFAULT_CACHE_SIZE = 1024
+
+CAREER = 'Career'
+
+
+class DerivedTables:
+    """Per-game, per-36 and per-100-possession tables plus advanced metrics for every season and the career.
+
+    Rows are the player's seasons (traded players' TOT rows, oldest first)
+    followed by the career row; everything is computed in one vectorized
+    pass over the (rows x DERIVED_TOTAL_COLUMNS) totals. Missing totals are
+    NaN and read back as None.
+    """
+
+    def __init__(self, season_ids, totals, pace=DEFAULT_PACE):
+        self.season_ids = list(season_ids)
+        self.totals = totals
+        column = {name: totals[:, i] for i, name in enumerate(DERIVED_TOTAL_COLUMNS)}
+        counts = totals[:, 2:]
+        games = column['GP'][:, None]
+        minutes = column['MIN'][:, None]
+        # Possessions the team played while the player was on the court
+        possessions = minutes * pace / 48
+        used = column['FGA'] + 0.44 * column['FTA'] + column['TOV']
+        # John Hollinger's Game Score, the box-score half of PER
+        game_score = (column['PTS'] + 0.4 * column['FGM'] - 0.7 * column['FGA'] - 0.4 * (column['FTA'] - column['FTM'])
+                      + 0.7 * column['OREB'] + 0.3 * column['DREB'] + column['STL'] + 0.7 * column['AST']
+                      + 0.7 * column['BLK'] - 0.4 * column['PF'] - column['TOV'])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.per_game = np.hstack([np.where(games > 0, minutes / games, np.nan),
+                                       np.where(games > 0, counts / games, np.nan)])
+            self.per_36 = np.where(minutes > 0, counts * 36 / minutes, np.nan)
+            self.per_100 = np.where(possessions > 0, counts * 100 / possessions, np.nan)
+            shooting = shooting_percentages(column)
+            advanced = dict(
+                shooting,
+                usage_pct=np.where(possessions[:, 0] > 0, used / possessions[:, 0], np.nan),
+                game_score=np.where(games[:, 0] > 0, game_score / games[:, 0], np.nan),
+                game_score_per_36=np.where(minutes[:, 0] > 0, game_score * 36 / minutes[:, 0], np.nan),
+            )
+        self.advanced = np.column_stack([advanced[key] for key in ADVANCED_KEYS])
+        self._rows = {season_id: i for i, season_id in enumerate(self.season_ids)}
+        # row() and seasons() results, built on first use: the tables are shared through the cache
+        self._row_dicts = {}
+        self._seasons = None
+
+    @classmethod
+    def from_totals(cls, season_by_season, career_totals, pace=DEFAULT_PACE):
+        """Build the tables from PlayerCareerStats season rows and the career totals row (None when missing)"""
+        seasons = combined_season_rows(season_by_season)
+        rows = seasons + [career_totals]
+        return cls([row.get('SEASON_ID') for row in seasons] + [CAREER],
+                   totals_matrix(rows, DERIVED_TOTAL_COLUMNS), pace)
+
+    def row(self, season_id=CAREER):
+        """Return one season's (or the career's) tables as {'games', 'per_game', 'per_36', 'per_100', 'advanced'}.
+
+        Rows are built once and shared; treat them as read-only.
+        """
+        row = self._row_dicts.get(season_id)
+        if row is None:
+            i = self._rows[season_id]
+            games = self.totals[i, 0]
+            row = self._row_dicts[season_id] = {
+                'games': None if np.isnan(games) else int(games),
+                'per_game': _optional_dict(('MIN',) + RATE_COLUMNS, self.per_game[i]),
+                'per_36': _optional_dict(RATE_COLUMNS, self.per_36[i]),
+                'per_100': _optional_dict(RATE_COLUMNS, self.per_100[i]),
+                'advanced': _optional_dict(ADVANCED_KEYS, self.advanced[i]),
+            }
+        return row
+
+    def seasons(self):
+        """Return [(season_id, row)] for every season, oldest first, without the career row"""
+        if self._seasons is None:
+            self._seasons = [(season_id, self.row(season_id)) for season_id in self.season_ids[:-1]]
+        return self._seasons
+
+
+def _optional_dict(keys, values):
+    return {key: None if np.isnan(value) else value for key, value in zip(keys, values.tolist())}
+
+
+def _fingerprint(season_by_season, career_totals):
+    # The raw row values: comparing them is far cheaper than rebuilding the totals matrix
+    return (tuple(tuple(row.values()) for row in season_by_season),
+            tuple(career_totals.values()) if career_totals else None)
+
+
+class DerivedTablesCache:
+    """Derived tables per player, recomputed only when the player's totals change.
+
+    Entries are keyed by player id and hold a fingerprint of the raw row
+    values, compared on every call: a player whose career stats were
+    refetched unchanged keeps the cached tables (and the rows they already
+    built), while rows edited in place miss. The least recently used players
+    are dropped beyond `max_players`.
+    """
+
+    def __init__(self, max_players=DEFAULT_CACHE_SIZE):
+        self.max_players = max_players
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, player_id, season_by_season, career_totals):
+        """Return the player's DerivedTables, computing them on the first call or after the totals changed"""
+        fingerprint = _fingerprint(season_by_season, career_totals)
+        with self._lock:
+            entry = self._entries.get(player_id)
+            if entry is not None and entry[0] == fingerprint:
+                self._entries.move_to_end(player_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        tables = DerivedTables.from_totals(season_by_season, career_totals)
+        with self._lock:
+            self._entries[player_id] = (fingerprint, tables)
+            self._entries.move_to_end(player_id)
+            while len(self._entries) > self.max_players:
+                self._entries.popitem(last=False)
+        return tables
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+derived_cache = DerivedTablesCache()
+
+
+def derived_tables(stats):
+    """Return the DerivedTables of a get_player_stats dict, from the shared cache when its totals are unchanged"""
+    player_id = stats['info'].get('player_id')
+    season_by_season = stats.get('season_by_season') or []
+    if player_id is None:
+        return DerivedTables.from_totals(season_by_season, stats['career_totals'])
+    return derived_cache.get(player_id, season_by_season, stats['career_totals'])
@@ -0,0 +1,206 @@
+from collections.abc import Mapping
+
+import numpy as np
+
+from nba_analytics import STAT_COLUMNS, GameLogArrays, parse_game_date
+
+# Integer columns use the narrowest of these that holds every value
+INT_DTYPES = (np.int8, np.int16, np.int32, np.int64)
+
+
+def _int_dtype(low, high):
+    for dtype in INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return object
+
+
+def _codes_dtype(size):
+    return np.uint8 if size <= 2 ** 8 else np.uint16 if size <= 2 ** 16 else np.uint32
+
+
+def _categorical(values):
+    # Intern repeated values (dates, matchups, season ids): each distinct
+    # value is stored once and rows hold a small integer code
+    index = {}
+    codes = [index.setdefault(value, len(index)) for value in values]
+    categories = list(index)
+    if all(isinstance(value, str) for value in categories):
+        try:
+            # Fixed-width bytes take one byte per character instead of four
+            categories = np.array([value.encode('ascii') for value in categories], dtype=bytes)
+        except UnicodeEncodeError:
+            categories = np.array(categories, dtype=str)
+    else:
+        categories = np.array(categories + [None], dtype=object)[:-1]
+    return np.array(codes, dtype=_codes_dtype(len(categories))), categories
+
+
+def build_column(values):
+    """Encode one column of Python values as (array, categories).
+
+    Integers get the narrowest integer type; floats, or integers with
+    missing values, are float64 with NaN for None; anything else is
+    categorical: `array` holds codes into `categories`. `categories` is None
+    for numeric columns.
+    """
+    kinds = {type(value) for value in values}
+    if kinds <= {int, bool}:
+        dtype = _int_dtype(min(values), max(values)) if values else np.int8
+        if dtype is not object:
+            return np.array(values, dtype=dtype), None
+    elif kinds <= {int, bool, float, type(None)}:
+        return np.array([np.nan if value is None else value for value in values], dtype=float), None
+    return _categorical(values)
+
+
+def _python_value(value, categories):
+    if categories is not None:
+        value = categories[value]
+        if categories.dtype.kind == 'S':
+            return value.decode('ascii')
+        return value if categories.dtype.kind == 'O' else str(value)
+    value = value.item()
+    return None if value != value else value
+
+
+class GameRow(Mapping):
+    """Read-only view of one game in a GameLog, usable like a PlayerGameLog row dict"""
+
+    __slots__ = ('_log', '_index')
+
+    def __init__(self, log, index):
+        self._log = log
+        self._index = index
+
+    def __getitem__(self, key):
+        return self._log.value(key, self._index)
+
+    def __iter__(self):
+        return iter(self._log.headers)
+
+    def __len__(self):
+        return len(self._log.headers)
+
+    def __repr__(self):
+        return f'GameRow({dict(self)!r})'
+
+
+class GameLog:
+    """Columnar PlayerGameLog: one typed array per column, games in endpoint order (newest first).
+
+    Numbers are stored in the narrowest integer type (or float64) and text
+    columns (dates, matchups, game ids) as codes into interned categories,
+    roughly a tenth of the memory of one dict per game. `log[i]` is a
+    GameRow view of a game (`log[0]['PTS']`), `log['PTS']` a whole column,
+    and `log[:5]` a GameLog of the first five games.
+    """
+
+    def __init__(self, headers, columns):
+        self.headers = tuple(headers)
+        # {name: (array, categories or None)}
+        self._columns = columns
+        self._length = len(next(iter(columns.values()))[0]) if columns else 0
+
+    @classmethod
+    def from_result_set(cls, headers, rows):
+        """Build a log straight from a result set's headers and rowSet lists"""
+        values = list(zip(*rows)) if rows else [()] * len(headers)
+        return cls(headers, {name: build_column(list(column)) for name, column in zip(headers, values)})
+
+    @classmethod
+    def from_games(cls, games):
+        """Build a log from PlayerGameLog row dicts (or GameRows), columns taken from the first game"""
+        games = list(games)
+        headers = list(games[0]) if games else []
+        return cls(headers, {name: build_column([game.get(name) for game in games]) for name in headers})
+
+    @classmethod
+    def concat(cls, logs):
+        """Join logs with the same columns (e.g. several seasons) into one, re-interning text columns"""
+        logs = [log for log in logs if len(log)]
+        if not logs:
+            return cls((), {})
+        headers = logs[0].headers
+        if any(log.headers != headers for log in logs):
+            raise ValueError('Game logs with different columns cannot be joined')
+        return cls(headers, {name: _merge([log._columns[name] for log in logs], logs, name) for name in headers})
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        return (GameRow(self, i) for i in range(self._length))
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.column(key)
+        if isinstance(key, slice):
+            return GameLog(self.headers, {name: (array[key].copy(), categories)
+                                          for name, (array, categories) in self._columns.items()})
+        index = range(self._length)[key]
+        return GameRow(self, index)
+
+    def value(self, name, index):
+        """Return one game's value of a column as a Python scalar (None when missing)"""
+        try:
+            array, categories = self._columns[name]
+        except KeyError:
+            raise KeyError(name) from None
+        return _python_value(array[index], categories)
+
+    def column(self, name):
+        """Return a whole column as an array (text columns decoded from their categories)"""
+        array, categories = self._columns[name]
+        if categories is None:
+            return array
+        if categories.dtype.kind == 'S':
+            categories = categories.astype(str)
+        return categories[array]
+
+    @property
+    def nbytes(self):
+        """Bytes held by the column arrays and categories"""
+        return sum(array.nbytes + (categories.nbytes if categories is not None else 0)
+                   for array, categories in self._columns.values())
+
+    def arrays(self, columns=STAT_COLUMNS):
+        """Return the stat columns as a float GameLogArrays, oldest game first; missing columns are NaN"""
+        values = np.full((self._length, len(columns)), np.nan)
+        for j, name in enumerate(columns):
+            if name not in self._columns:
+                continue
+            array, categories = self._columns[name]
+            if categories is None:
+                values[:, j] = array
+            else:
+                # Text such as '36' minutes: convert each distinct value once
+                numbers = [_python_value(i, categories) for i in range(len(categories))]
+                values[:, j] = np.array([np.nan if n is None else n for n in numbers], dtype=float)[array]
+        if 'GAME_DATE' in self._columns:
+            # Each distinct date is parsed once
+            codes, categories = self._columns['GAME_DATE']
+            days = np.array([parse_game_date(_python_value(i, categories)) for i in range(len(categories))],
+                            dtype='datetime64[D]')
+            game_dates = days[codes] if len(days) else np.array([], dtype='datetime64[D]')
+        else:
+            game_dates = np.full(self._length, np.datetime64('NaT'), dtype='datetime64[D]')
+        season_ids = self.column('SEASON_ID').astype(str) if 'SEASON_ID' in self._columns \
+            else np.full(self._length, '', dtype=str)
+        order = np.argsort(game_dates, kind='stable')
+        return GameLogArrays(values[order], columns, game_dates[order], season_ids[order])
+
+
+def _merge(parts, logs, name):
+    arrays = [array for array, _ in parts]
+    categories = [cats for _, cats in parts]
+    if all(cats is None for cats in categories):
+        return np.concatenate(arrays), None
+    if all(cats is not None and cats.dtype.kind == categories[0].dtype.kind != 'O' for cats in categories):
+        merged, inverse = np.unique(np.concatenate(categories), return_inverse=True)
+        offsets = np.cumsum([0] + [len(cats) for cats in categories[:-1]])
+        codes = np.concatenate([inverse[offset + array] for offset, array in zip(offsets, arrays)])
+        return codes.astype(_codes_dtype(len(merged))), merged
+    # Mixed column types: rebuild from the Python values
+    return build_column([value for log in logs for value in (log.value(name, i) for i in range(len(log)))])
@@ -0,0 +1,120 @@
+import os
+
+import numpy as np
+
+from nba_analytics import COMPARISON_COLUMNS, PERCENTAGE_KEYS, compare_totals
+
+# Stats indexed per season: per-game averages plus shooting percentages
+LEAGUE_STATS = ('minutes',) + tuple(COMPARISON_COLUMNS) + PERCENTAGE_KEYS
+
+# Players below this many games are left out of the distributions
+DEFAULT_MIN_GAMES = 10
+
+
+def default_league_dir():
+    """Return the directory league indexes are saved in, honouring NBA_ANALYZER_LEAGUE_DIR"""
+    path = os.environ.get('NBA_ANALYZER_LEAGUE_DIR')
+    if path:
+        return path
+    return os.path.join(os.path.expanduser('~'), '.local', 'share', 'nba_analyzer', 'league')
+
+
+def league_index_path(season, directory=None):
+    """Return the file a season's league index is saved to"""
+    return os.path.join(directory or default_league_dir(), f'{season}.npz')
+
+
+class LeagueIndex:
+    """Distribution of every LEAGUE_STATS stat across the league for one season.
+
+    Each stat is kept as a sorted array of the qualifying players' values,
+    so a percentile is two binary searches; the mean and standard deviation
+    give z-scores. `values` keeps each qualifying player's own row.
+    """
+
+    def __init__(self, season, player_ids, values, stats=LEAGUE_STATS):
+        self.season = season
+        self.player_ids = np.asarray(player_ids, dtype=np.int64)
+        self.values = np.asarray(values, dtype=float).reshape(len(self.player_ids), len(stats))
+        self.stats = tuple(stats)
+        self._stat_index = {stat: i for i, stat in enumerate(self.stats)}
+        self._rows = {player_id: i for i, player_id in enumerate(self.player_ids.tolist())}
+        self.sorted = {}
+        self.mean = {}
+        self.std = {}
+        for stat, column in zip(self.stats, self.values.T):
+            present = np.sort(column[~np.isnan(column)])
+            self.sorted[stat] = present
+            self.mean[stat] = present.mean() if len(present) else np.nan
+            self.std[stat] = present.std() if len(present) else np.nan
+
+    @classmethod
+    def from_rows(cls, season, rows, min_games=DEFAULT_MIN_GAMES):
+        """Build the index from LeagueDashPlayerStats rows fetched with PerMode=Totals"""
+        rows = [row for row in rows if (row.get('GP') or 0) >= min_games]
+        compared = compare_totals(rows)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            minutes = np.where(compared['games'] > 0, compared['minutes'] / compared['games'], np.nan)
+        columns = {'minutes': minutes, **compared['per_game'], **compared['shooting']}
+        values = np.column_stack([columns[stat] for stat in LEAGUE_STATS]) if rows else np.empty((0, len(LEAGUE_STATS)))
+        return cls(season, [row['PLAYER_ID'] for row in rows], values)
+
+    def __len__(self):
+        return len(self.player_ids)
+
+    def __contains__(self, player_id):
+        return player_id in self._rows
+
+    def percentile(self, stat, value):
+        """Percentage of the league below `value` (ties count half), or None; scalars or arrays"""
+        ordered = self.sorted[stat]
+        value = np.asarray(value, dtype=float)
+        if not len(ordered):
+            return None if value.ndim == 0 else np.full(value.shape, np.nan)
+        below = np.searchsorted(ordered, value, side='left')
+        ties = np.searchsorted(ordered, value, side='right') - below
+        result = np.where(np.isnan(value), np.nan, 100 * (below + ties / 2) / len(ordered))
+        return _scalar(result)
+
+    def zscore(self, stat, value):
+        """Standard score of `value` against the league, or None; scalars or arrays"""
+        value = np.asarray(value, dtype=float)
+        std = self.std[stat]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = np.where(std > 0, (value - self.mean[stat]) / std, np.nan)
+        return _scalar(result)
+
+    def player(self, player_id):
+        """Return {stat: {'value', 'percentile', 'zscore'}} for a player in the index, or None"""
+        row = self._rows.get(player_id)
+        if row is None:
+            return None
+        ranks = {}
+        for stat, value in zip(self.stats, self.values[row].tolist()):
+            if np.isnan(value):
+                ranks[stat] = {'value': None, 'percentile': None, 'zscore': None}
+            else:
+                ranks[stat] = {'value': value, 'percentile': self.percentile(stat, value),
+                               'zscore': self.zscore(stat, value)}
+        return ranks
+
+    def save(self, path):
+        """Write the index to an .npz file"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, season=np.array(self.season), stats=np.array(self.stats),
+                 player_ids=self.player_ids, values=self.values)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by save"""
+        with np.load(path) as data:
+            return cls(str(data['season']), data['player_ids'], data['values'], data['stats'].tolist())
+
+
+def _scalar(result):
+    if result.ndim:
+        return result
+    value = float(result)
+    return None if np.isnan(value) else value
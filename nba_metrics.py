@@ -0,0 +1,113 @@
+import threading
+import time
+from contextlib import contextmanager
+
+METRIC_PREFIX = 'nba_analyzer_'
+
+# Counters exported by render_prometheus: name -> help text. Stage timings
+# are exported separately as stage_calls_total / stage_seconds_total.
+COUNTERS = {
+    'upstream_requests_total': 'Requests sent to stats.nba.com, by endpoint and HTTP status',
+    'upstream_retries_total': 'Upstream requests retried after throttling, server errors or timeouts',
+    'upstream_response_bytes_total': 'Response bytes received from stats.nba.com, as sent on the wire',
+    'cache_requests_total': 'Response cache lookups, by endpoint and result (hit or miss)',
+    'cache_hit_bytes_total': 'Response bytes served from the cache instead of stats.nba.com',
+    'service_requests_total': 'HTTP service requests answered, by status',
+    'watch_polls_total': 'Watch mode polls, by result (changed or unchanged)',
+}
+
+
+class Metrics:
+    """Thread-safe labelled counters and per-stage timings"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._stages = {}
+
+    def increment(self, name, amount=1, **labels):
+        """Add `amount` to the counter `name` with the given label values"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def counter(self, name, **labels):
+        """Return a counter's value; without labels, its total over all label values"""
+        wanted = set(labels.items())
+        with self._lock:
+            return sum(value for (counter, key), value in self._counters.items()
+                       if counter == name and wanted <= set(key))
+
+    def observe(self, stage, seconds):
+        """Record one run of `stage` that took `seconds`"""
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                entry = self._stages[stage] = {'calls': 0, 'seconds': 0.0, 'max': 0.0}
+            entry['calls'] += 1
+            entry['seconds'] += seconds
+            entry['max'] = max(entry['max'], seconds)
+
+    def stages(self):
+        """Return {stage: {calls, seconds, max}}"""
+        with self._lock:
+            return {stage: dict(entry) for stage, entry in self._stages.items()}
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._stages.clear()
+
+    def stage_report(self):
+        """Per-stage breakdown as a text table, slowest stage first.
+
+        Stages nest (fetch.* runs inside get_player_stats, chart.savefig
+        inside plot.*), so their totals overlap rather than add up.
+        """
+        stages = sorted(self.stages().items(), key=lambda item: item[1]['seconds'], reverse=True)
+        lines = [f"{'Stage':<36} {'Calls':>7} {'Total s':>9} {'Mean ms':>9} {'Max ms':>9}"]
+        for stage, entry in stages:
+            lines.append(f"{stage:<36} {entry['calls']:>7} {entry['seconds']:>9.3f} "
+                         f"{entry['seconds'] / entry['calls'] * 1000:>9.2f} {entry['max'] * 1000:>9.2f}")
+        return '\n'.join(lines) + '\n'
+
+    def render_prometheus(self):
+        """Render every counter and stage timing in the Prometheus text exposition format"""
+        with self._lock:
+            counters = dict(self._counters)
+            stages = {stage: dict(entry) for stage, entry in self._stages.items()}
+        samples = {}
+        for (name, labels), value in counters.items():
+            samples.setdefault(name, []).append((labels, value))
+        for stage, entry in stages.items():
+            samples.setdefault('stage_calls_total', []).append(((('stage', stage),), entry['calls']))
+            samples.setdefault('stage_seconds_total', []).append(((('stage', stage),), entry['seconds']))
+
+        help_texts = dict(COUNTERS, stage_calls_total='Timed pipeline stages run, by stage',
+                          stage_seconds_total='Seconds spent in each pipeline stage')
+        lines = []
+        for name in sorted(samples):
+            metric = METRIC_PREFIX + name
+            lines.append(f'# HELP {metric} {help_texts.get(name, name)}')
+            lines.append(f'# TYPE {metric} counter')
+            for labels, value in sorted(samples[name]):
+                label_text = ','.join(f'{key}="{_escape(label)}"' for key, label in labels)
+                lines.append(f'{metric}{{{label_text}}} {value}' if label_text else f'{metric} {value}')
+        return '\n'.join(lines) + '\n' if lines else ''
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+metrics = Metrics()
+
+
+@contextmanager
+def span(stage):
+    """Time the enclosed block as one run of `stage`"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe(stage, time.perf_counter() - started)
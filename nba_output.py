@@ -0,0 +1,486 @@
+import csv
+import json
+import math
+
+from nba_analytics import (PERCENTAGE_KEYS, RECENT_AVERAGE_COLUMNS, career_shooting, compare_totals,
+                           totals_matrix)
+from nba_derived import derived_tables
+from nba_league import LEAGUE_STATS
+
+# Fields of each report section, in output order. CSV columns are
+# "<section>.<field>" in this order.
+REPORT_FIELDS = {
+    'player': ('player_id', 'name', 'team', 'position', 'height', 'weight', 'country',
+               'experience', 'draft_year', 'jersey'),
+    'recent_averages': ('points', 'rebounds', 'assists', 'steals', 'blocks',
+                        'fg_pct', 'fg3_pct', 'ft_pct', 'ts_pct', 'efg_pct'),
+    'last_game': ('date', 'points', 'rebounds', 'assists', 'steals', 'blocks', 'minutes',
+                  'fgm', 'fga', 'fg_pct', 'fg3m', 'fg3a', 'fg3_pct', 'ftm', 'fta', 'ft_pct'),
+    'career_averages': ('games_played', 'points', 'rebounds', 'assists', 'steals', 'blocks',
+                        'fg_pct', 'fg3_pct', 'ft_pct', 'ts_pct', 'efg_pct'),
+    'career_totals': ('points', 'rebounds', 'assists', 'steals', 'blocks', 'games_played', 'minutes'),
+    'career_advanced': ('usage_pct', 'game_score', 'game_score_per_36', 'points_per_36', 'rebounds_per_36',
+                        'assists_per_36', 'points_per_100', 'rebounds_per_100', 'assists_per_100'),
+    'league': ('season',) + tuple(f'{stat}.{part}' for stat in LEAGUE_STATS for part in ('percentile', 'zscore')),
+}
+
+CSV_COLUMNS = [f'{section}.{field}' for section, fields in REPORT_FIELDS.items() for field in fields]
+
+OUTPUT_FORMATS = ('text', 'json', 'ndjson', 'csv')
+
+# Report key -> derived tables column, for the per-36 and per-100 rates
+RATE_KEYS = (('points', 'PTS'), ('rebounds', 'REB'), ('assists', 'AST'))
+
+# Row labels of the comparison table
+COUNT_LABELS = (('Points', 'points'), ('Rebounds', 'rebounds'), ('Assists', 'assists'),
+                ('Steals', 'steals'), ('Blocks', 'blocks'), ('Turnovers', 'turnovers'))
+PERCENTAGE_LABELS = (('FG%', 'fg_pct'), ('3P%', 'fg3_pct'), ('FT%', 'ft_pct'), ('TS%', 'ts_pct'),
+                     ('eFG%', 'efg_pct'))
+
+LEAGUE_LABELS = (('Minutes', 'minutes'),) + COUNT_LABELS + PERCENTAGE_LABELS
+
+RECENT_COMPARISON_KEYS = tuple(RECENT_AVERAGE_COLUMNS) + PERCENTAGE_KEYS
+
+
+def format_pct(value):
+    """Format a 0-1 shooting percentage, or N/A when there were no attempts"""
+    if value is None:
+        return 'N/A'
+    return f"{value*100:.1f}%"
+
+
+def _format_number(value):
+    return 'N/A' if value is None else f"{value:.1f}"
+
+
+def player_report(stats, league=None):
+    """Build the structured report of a player from a get_player_stats dict.
+
+    With a LeagueIndex, a 'league' section holds the player's season values
+    with their league percentile and z-score (None when the player is not in
+    the index). Career rates and the 'seasons' table come from the player's
+    cached nba_derived tables.
+    """
+    report = {
+        'player': dict(stats['info']),
+        'recent_averages': dict(stats['recent_averages']) if stats['recent_averages'] else None,
+        'last_game': None,
+        'career_averages': None,
+        'career_totals': None,
+        'career_advanced': None,
+        'seasons': [],
+        'league': None,
+    }
+
+    ranks = league.player(stats['info'].get('player_id')) if league is not None else None
+    if ranks:
+        report['league'] = {'season': league.season, **ranks}
+
+    if stats['recent_games']:
+        lg = stats['recent_games'][0]
+        report['last_game'] = {
+            'date': lg['GAME_DATE'],
+            'points': lg['PTS'],
+            'rebounds': lg['REB'],
+            'assists': lg['AST'],
+            'steals': lg['STL'],
+            'blocks': lg['BLK'],
+            'minutes': lg['MIN'],
+            'fgm': lg['FGM'],
+            'fga': lg['FGA'],
+            'fg_pct': lg['FG_PCT'],
+            'fg3m': lg['FG3M'],
+            'fg3a': lg['FG3A'],
+            'fg3_pct': lg['FG3_PCT'],
+            'ftm': lg['FTM'],
+            'fta': lg['FTA'],
+            'ft_pct': lg['FT_PCT'],
+        }
+
+    tables = derived_tables(stats)
+    for season_id, row in tables.seasons():
+        per_game, advanced = row['per_game'], row['advanced']
+        report['seasons'].append({
+            'season': season_id,
+            'games_played': row['games'],
+            'minutes': per_game['MIN'],
+            'points': per_game['PTS'],
+            'rebounds': per_game['REB'],
+            'assists': per_game['AST'],
+            'ts_pct': advanced['ts_pct'],
+            'usage_pct': advanced['usage_pct'],
+            'game_score': advanced['game_score'],
+        })
+
+    ct = stats['career_totals']
+    if ct:
+        career = tables.row()
+        per_game = career['per_game']
+        shooting = career_shooting(ct)
+        report['career_averages'] = {
+            'games_played': ct['GP'],
+            'points': per_game['PTS'],
+            'rebounds': per_game['REB'],
+            'assists': per_game['AST'],
+            'steals': per_game['STL'],
+            'blocks': per_game['BLK'],
+            'fg_pct': ct['FG_PCT'],
+            'fg3_pct': ct['FG3_PCT'],
+            'ft_pct': ct['FT_PCT'],
+            'ts_pct': shooting['ts_pct'],
+            'efg_pct': shooting['efg_pct'],
+        }
+        report['career_totals'] = {
+            'points': ct['PTS'],
+            'rebounds': ct['REB'],
+            'assists': ct['AST'],
+            'steals': ct['STL'],
+            'blocks': ct['BLK'],
+            'games_played': ct['GP'],
+            'minutes': ct['MIN'],
+        }
+        advanced = career['advanced']
+        report['career_advanced'] = {
+            'usage_pct': advanced['usage_pct'],
+            'game_score': advanced['game_score'],
+            'game_score_per_36': advanced['game_score_per_36'],
+            **{f'{key}_per_36': career['per_36'][column] for key, column in RATE_KEYS},
+            **{f'{key}_per_100': career['per_100'][column] for key, column in RATE_KEYS},
+        }
+    return report
+
+
+def flatten_report(report):
+    """Flatten a report into one CSV row keyed by CSV_COLUMNS"""
+    row = {}
+    for section, fields in REPORT_FIELDS.items():
+        values = report.get(section) or {}
+        for field in fields:
+            value = values
+            for key in field.split('.'):
+                value = value.get(key) if value else None
+            row[f'{section}.{field}'] = value
+    return row
+
+
+def render_text(report):
+    """Render a player report as the text tables of display_player_stats"""
+    lines = []
+    info = report['player']
+    lines += [
+        "\nPlayer Details:",
+        "=" * 50,
+        f"Name: {info['name']}",
+        f"Team: {info['team']}",
+        f"Position: {info['position']}",
+        f"Height: {info['height']}",
+        f"Weight: {info['weight']}",
+        f"Country: {info['country']}",
+        f"Experience: {info['experience']} years",
+        f"Draft Year: {info['draft_year']}",
+        f"Jersey Number: {info['jersey']}",
+    ]
+
+    ra = report['recent_averages']
+    if ra:
+        lines += [
+            "\nRecent Averages (Last 5 Games):",
+            "=" * 50,
+            f"Points: {ra['points']:.1f}",
+            f"Rebounds: {ra['rebounds']:.1f}",
+            f"Assists: {ra['assists']:.1f}",
+            f"Steals: {ra['steals']:.1f}",
+            f"Blocks: {ra['blocks']:.1f}",
+            f"FG%: {format_pct(ra['fg_pct'])}",
+            f"3P%: {format_pct(ra['fg3_pct'])}",
+            f"FT%: {format_pct(ra['ft_pct'])}",
+            f"TS%: {format_pct(ra['ts_pct'])}",
+            f"eFG%: {format_pct(ra['efg_pct'])}",
+        ]
+
+    lg = report['last_game']
+    if lg:
+        lines += [
+            "\nLast Game Performance:",
+            "=" * 50,
+            f"Date: {lg['date']}",
+            f"Points: {lg['points']}",
+            f"Rebounds: {lg['rebounds']}",
+            f"Assists: {lg['assists']}",
+            f"Steals: {lg['steals']}",
+            f"Blocks: {lg['blocks']}",
+            f"Minutes: {lg['minutes']}",
+            f"FG: {lg['fgm']}/{lg['fga']} ({format_pct(lg['fg_pct'])})",
+            f"3P: {lg['fg3m']}/{lg['fg3a']} ({format_pct(lg['fg3_pct'])})",
+            f"FT: {lg['ftm']}/{lg['fta']} ({format_pct(lg['ft_pct'])})",
+        ]
+
+    ca = report['career_averages']
+    ct = report['career_totals']
+    if ca:
+        lines += [
+            "\nCareer Averages:",
+            "=" * 50,
+            f"Games Played: {ca['games_played']}",
+            f"Points: {ca['points']:.1f}",
+            f"Rebounds: {ca['rebounds']:.1f}",
+            f"Assists: {ca['assists']:.1f}",
+            f"Steals: {ca['steals']:.1f}",
+            f"Blocks: {ca['blocks']:.1f}",
+            f"FG%: {format_pct(ca['fg_pct'])}",
+            f"3P%: {format_pct(ca['fg3_pct'])}",
+            f"FT%: {format_pct(ca['ft_pct'])}",
+            f"TS%: {format_pct(ca['ts_pct'])}",
+            f"eFG%: {format_pct(ca['efg_pct'])}",
+            "\nCareer Totals:",
+            "=" * 50,
+            f"Total Points: {ct['points']}",
+            f"Total Rebounds: {ct['rebounds']}",
+            f"Total Assists: {ct['assists']}",
+            f"Total Steals: {ct['steals']}",
+            f"Total Blocks: {ct['blocks']}",
+            f"Games Played: {ct['games_played']}",
+            f"Minutes Played: {ct['minutes']}",
+        ]
+
+    adv = report['career_advanced']
+    if adv:
+        lines += [
+            "\nCareer Advanced:",
+            "=" * 50,
+            f"Usage (est.): {format_pct(adv['usage_pct'])}",
+            f"Game Score: {_format_number(adv['game_score'])} per game, "
+            f"{_format_number(adv['game_score_per_36'])} per 36",
+            f"Per 36 Minutes: {_format_number(adv['points_per_36'])} pts, "
+            f"{_format_number(adv['rebounds_per_36'])} reb, {_format_number(adv['assists_per_36'])} ast",
+            f"Per 100 Possessions (est.): {_format_number(adv['points_per_100'])} pts, "
+            f"{_format_number(adv['rebounds_per_100'])} reb, {_format_number(adv['assists_per_100'])} ast",
+        ]
+
+    if report['seasons']:
+        lines += [
+            "\nSeason by Season (Per Game):",
+            "=" * 50,
+            f"{'Season':<8} {'GP':>4} {'MIN':>5} {'PTS':>5} {'REB':>5} {'AST':>5} {'TS%':>6} {'USG%':>6} {'GmSc':>5}",
+        ]
+        for season in report['seasons']:
+            lines.append(
+                f"{season['season'] or '':<8} {season['games_played'] or 0:>4} {_format_number(season['minutes']):>5} "
+                f"{_format_number(season['points']):>5} {_format_number(season['rebounds']):>5} "
+                f"{_format_number(season['assists']):>5} {format_pct(season['ts_pct']):>6} "
+                f"{format_pct(season['usage_pct']):>6} {_format_number(season['game_score']):>5}")
+
+    league = report['league']
+    if league:
+        lines += [f"\nLeague Ranks ({league['season']}):", "=" * 50]
+        for label, stat in LEAGUE_LABELS:
+            entry = league[stat]
+            if entry['value'] is None:
+                lines.append(f"{label}: N/A")
+                continue
+            value = format_pct(entry['value']) if stat in PERCENTAGE_KEYS else f"{entry['value']:.1f}"
+            zscore = 'N/A' if entry['zscore'] is None else f"{entry['zscore']:+.2f}"
+            lines.append(f"{label}: {value} (percentile {entry['percentile']:.0f}, z {zscore})")
+    return '\n'.join(lines) + '\n'
+
+
+def comparison_report(stats_list, league=None):
+    """Build the structured comparison of any number of players from get_player_stats dicts.
+
+    Stats are held column-wise, one list entry per player in input order,
+    with None where a player has no data. With a LeagueIndex, 'league'
+    holds each player's league percentile per stat.
+    """
+    recent = totals_matrix([stats['recent_averages'] for stats in stats_list], RECENT_COMPARISON_KEYS)
+    career = compare_totals([stats['career_totals'] for stats in stats_list])
+    report = {
+        'players': [dict(stats['info']) for stats in stats_list],
+        'recent_averages': {key: _values(recent[:, i]) for i, key in enumerate(RECENT_COMPARISON_KEYS)},
+        'career': {
+            'games_played': _values(career['games'], int),
+            'minutes': _values(career['minutes'], int),
+            'per_game': {key: _values(values) for key, values in career['per_game'].items()},
+            'per_36': {key: _values(values) for key, values in career['per_36'].items()},
+            'shooting': {key: _values(values) for key, values in career['shooting'].items()},
+            'totals': {key: _values(values, int) for key, values in career['totals'].items()},
+            'percentiles': {key: _values(values) for key, values in career['percentiles'].items()},
+        },
+        'league': None,
+    }
+    if league is not None:
+        ranks = [league.player(stats['info'].get('player_id')) or {} for stats in stats_list]
+        report['league'] = {
+            'season': league.season,
+            'percentiles': {stat: [r[stat]['percentile'] if stat in r else None for r in ranks]
+                            for stat in LEAGUE_STATS},
+        }
+    return report
+
+
+def _values(array, kind=float):
+    return [None if math.isnan(value) else kind(value) for value in array.tolist()]
+
+
+def comparison_rows(report):
+    """Flatten a comparison report into one dict per player"""
+    sections = {
+        'recent_averages': report['recent_averages'],
+        'career': {key: report['career'][key] for key in ('games_played', 'minutes')},
+    }
+    for key in ('per_game', 'per_36', 'shooting', 'totals', 'percentiles'):
+        sections[f'career_{key}'] = report['career'][key]
+    if report['league']:
+        sections['league_percentiles'] = report['league']['percentiles']
+
+    rows = []
+    for i, player in enumerate(report['players']):
+        row = {f'player.{field}': player.get(field) for field in REPORT_FIELDS['player']}
+        for section, values in sections.items():
+            row.update({f'{section}.{key}': column[i] for key, column in values.items()})
+        rows.append(row)
+    return rows
+
+
+def _text_cell(value):
+    return f"{value!s:<25}"
+
+
+def _number_cell(value):
+    if value is None:
+        return f"{'N/A':>6}{' ':>19}"
+    return f"{value:>6.1f}{' ':>19}"
+
+
+def _count_cell(value):
+    if value is None:
+        return f"{'N/A':>6}{' ':>19}"
+    return f"{value:>6}{' ':>19}"
+
+
+def _pct_cell(value):
+    return f"{format_pct(value):>7}{' ':>18}"
+
+
+def _rank_cell(value):
+    if value is None:
+        return f"{'N/A':>6}{' ':>19}"
+    return f"{value:>6.0f}{' ':>19}"
+
+
+def render_comparison_text(report):
+    """Render a comparison report as one side-by-side table, a column per player"""
+    players = report['players']
+    career = report['career']
+    width = 20 + 25 * len(players)
+
+    def row(label, values, cell):
+        return f"{label:<20} " + ' '.join(cell(value) for value in values)
+
+    def present(values):
+        return any(value is not None for value in values)
+
+    lines = [
+        "\nPlayer Comparison:",
+        "=" * width,
+        row('Attribute', [p['name'] for p in players], _text_cell),
+        "-" * width,
+        row('Position', [p['position'] for p in players], _text_cell),
+        row('Team', [p['team'] for p in players], _text_cell),
+        row('Experience', [p['experience'] for p in players], _text_cell),
+    ]
+
+    ra = report['recent_averages']
+    if present(ra['points']):
+        lines += ["\nRecent Averages (Last 5 Games):", "-" * width]
+        lines += [row(label, ra[key], _number_cell) for label, key in COUNT_LABELS[:5]]
+        lines += [row(label, ra[key], _pct_cell) for label, key in PERCENTAGE_LABELS]
+
+    if present(career['games_played']):
+        lines += ["\nCareer Averages:", "-" * width, row('Games Played', career['games_played'], _count_cell)]
+        lines += [row(label, career['per_game'][key], _number_cell) for label, key in COUNT_LABELS[:5]]
+        lines += [row(label, career['shooting'][key], _pct_cell) for label, key in PERCENTAGE_LABELS]
+
+        lines += ["\nCareer Totals:", "-" * width]
+        lines += [row(f'Total {label}', career['totals'][key], _count_cell) for label, key in COUNT_LABELS[:5]]
+
+        lines += ["\nCareer Per 36 Minutes:", "-" * width]
+        lines += [row(label, career['per_36'][key], _number_cell) for label, key in COUNT_LABELS]
+
+        lines += ["\nCareer Percentile Ranks (among these players):", "-" * width]
+        lines += [row(label, career['percentiles'][key], _rank_cell) for label, key in COUNT_LABELS[:5]]
+        lines += [row(label, career['percentiles'][key], _rank_cell) for label, key in PERCENTAGE_LABELS]
+
+    league = report['league']
+    if league:
+        lines += [f"\nLeague Percentiles ({league['season']}):", "-" * width]
+        lines += [row(label, league['percentiles'][key], _rank_cell) for label, key in LEAGUE_LABELS]
+    return '\n'.join(lines) + '\n'
+
+
+def write_comparison(report, out, fmt='text'):
+    """Write a comparison report as text, JSON or CSV (one row per player)"""
+    if fmt == 'text':
+        out.write(render_comparison_text(report))
+    elif fmt == 'json':
+        out.write(json.dumps(report) + '\n')
+    elif fmt == 'csv':
+        rows = comparison_rows(report)
+        writer = csv.DictWriter(out, fieldnames=list(rows[0]) if rows else [], lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        raise ValueError(f"Unsupported output format: {fmt}")
+
+
+def write_reports(reports, out, fmt='ndjson'):
+    """Serialize player reports to a text stream; returns the number written.
+
+    `reports` may be any iterable: text, NDJSON and CSV are written one
+    record at a time as the iterable yields them (one write call per
+    record), while JSON collects everything into a single array.
+    """
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {fmt}")
+
+    count = 0
+    if fmt == 'json':
+        reports = list(reports)
+        out.write(json.dumps(reports, default=str) + '\n')
+        return len(reports)
+
+    if fmt == 'csv':
+        writer = csv.DictWriter(out, fieldnames=CSV_COLUMNS, lineterminator='\n')
+        writer.writeheader()
+        for report in reports:
+            writer.writerow(flatten_report(report))
+            count += 1
+        return count
+
+    for report in reports:
+        if fmt == 'ndjson':
+            out.write(json.dumps(report, default=str) + '\n')
+        else:
+            out.write(render_text(report))
+        count += 1
+    return count
+
+
+def write_games(games, out, fmt='ndjson'):
+    """Serialize game rows (dicts or GameRows) to a text stream as the iterable yields them; returns the number written.
+
+    CSV columns are taken from the first game.
+    """
+    count = 0
+    writer = None
+    for game in games:
+        if fmt == 'ndjson':
+            out.write(json.dumps(dict(game), default=str) + '\n')
+        elif fmt == 'csv':
+            if writer is None:
+                writer = csv.DictWriter(out, fieldnames=list(game), lineterminator='\n')
+                writer.writeheader()
+            writer.writerow(game)
+        else:
+            raise ValueError(f"Unsupported output format: {fmt}")
+        count += 1
+    return count
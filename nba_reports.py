@@ -0,0 +1,235 @@
+import base64
+import html
+import json
+import os
+import queue
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import nba_charts
+import nba_output
+from nba_metrics import span
+
+DEFAULT_FETCH_WORKERS = 8
+# Charts are CPU-bound: one worker process per core
+DEFAULT_RENDER_WORKERS = os.cpu_count() or 1
+# Players held between two stages; keeps memory flat on a league-wide run
+DEFAULT_QUEUE_SIZE = 16
+
+CHART_MIME_TYPES = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+# End of a stage's input
+_DONE = object()
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em auto; max-width: 1100px; }}
+section {{ border-top: 1px solid #ccc; padding-top: 1em; }}
+pre {{ background: #f6f6f6; padding: 1em; overflow-x: auto; }}
+img {{ max-width: 49%; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<p>Generated {generated} &middot; {count} player(s)</p>
+<ul>
+{contents}
+</ul>
+"""
+
+PAGE_END = """</body>
+</html>
+"""
+
+
+class ReportCheckpoint:
+    """Rendered player sections of an unfinished report, kept in `<report path>.parts`.
+
+    Each finished player's HTML section is saved as its own file, so a run
+    that is interrupted resumes where it stopped. The roster is recorded in
+    manifest.json; a run for a different roster starts over.
+    """
+
+    def __init__(self, report_path, player_ids):
+        self.directory = report_path + '.parts'
+        self.player_ids = list(player_ids)
+
+    def open(self, restart=False):
+        """Create the checkpoint, or reuse a matching one; returns the player ids already rendered"""
+        manifest_path = os.path.join(self.directory, 'manifest.json')
+        if not restart and os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                if json.load(f)['player_ids'] == self.player_ids:
+                    return {player_id for player_id in self.player_ids if os.path.exists(self._path(player_id))}
+        self.remove()
+        os.makedirs(self.directory)
+        with open(manifest_path, 'w') as f:
+            json.dump({'player_ids': self.player_ids}, f)
+        return set()
+
+    def _path(self, player_id):
+        return os.path.join(self.directory, f'{player_id}.html')
+
+    def save(self, player_id, name, section):
+        """Save a player's rendered section (written to a temporary file, then renamed)"""
+        tmp_path = self._path(player_id) + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(name) + '\n' + section)
+        os.replace(tmp_path, self._path(player_id))
+
+    def saved(self):
+        """Return [(player_id, name)] of every saved player, in roster order"""
+        saved = []
+        for player_id in self.player_ids:
+            try:
+                with open(self._path(player_id), encoding='utf-8') as f:
+                    saved.append((player_id, json.loads(f.readline())))
+            except FileNotFoundError:
+                continue
+        return saved
+
+    def section(self, player_id):
+        """Return a saved player's HTML section"""
+        with open(self._path(player_id), encoding='utf-8') as f:
+            f.readline()
+            return f.read()
+
+    def remove(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def render_section(player_id, report, charts, fmt):
+    """Render one player's report and encoded charts as an HTML section"""
+    name = html.escape(report['player']['name'])
+    images = ''.join(
+        f'<img alt="{name} {kind}" src="data:{CHART_MIME_TYPES[fmt]};base64,'
+        f'{base64.b64encode(image).decode("ascii")}">'
+        for kind, image in (charts or {}).items())
+    return (f'<section id="player-{player_id}">\n<h2>{name}</h2>\n'
+            f'<pre>{html.escape(nba_output.render_text(report))}</pre>\n{images}\n</section>\n')
+
+
+def _stage(work, inbox, outbox, workers, failed):
+    """Start `workers` threads applying `work` to each item of `inbox`.
+
+    `work(item)` returns the item for `outbox`, or None to drop it. A
+    failing item is recorded in `failed` and dropped. The last worker to
+    finish passes _DONE on.
+    """
+    remaining = [workers]
+    lock = threading.Lock()
+
+    def run():
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                inbox.put(_DONE)  # let the stage's other workers see it too
+                break
+            try:
+                result = work(item)
+            except Exception as e:
+                failed[item[0]] = str(e)
+                continue
+            if result is not None and outbox is not None:
+                outbox.put(result)
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last and outbox is not None:
+            outbox.put(_DONE)
+
+    threads = [threading.Thread(target=run, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def build_report(player_ids, path, fetch, title='NBA Player Report', league=None, fmt='svg',
+                 fetch_workers=DEFAULT_FETCH_WORKERS, render_workers=DEFAULT_RENDER_WORKERS,
+                 queue_size=DEFAULT_QUEUE_SIZE, restart=False, progress=None):
+    """Write one HTML report with embedded charts for many players.
+
+    Players flow through three concurrent stages joined by bounded queues:
+    `fetch(player_id)` (a get_player_stats dict or None) on `fetch_workers`
+    threads, building the structured report, and rendering the charts in
+    `render_workers` processes. Rendered sections are checkpointed, so
+    rerunning after an interruption only handles the remaining players
+    (`restart=True` starts over). `progress(player_id, name)` is called as
+    each player finishes.
+
+    Returns {'players', 'rendered', 'resumed', 'failed': {player_id: reason}}.
+    The checkpoint is removed once every player is in the report.
+    """
+    if fmt not in CHART_MIME_TYPES:
+        raise ValueError(f"Unsupported chart format: {fmt}")
+    player_ids = list(dict.fromkeys(player_ids))
+    checkpoint = ReportCheckpoint(path, player_ids)
+    resumed = checkpoint.open(restart)
+    pending = queue.Queue(maxsize=queue_size)
+    fetched = queue.Queue(maxsize=queue_size)
+    reports = queue.Queue(maxsize=queue_size)
+    failed = {}
+    rendered = []
+
+    def fetch_stage(item):
+        player_id, = item
+        stats = fetch(player_id)
+        if not stats:
+            raise ValueError('no stats available')
+        return player_id, stats
+
+    def report_stage(item):
+        player_id, stats = item
+        with span('report.aggregate'):
+            return player_id, stats, nba_output.player_report(stats, league)
+
+    with ProcessPoolExecutor(max_workers=render_workers) as executor:
+        def render_stage(item):
+            player_id, stats, report = item
+            with span('report.render'):
+                charts = None
+                if stats['recent_averages']:
+                    charts = executor.submit(nba_charts.render_player_charts, nba_charts.chart_input(stats), None,
+                                             fmt).result()
+                section = render_section(player_id, report, charts, fmt)
+            checkpoint.save(player_id, report['player']['name'], section)
+            rendered.append(player_id)
+            if progress is not None:
+                progress(player_id, report['player']['name'])
+
+        threads = (_stage(fetch_stage, pending, fetched, fetch_workers, failed)
+                   + _stage(report_stage, fetched, reports, 1, failed)
+                   + _stage(render_stage, reports, None, render_workers, failed))
+        for player_id in player_ids:
+            if player_id not in resumed:
+                pending.put((player_id,))
+        pending.put(_DONE)
+        for thread in threads:
+            thread.join()
+
+    with span('report.write'):
+        write_html(path, title, checkpoint.saved(), checkpoint.section)
+    if not failed:
+        checkpoint.remove()
+    return {'players': len(player_ids), 'rendered': len(rendered), 'resumed': len(resumed), 'failed': failed}
+
+
+def write_html(path, title, players, section):
+    """Write the report file at `path` for [(player_id, name)], streaming each `section(player_id)` in turn"""
+    contents = '\n'.join(f'<li><a href="#player-{player_id}">{html.escape(name)}</a></li>'
+                         for player_id, name in players)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(PAGE_TEMPLATE.format(title=html.escape(title), generated=datetime.now().strftime('%Y-%m-%d %H:%M'),
+                                     count=len(players), contents=contents))
+        for player_id, _ in players:
+            f.write(section(player_id))
+        f.write(PAGE_END)
+    os.replace(tmp_path, path)
@@ -0,0 +1,152 @@
+import unicodedata
+from bisect import bisect_left, bisect_right
+from difflib import SequenceMatcher
+
+# Match classes, best first
+EXACT = 0
+WORD_EXACT = 1
+PREFIX = 2
+WORD_PREFIX = 3
+SUBSTRING = 4
+FUZZY = 5
+
+FUZZY_THRESHOLD = 0.7
+FUZZY_LIMIT = 10
+# Minimum trigram overlap (Dice coefficient) for a name to be scored as a fuzzy match
+FUZZY_MIN_OVERLAP = 0.3
+
+
+def fold_name(name):
+    """Normalize a name for matching: accents folded, lowercased, punctuation dropped"""
+    # Most names are plain ASCII letters, so skip the per-character passes when possible
+    if not name.isascii():
+        name = ''.join(c for c in unicodedata.normalize('NFKD', name) if not unicodedata.combining(c))
+    name = name.lower()
+    if not name.replace(' ', '').isalnum():
+        name = ''.join(c for c in name if c.isalnum() or c.isspace())
+    return ' '.join(name.split())
+
+
+def trigrams(text):
+    """Return the set of character trigrams of a folded name, padded at word edges"""
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class PlayerIndex:
+    """In-memory search index over the static player list.
+
+    Holds accent-folded names, a sorted name-token array for prefix lookups,
+    all names joined into one string for substring scans, and a trigram
+    index for fuzzy matches (built on the first fuzzy lookup).
+    """
+
+    def __init__(self, player_list):
+        self.players = list(player_list)
+        self.names = [fold_name(p['full_name']) for p in self.players]
+
+        tokens = sorted((token, i) for i, name in enumerate(self.names) for token in name.split())
+        self._tokens = [t for t, _ in tokens]
+        self._token_ids = [i for _, i in tokens]
+
+        self._blob = '\n'.join(self.names)
+        self._offsets = []
+        offset = 0
+        for name in self.names:
+            self._offsets.append(offset)
+            offset += len(name) + 1
+
+        self._trigrams = None
+        self._trigram_counts = None
+
+    def _build_trigrams(self):
+        index = {}
+        counts = []
+        for i, name in enumerate(self.names):
+            grams = trigrams(name)
+            counts.append(len(grams))
+            for gram in grams:
+                index.setdefault(gram, []).append(i)
+        self._trigram_counts = counts
+        self._trigrams = index
+
+    def _token_prefix_ids(self, prefix):
+        start = bisect_left(self._tokens, prefix)
+        ids = set()
+        for pos in range(start, len(self._tokens)):
+            if not self._tokens[pos].startswith(prefix):
+                break
+            ids.add(self._token_ids[pos])
+        return ids
+
+    def _substring_ids(self, query):
+        ids = set()
+        position = self._blob.find(query)
+        while position != -1:
+            ids.add(bisect_right(self._offsets, position) - 1)
+            position = self._blob.find(query, position + 1)
+        return ids
+
+    def _fuzzy(self, query, limit):
+        if self._trigrams is None:
+            self._build_trigrams()
+        query_grams = trigrams(query)
+        counts = {}
+        for gram in query_grams:
+            for i in self._trigrams.get(gram, ()):
+                counts[i] = counts.get(i, 0) + 1
+        # Shortlist by trigram overlap, then score only the shortlist by edit similarity
+        overlap = {}
+        for i, shared in counts.items():
+            dice = 2 * shared / (len(query_grams) + self._trigram_counts[i])
+            if dice >= FUZZY_MIN_OVERLAP:
+                overlap[i] = dice
+        shortlist = sorted(overlap, key=overlap.get, reverse=True)[:limit * 3]
+        scored = []
+        for i in shortlist:
+            ratio = SequenceMatcher(None, query, self.names[i]).ratio()
+            if ratio >= FUZZY_THRESHOLD:
+                scored.append((FUZZY, not self.players[i]['is_active'], -ratio, self.names[i], i))
+        scored.sort()
+        return scored[:limit]
+
+    def search(self, query, limit=None):
+        """Return players matching `query`, best match first.
+
+        Exact, whole-word, prefix, word-prefix and substring matches are
+        returned together; fuzzy matches are only tried when none of those
+        match. Within a match class, active players come ahead of inactive
+        ones, then names starting with the query.
+        """
+        query = fold_name(query)
+        if not query:
+            return []
+
+        query_tokens = query.split()
+        matches = self._token_prefix_ids(query_tokens[0])
+        for token in query_tokens[1:]:
+            matches &= self._token_prefix_ids(token)
+        matches |= self._substring_ids(query)
+
+        ranked = []
+        for i in matches:
+            name = self.names[i]
+            if name == query:
+                match_class = EXACT
+            elif set(query_tokens) <= set(name.split()):
+                match_class = WORD_EXACT
+            elif name.startswith(query):
+                match_class = PREFIX
+            elif query in name and not any(token.startswith(query) for token in name.split()):
+                match_class = SUBSTRING
+            else:
+                match_class = WORD_PREFIX
+            ranked.append((match_class, not self.players[i]['is_active'], not name.startswith(query),
+                           len(name) - len(query), name, i))
+        ranked.sort()
+
+        if not ranked:
+            ranked = self._fuzzy(query, limit or FUZZY_LIMIT)
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [self.players[entry[-1]] for entry in ranked]
@@ -0,0 +1,241 @@
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+import nba_analyzer
+import nba_output
+from nba_metrics import metrics
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8080
+# Longest a client waits for one response; upstream fetches keep running
+# (and stay shared with other clients) when a request times out
+DEFAULT_REQUEST_TIMEOUT = 30.0
+DEFAULT_WORKERS = 16
+MAX_HEADER_LINES = 100
+COMPARE_LIMIT = 30
+
+
+class HTTPError(Exception):
+    """Raised by a route to answer with an error status and message"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class StatsService:
+    """asyncio HTTP/1.1 service answering analyzer queries with JSON.
+
+    Routes:
+        GET /search?q=<name>[&limit=<n>]       matching players
+        GET /players/<id>/stats                player report (see nba_output.player_report)
+        GET /compare?ids=<id>,<id>[,...]       comparison report
+        GET /health                            request counters and upstream latency
+        GET /metrics                           counters in the Prometheus text format
+
+    The blocking analyzer calls run in a thread pool. Identical requests that
+    arrive while one is in flight await the same call, so 50 clients asking
+    for one player cost a single upstream fetch.
+    """
+
+    def __init__(self, request_timeout=DEFAULT_REQUEST_TIMEOUT, max_workers=DEFAULT_WORKERS, league_season=None):
+        self.request_timeout = request_timeout
+        self.league_season = league_season
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._inflight = {}
+        self.requests = 0
+        self.calls = 0
+        self.coalesced = 0
+
+    async def _call(self, key, func, *args):
+        # Share one executor call between all concurrent requests for `key`
+        future = self._inflight.get(key)
+        if future is None:
+            self.calls += 1
+            future = asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # shield: one client timing out must not cancel the call for the others
+        return await asyncio.shield(future)
+
+    async def _player_stats(self, player_id):
+        stats = await self._call(('stats', player_id), nba_analyzer.get_player_stats, player_id)
+        if not stats:
+            raise HTTPError(HTTPStatus.BAD_GATEWAY, f'No stats available for player {player_id}')
+        return stats
+
+    async def _league(self):
+        return await self._call(('league', self.league_season), nba_analyzer.get_league_index,
+                                self.league_season, False)
+
+    async def search(self, query):
+        name = _single(query, 'q')
+        limit = _int(query['limit'][0], 'limit') if 'limit' in query else None
+        found = await self._call(('search', name), nba_analyzer.search_player, name)
+        return {'players': found[:limit] if limit is not None else found}
+
+    async def player_stats(self, player_id):
+        stats, league = await asyncio.gather(self._player_stats(player_id), self._league())
+        return nba_output.player_report(stats, league)
+
+    async def compare(self, query):
+        ids = [_int(value, 'ids') for value in _single(query, 'ids').split(',') if value]
+        if not 2 <= len(ids) <= COMPARE_LIMIT:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f'ids must list 2 to {COMPARE_LIMIT} players')
+        *stats_list, league = await asyncio.gather(*(self._player_stats(i) for i in ids), self._league())
+        return nba_output.comparison_report(stats_list, league)
+
+    def health(self):
+        return {'status': 'ok', 'requests': self.requests, 'calls': self.calls,
+                'coalesced': self.coalesced, 'inflight': len(self._inflight),
+                'upstream': nba_analyzer.nba_transport.transport_stats()}
+
+    async def route(self, method, target):
+        """Answer one request; returns the JSON-serializable body (str for plain text) or raises HTTPError"""
+        if method != 'GET':
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f'{method} is not supported')
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        parts = [part for part in url.path.split('/') if part]
+        if parts == ['health']:
+            return self.health()
+        if parts == ['metrics']:
+            return metrics.render_prometheus()
+        if parts == ['search']:
+            return await self.search(query)
+        if len(parts) == 3 and parts[0] == 'players' and parts[2] == 'stats':
+            return await self.player_stats(_int(parts[1], 'player id'))
+        if parts == ['compare']:
+            return await self.compare(query)
+        raise HTTPError(HTTPStatus.NOT_FOUND, f'No route for {url.path}')
+
+    async def respond(self, method, target):
+        """Route a request under the per-request timeout, mapping failures to error responses"""
+        self.requests += 1
+        try:
+            status, body = HTTPStatus.OK, await asyncio.wait_for(self.route(method, target), self.request_timeout)
+        except HTTPError as e:
+            status, body = e.status, {'error': str(e)}
+        except asyncio.TimeoutError:
+            status, body = HTTPStatus.GATEWAY_TIMEOUT, {'error': 'Timed out waiting for stats.nba.com'}
+        except Exception as e:
+            status, body = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)}
+        metrics.increment('service_requests_total', status=status.value)
+        return status, body
+
+    async def handle_connection(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection until the client closes it"""
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, target, version, headers = request
+                status, body = await self.respond(method, target)
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+                writer.write(_response(status, body, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Start listening; returns the asyncio server (port 0 picks a free port)"""
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _single(query, name):
+    values = query.get(name)
+    if not values or not values[0].strip():
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f'Missing query parameter: {name}')
+    return values[0]
+
+
+def _int(value, name):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f'Invalid {name}: {value}')
+
+
+async def _read_request(reader):
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, target, version = line.decode('latin-1').split()
+    except ValueError:
+        raise ConnectionError('Malformed request line')
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    # Requests are GETs; drain any body so the next request parses cleanly
+    length = int(headers.get('content-length') or 0)
+    if length:
+        await reader.readexactly(length)
+    return method, target, version, headers
+
+
+def _response(status, body, keep_alive):
+    if isinstance(body, str):
+        payload, content_type = body.encode(), 'text/plain; version=0.0.4; charset=utf-8'
+    else:
+        payload, content_type = json.dumps(body).encode(), 'application/json'
+    head = (f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+            f'Content-Type: {content_type}\r\n'
+            f'Content-Length: {len(payload)}\r\n'
+            f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+    return head.encode('latin-1') + payload
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, **service_options):
+    """Run the service until cancelled"""
+    service = StatsService(**service_options)
+    server = await service.start(host, port)
+    print(f"Serving on http://{host}:{server.sockets[0].getsockname()[1]}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='nba_service', description='JSON HTTP service for the NBA stats analyzer')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--timeout', type=float, default=DEFAULT_REQUEST_TIMEOUT, help='per-request timeout in seconds')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='threads for blocking analyzer calls')
+    parser.add_argument('--offline', action='store_true', help='serve requests from the response cache only')
+    parser.add_argument('--upstream', default=None, metavar='URL',
+                        help='stats API URL template, e.g. http://127.0.0.1:9000/stats/{endpoint}')
+    args = parser.parse_args(argv)
+    if args.offline:
+        nba_analyzer.configure_cache(offline=True)
+    if args.upstream:
+        nba_analyzer.nba_transport.configure_transport(base_url=args.upstream)
+    try:
+        asyncio.run(serve(args.host, args.port, request_timeout=args.timeout, max_workers=args.workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+import os
+
+import numpy as np
+
+from nba_analytics import COMPARISON_COLUMNS, COMPARISON_TOTAL_COLUMNS, combined_season_rows, compare_totals
+from nba_league import default_league_dir
+
+# Career features compared: minutes per game, per-game and per-36 counting
+# stats, and shooting percentages
+SIMILARITY_FEATURES = (('minutes',) + tuple(COMPARISON_COLUMNS)
+                       + tuple(f'{key}_per_36' for key in COMPARISON_COLUMNS)
+                       + ('fg_pct', 'fg3_pct', 'ft_pct', 'ts_pct'))
+
+# Players below this many career games are left out of the index
+DEFAULT_MIN_GAMES = 50
+
+METRICS = ('cosine', 'euclidean')
+
+
+def similarity_index_path(directory=None):
+    """Return the file the similarity index is saved to (next to the league indexes)"""
+    return os.path.join(directory or default_league_dir(), 'similarity.npz')
+
+
+def career_features(totals):
+    """Return the (players x SIMILARITY_FEATURES) matrix for a (players x COMPARISON_TOTAL_COLUMNS) totals array"""
+    totals = np.asarray(totals, dtype=float).reshape(-1, len(COMPARISON_TOTAL_COLUMNS))
+    compared = compare_totals([dict(zip(COMPARISON_TOTAL_COLUMNS, row)) for row in totals.tolist()])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        minutes = np.where(compared['games'] > 0, compared['minutes'] / compared['games'], np.nan)
+    columns = [minutes]
+    columns += [compared['per_game'][key] for key in COMPARISON_COLUMNS]
+    columns += [compared['per_36'][key] for key in COMPARISON_COLUMNS]
+    columns += [compared['shooting'][key] for key in ('fg_pct', 'fg3_pct', 'ft_pct', 'ts_pct')]
+    return np.column_stack(columns)
+
+
+def sum_season_totals(rows):
+    """Sum season totals rows into career totals: (player ids, names, totals array).
+
+    Accepts LeagueDashPlayerStats rows (one per player and season) or
+    PlayerCareerStats SeasonTotalsRegularSeason rows, where a traded
+    player's per-team rows are skipped in favour of the season's TOT row.
+    """
+    rows = combined_season_rows(rows)
+    positions = {}
+    names = {}
+    for row in rows:
+        positions.setdefault(row['PLAYER_ID'], len(positions))
+        if row.get('PLAYER_NAME'):
+            names[row['PLAYER_ID']] = row['PLAYER_NAME']
+    values = np.array([[row.get(column) or 0 for column in COMPARISON_TOTAL_COLUMNS] for row in rows],
+                      dtype=float).reshape(len(rows), len(COMPARISON_TOTAL_COLUMNS))
+    totals = np.zeros((len(positions), len(COMPARISON_TOTAL_COLUMNS)))
+    np.add.at(totals, [positions[row['PLAYER_ID']] for row in rows], values)
+    player_ids = list(positions)
+    return player_ids, [names.get(player_id, '') for player_id in player_ids], totals
+
+
+class SimilarityIndex:
+    """Career stat vectors of every indexed player, for nearest-neighbour queries.
+
+    Each player's career totals become SIMILARITY_FEATURES, standardized to
+    z-scores across the index (a missing feature, such as 3-point percentage
+    without attempts, counts as average). A query is one matrix-vector
+    product over all players, then a partial sort for the top k.
+    """
+
+    def __init__(self, player_ids, names, totals, seasons=('', '')):
+        self.player_ids = np.asarray(player_ids, dtype=np.int64)
+        self.names = [str(name) for name in names]
+        self.totals = np.asarray(totals, dtype=float).reshape(len(self.player_ids), len(COMPARISON_TOTAL_COLUMNS))
+        self.seasons = tuple(str(season) for season in seasons)
+        self._rows = {player_id: i for i, player_id in enumerate(self.player_ids.tolist())}
+
+        features = career_features(self.totals)
+        present = ~np.isnan(features)
+        counts = np.maximum(present.sum(axis=0), 1)
+        self.mean = np.where(present, features, 0).sum(axis=0) / counts
+        std = np.sqrt(np.where(present, (features - self.mean) ** 2, 0).sum(axis=0) / counts)
+        self.std = np.where(std > 0, std, 1.0)
+        self.vectors = self._standardize(features)
+        self._sq_norms = np.einsum('ij,ij->i', self.vectors, self.vectors)
+        norms = np.sqrt(self._sq_norms)
+        self._unit = self.vectors / np.where(norms > 0, norms, 1.0)[:, None]
+
+    @classmethod
+    def from_season_totals(cls, rows, min_games=DEFAULT_MIN_GAMES, seasons=('', '')):
+        """Build the index from season totals rows (see sum_season_totals) of any number of seasons"""
+        player_ids, names, totals = sum_season_totals(rows)
+        keep = totals[:, COMPARISON_TOTAL_COLUMNS.index('GP')] >= min_games
+        return cls(np.asarray(player_ids, dtype=np.int64)[keep], [n for n, k in zip(names, keep) if k], totals[keep],
+                   seasons)
+
+    def __len__(self):
+        return len(self.player_ids)
+
+    def __contains__(self, player_id):
+        return player_id in self._rows
+
+    def _standardize(self, features):
+        return np.nan_to_num((features - self.mean) / self.std).astype(np.float32)
+
+    def vector(self, totals):
+        """Standardized feature vector of a career totals row ({column: value})"""
+        row = [[totals.get(column) or 0 for column in COMPARISON_TOTAL_COLUMNS]]
+        return self._standardize(career_features(row))[0]
+
+    def similar(self, player_id=None, limit=10, metric='cosine', totals=None):
+        """Return the `limit` players most similar to one, as [(player_id, name, score)], closest first.
+
+        The player is looked up by id, or described by a career `totals`
+        row when not in the index. `score` is the cosine similarity (1 is
+        identical) or the Euclidean distance between z-score vectors (0 is
+        identical); the player never matches themself.
+        """
+        if metric not in METRICS:
+            raise ValueError(f'Unknown similarity metric {metric!r}; use one of {", ".join(METRICS)}')
+        row = self._rows.get(player_id)
+        if row is not None:
+            query = self.vectors[row]
+        elif totals is not None:
+            query = self.vector(totals)
+        else:
+            raise KeyError(f'Player {player_id} is not in the similarity index')
+
+        if metric == 'cosine':
+            norm = np.linalg.norm(query)
+            scores = self._unit @ (query / norm if norm > 0 else query)
+            order_keys = -scores
+        else:
+            # |a - b|^2 = |a|^2 - 2 a.b + |b|^2, with the |a|^2 precomputed
+            scores = np.sqrt(np.maximum(self._sq_norms - 2 * (self.vectors @ query) + query @ query, 0))
+            order_keys = scores
+        if row is not None:
+            order_keys = order_keys.copy()
+            order_keys[row] = np.inf
+        count = min(limit, len(self) - (row is not None))
+        if count <= 0:
+            return []
+        top = np.argpartition(order_keys, count - 1)[:count]
+        top = top[np.argsort(order_keys[top], kind='stable')]
+        return [(int(self.player_ids[i]), self.names[i], float(scores[i])) for i in top]
+
+    def save(self, path):
+        """Write the index to an .npz file"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, player_ids=self.player_ids, names=np.array(self.names, dtype=str),
+                 totals=self.totals, seasons=np.array(self.seasons, dtype=str))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by save"""
+        with np.load(path) as data:
+            return cls(data['player_ids'], data['names'].tolist(), data['totals'], data['seasons'].tolist())
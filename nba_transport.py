@@ -0,0 +1,288 @@
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from nba_api.live.nba.library.http import NBALiveHTTP
+from nba_api.stats.library.http import NBAStatsHTTP
+
+from nba_metrics import metrics
+
+# stats.nba.com does not publish its limits; sustained rates much above a
+# couple of requests per second from one address get throttled or dropped.
+DEFAULT_REQUESTS_PER_SECOND = 2.0
+DEFAULT_BURST = 6
+DEFAULT_MAX_CONCURRENT_REQUESTS = 8
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_TIMEOUT = 30
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# nba_api asks for brotli even when no decoder is installed; only advertise
+# the encodings urllib3 can actually decode
+REQUEST_HEADERS = dict(NBAStatsHTTP.headers, **{'Accept-Encoding': ACCEPT_ENCODING})
+# cdn.nba.com live data; requests sets Host from the URL, and the files are
+# revalidated with ETag / Last-Modified instead of a forced max-age=0
+LIVE_HEADERS = {name: value for name, value in NBALiveHTTP.headers.items() if name not in ('Host', 'Cache-Control')}
+LIVE_HEADERS['Accept-Encoding'] = ACCEPT_ENCODING
+
+# Latency samples kept per endpoint for percentiles
+LATENCY_SAMPLES = 1000
+
+
+class UpstreamError(Exception):
+    """Raised when stats.nba.com answers with an error status"""
+
+    def __init__(self, message, status_code=None, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, holding at most `capacity`"""
+
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+
+
+class LatencyStats:
+    """Thread-safe per-endpoint request counts and latencies (most recent LATENCY_SAMPLES per endpoint)"""
+
+    def __init__(self, samples=LATENCY_SAMPLES):
+        self._samples = samples
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, seconds, error=False):
+        """Record one request to `endpoint` that took `seconds`"""
+        with self._lock:
+            entry = self._endpoints.get(endpoint)
+            if entry is None:
+                entry = self._endpoints[endpoint] = {'requests': 0, 'errors': 0, 'total': 0.0,
+                                                     'latencies': deque(maxlen=self._samples)}
+            entry['requests'] += 1
+            entry['errors'] += error
+            entry['total'] += seconds
+            entry['latencies'].append(seconds)
+
+    def summary(self):
+        """Return {endpoint: {requests, errors, mean, p50, p95, max}}, latencies in seconds"""
+        with self._lock:
+            entries = {name: dict(entry, latencies=sorted(entry['latencies'])) for name, entry in self._endpoints.items()}
+        return {
+            name: {
+                'requests': entry['requests'],
+                'errors': entry['errors'],
+                'mean': entry['total'] / entry['requests'],
+                'p50': _percentile(entry['latencies'], 50),
+                'p95': _percentile(entry['latencies'], 95),
+                'max': entry['latencies'][-1],
+            }
+            for name, entry in entries.items()
+        }
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+def _percentile(ordered, percent):
+    # Nearest-rank percentile of a sorted, non-empty list
+    return ordered[max(0, -(-len(ordered) * percent // 100) - 1)]
+
+
+def create_session(pool_size=DEFAULT_MAX_CONCURRENT_REQUESTS):
+    """Return a requests session whose keep-alive pool holds a connection per concurrent request.
+
+    Retries are left to request_endpoint, which backs off and honours
+    Retry-After.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update(REQUEST_HEADERS)
+    return session
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """Exponential backoff with full jitter for the given (zero-based) retry attempt"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+_rate_limiter = TokenBucket(DEFAULT_REQUESTS_PER_SECOND, DEFAULT_BURST)
+_request_slots = threading.BoundedSemaphore(DEFAULT_MAX_CONCURRENT_REQUESTS)
+_max_retries = DEFAULT_MAX_RETRIES
+_timeout = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_TIMEOUT)
+_base_url = None
+_live_base_url = None
+_session = None
+latency = LatencyStats()
+
+
+def configure_transport(requests_per_second=DEFAULT_REQUESTS_PER_SECOND, burst=DEFAULT_BURST,
+                        max_concurrent_requests=DEFAULT_MAX_CONCURRENT_REQUESTS,
+                        max_retries=DEFAULT_MAX_RETRIES, timeout=DEFAULT_TIMEOUT,
+                        connect_timeout=DEFAULT_CONNECT_TIMEOUT, base_url=None, live_base_url=None):
+    """Configure rate limiting, concurrency, timeouts and retry policy for upstream requests.
+
+    `timeout` is the read timeout and `connect_timeout` the time allowed to
+    open a connection, both in seconds. A fresh pooled session is installed
+    as nba_api's shared session. `base_url` replaces nba_api's
+    'https://stats.nba.com/stats/{endpoint}', e.g. to point the analyzer at
+    a local stub server, and `live_base_url` likewise replaces
+    'https://cdn.nba.com/static/json/liveData/{endpoint}'.
+    """
+    global _rate_limiter, _request_slots, _max_retries, _timeout, _base_url, _live_base_url, _session
+    _rate_limiter = TokenBucket(requests_per_second, burst)
+    _request_slots = threading.BoundedSemaphore(max_concurrent_requests)
+    _max_retries = max_retries
+    _timeout = (connect_timeout, timeout)
+    _base_url = base_url
+    _live_base_url = live_base_url
+    if _session is not None:
+        _session.close()
+    _session = create_session(max_concurrent_requests)
+    NBAStatsHTTP.set_session(_session)
+
+
+def get_session():
+    """Return the shared upstream session, installing the default one on first use"""
+    if _session is None:
+        configure_transport()
+    return _session
+
+
+def transport_stats():
+    """Report connections opened by the shared session and per-endpoint latency"""
+    opened = 0
+    if _session is not None:
+        # One adapter is mounted for both schemes
+        for adapter in set(_session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            opened += sum(pools[key].num_connections for key in pools.keys())
+    return {'connections_opened': opened, 'endpoints': latency.summary()}
+
+
+def _get(session, endpoint, url, params=None, headers=REQUEST_HEADERS):
+    # One GET within the concurrency limit, recorded in the latency stats and counters
+    with _request_slots:
+        started = time.perf_counter()
+        try:
+            response = session.get(url=url, params=params, headers=headers, timeout=_timeout)
+        except requests.RequestException:
+            latency.record(endpoint, time.perf_counter() - started, error=True)
+            metrics.increment('upstream_requests_total', endpoint=endpoint, status='error')
+            raise
+        latency.record(endpoint, time.perf_counter() - started, error=response.status_code >= 400)
+    metrics.increment('upstream_requests_total', endpoint=endpoint, status=str(response.status_code))
+    # Content-Length is the (possibly compressed) size on the wire
+    metrics.increment('upstream_response_bytes_total',
+                      int(response.headers.get('Content-Length') or len(response.content)), endpoint=endpoint)
+    if response.status_code in RETRY_STATUSES:
+        raise UpstreamError(f'{endpoint} returned HTTP {response.status_code}', response.status_code,
+                            _retry_after(response.headers.get('Retry-After')))
+    if response.status_code >= 400:
+        raise requests.HTTPError(f'{endpoint} returned HTTP {response.status_code}', response=response)
+    return response
+
+
+def _send(endpoint, parameters):
+    get_session()
+    http = NBAStatsHTTP()
+    response = _get(http.get_session(), endpoint, (_base_url or http.base_url).format(endpoint=endpoint),
+                    sorted(parameters.items()))
+    return http.clean_contents(response.text)
+
+
+def _with_retries(endpoint, send):
+    # Rate limit every attempt; back off on throttling, server errors and timeouts
+    attempt = 0
+    while True:
+        _rate_limiter.acquire()
+        try:
+            return send()
+        except (UpstreamError, requests.Timeout, requests.ConnectionError) as e:
+            if attempt >= _max_retries:
+                raise
+            delay = backoff_delay(attempt)
+            if getattr(e, 'retry_after', None):
+                delay = max(delay, e.retry_after)
+            metrics.increment('upstream_retries_total', endpoint=endpoint)
+            time.sleep(delay)
+            attempt += 1
+
+
+def request_endpoint(endpoint_class, **params):
+    """Request an nba_api endpoint from stats.nba.com and return the raw response body.
+
+    Requests are rate limited and retried with exponential backoff on
+    throttling (HTTP 429), server errors and timeouts.
+    """
+    endpoint = endpoint_class(get_request=False, **params)
+    return _with_retries(endpoint_class.endpoint, lambda: _send(endpoint_class.endpoint, endpoint.parameters))
+
+
+def request_live(endpoint, validators=None):
+    """Request a cdn.nba.com live data file such as 'scoreboard/todaysScoreboard_00.json'.
+
+    `validators` is a dict kept by the caller between polls: the ETag and
+    Last-Modified of the previous answer are sent as If-None-Match and
+    If-Modified-Since, and replaced by those of the new answer. Returns the
+    parsed JSON, or None when the file has not changed (HTTP 304). Rate
+    limited and retried like request_endpoint.
+    """
+    validators = validators if validators is not None else {}
+    url = (_live_base_url or NBALiveHTTP.base_url).format(endpoint=endpoint)
+    name = endpoint.split('/', 1)[0]
+
+    def send():
+        headers = dict(LIVE_HEADERS)
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+        response = _get(get_session(), name, url, headers=headers)
+        if response.status_code == 304:
+            return None
+        validators['etag'] = response.headers.get('ETag')
+        validators['last_modified'] = response.headers.get('Last-Modified')
+        return response.json()
+
+    return _with_retries(name, send)
+
+
+def _retry_after(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,193 @@
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from nba_analytics import GameLogArrays, STAT_COLUMNS, parse_game_date
+
+# PlayerGameLog columns, stored under their API names
+GAME_LOG_COLUMNS = (
+    'SEASON_ID', 'Player_ID', 'Game_ID', 'GAME_DATE', 'MATCHUP', 'WL', 'MIN',
+    'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT', 'FTM', 'FTA', 'FT_PCT',
+    'OREB', 'DREB', 'REB', 'AST', 'STL', 'BLK', 'TOV', 'PF', 'PTS', 'PLUS_MINUS',
+    'VIDEO_AVAILABLE',
+)
+
+# PlayerCareerStats SeasonTotalsRegularSeason columns
+SEASON_TOTAL_COLUMNS = (
+    'PLAYER_ID', 'SEASON_ID', 'LEAGUE_ID', 'TEAM_ID', 'TEAM_ABBREVIATION', 'PLAYER_AGE',
+    'GP', 'GS', 'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT', 'FTM', 'FTA',
+    'FT_PCT', 'OREB', 'DREB', 'REB', 'AST', 'STL', 'BLK', 'TOV', 'PF', 'PTS',
+)
+
+# PlayerCareerStats CareerTotalsRegularSeason columns
+CAREER_TOTAL_COLUMNS = (
+    'PLAYER_ID', 'LEAGUE_ID', 'Team_ID', 'GP', 'GS', 'MIN', 'FGM', 'FGA', 'FG_PCT',
+    'FG3M', 'FG3A', 'FG3_PCT', 'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST',
+    'STL', 'BLK', 'TOV', 'PF', 'PTS',
+)
+
+
+def default_warehouse_path():
+    """Return the warehouse location, honouring the NBA_ANALYZER_WAREHOUSE variable"""
+    path = os.environ.get('NBA_ANALYZER_WAREHOUSE')
+    if path:
+        return path
+    return os.path.join(os.path.expanduser('~'), '.local', 'share', 'nba_analyzer', 'warehouse.sqlite3')
+
+
+def _column_list(columns):
+    return ', '.join(f'"{c}"' for c in columns)
+
+
+class StatsWarehouse:
+    """Local SQLite store of player info, game logs and season/career totals.
+
+    Game logs and season totals are kept one row per game / season with a
+    column per stat, indexed by season so analytical queries can scan a
+    season at a time.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_warehouse_path()
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(f'''
+            CREATE TABLE IF NOT EXISTS player_info (
+                player_id INTEGER PRIMARY KEY,
+                info TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS game_logs (
+                {_column_list(GAME_LOG_COLUMNS)},
+                game_day TEXT NOT NULL,
+                PRIMARY KEY ("Player_ID", "Game_ID")
+            );
+            CREATE INDEX IF NOT EXISTS game_logs_season ON game_logs ("SEASON_ID", "Player_ID", game_day);
+            CREATE TABLE IF NOT EXISTS season_totals (
+                {_column_list(SEASON_TOTAL_COLUMNS)}
+            );
+            CREATE INDEX IF NOT EXISTS season_totals_season ON season_totals ("SEASON_ID", "PLAYER_ID");
+            CREATE INDEX IF NOT EXISTS season_totals_player ON season_totals ("PLAYER_ID");
+            CREATE TABLE IF NOT EXISTS career_totals (
+                {_column_list(CAREER_TOTAL_COLUMNS)},
+                PRIMARY KEY ("PLAYER_ID")
+            );
+        ''')
+        self._conn.commit()
+
+    def store_player_info(self, player_id, info):
+        """Store the raw CommonPlayerInfo row of a player"""
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO player_info VALUES (?, ?)', (player_id, json.dumps(info)))
+            self._conn.commit()
+
+    def store_games(self, games):
+        """Insert or update PlayerGameLog rows; returns the number of rows written"""
+        rows = [
+            [game.get(c) for c in GAME_LOG_COLUMNS] + [str(parse_game_date(game['GAME_DATE']))]
+            for game in games
+        ]
+        with self._lock:
+            self._conn.executemany(
+                f'INSERT OR REPLACE INTO game_logs ({_column_list(GAME_LOG_COLUMNS)}, game_day) '
+                f'VALUES ({", ".join("?" * (len(GAME_LOG_COLUMNS) + 1))})',
+                rows,
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def store_career(self, player_id, season_by_season, career_totals):
+        """Replace a player's season-by-season and career totals"""
+        with self._lock:
+            self._conn.execute('DELETE FROM season_totals WHERE "PLAYER_ID" = ?', (player_id,))
+            self._conn.executemany(
+                f'INSERT INTO season_totals ({_column_list(SEASON_TOTAL_COLUMNS)}) '
+                f'VALUES ({", ".join("?" * len(SEASON_TOTAL_COLUMNS))})',
+                [[player_id] + [row.get(c) for c in SEASON_TOTAL_COLUMNS[1:]] for row in season_by_season],
+            )
+            self._conn.execute('DELETE FROM career_totals WHERE "PLAYER_ID" = ?', (player_id,))
+            if career_totals:
+                self._conn.execute(
+                    f'INSERT INTO career_totals ({_column_list(CAREER_TOTAL_COLUMNS)}) '
+                    f'VALUES ({", ".join("?" * len(CAREER_TOTAL_COLUMNS))})',
+                    [player_id] + [career_totals.get(c) for c in CAREER_TOTAL_COLUMNS[1:]],
+                )
+            self._conn.commit()
+
+    def query(self, sql, params=()):
+        """Run a read-only SQL query and return rows as dicts"""
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            names = [d[0] for d in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def player_ids(self):
+        """Return the ids of every player stored"""
+        return [row['player_id'] for row in self.query('SELECT player_id FROM player_info ORDER BY player_id')]
+
+    def player_info(self, player_id):
+        """Return the stored CommonPlayerInfo row, or None"""
+        rows = self.query('SELECT info FROM player_info WHERE player_id = ?', (player_id,))
+        return json.loads(rows[0]['info']) if rows else None
+
+    def latest_game_date(self, player_id, season_id=None):
+        """Return the date of the newest stored game (numpy datetime64), or None"""
+        sql = 'SELECT MAX(game_day) AS day FROM game_logs WHERE "Player_ID" = ?'
+        params = [player_id]
+        if season_id is not None:
+            sql += ' AND "SEASON_ID" = ?'
+            params.append(season_id)
+        day = self.query(sql, params)[0]['day']
+        return np.datetime64(day, 'D') if day else None
+
+    def games(self, player_id, season_id=None, limit=None):
+        """Return stored PlayerGameLog rows, newest game first"""
+        sql = f'SELECT {_column_list(GAME_LOG_COLUMNS)} FROM game_logs WHERE "Player_ID" = ?'
+        params = [player_id]
+        if season_id is not None:
+            sql += ' AND "SEASON_ID" = ?'
+            params.append(season_id)
+        sql += ' ORDER BY game_day DESC'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        return self.query(sql, params)
+
+    def game_log_arrays(self, player_id, season_ids=None):
+        """Load a player's stored games straight into a GameLogArrays, oldest first"""
+        sql = (f'SELECT game_day, "SEASON_ID", {_column_list(STAT_COLUMNS)} FROM game_logs '
+               'WHERE "Player_ID" = ?')
+        params = [player_id]
+        if season_ids:
+            sql += f' AND "SEASON_ID" IN ({", ".join("?" * len(season_ids))})'
+            params.extend(season_ids)
+        with self._lock:
+            rows = self._conn.execute(sql + ' ORDER BY game_day', params).fetchall()
+        values = np.array([row[2:] for row in rows], dtype=float).reshape(len(rows), len(STAT_COLUMNS))
+        game_dates = np.array([row[0] for row in rows], dtype='datetime64[D]')
+        season_ids = np.array([row[1] for row in rows], dtype=str)
+        return GameLogArrays(values, STAT_COLUMNS, game_dates, season_ids)
+
+    def season_totals(self, player_id):
+        """Return a player's stored season-by-season totals, in the order the API returned them"""
+        return self.query(
+            f'SELECT {_column_list(SEASON_TOTAL_COLUMNS)} FROM season_totals WHERE "PLAYER_ID" = ? '
+            'ORDER BY rowid', (player_id,)
+        )
+
+    def career_totals(self, player_id):
+        """Return a player's stored career totals, or None"""
+        rows = self.query(
+            f'SELECT {_column_list(CAREER_TOTAL_COLUMNS)} FROM career_totals WHERE "PLAYER_ID" = ?', (player_id,)
+        )
+        return rows[0] if rows else None
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
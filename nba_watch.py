@@ -0,0 +1,287 @@
+import re
+import sys
+import time
+from collections import deque, namedtuple
+
+import numpy as np
+
+import nba_transport
+from nba_metrics import metrics
+
+# cdn.nba.com live data files (see nba_transport.request_live)
+SCOREBOARD = 'scoreboard/todaysScoreboard_00.json'
+BOXSCORE = 'boxscore/boxscore_{game_id}.json'
+
+# Seconds between polls; the interval doubles up to DEFAULT_MAX_INTERVAL
+# while nothing changes and drops back as soon as something does
+DEFAULT_INTERVAL = 20.0
+DEFAULT_MAX_INTERVAL = 300.0
+
+RECENT_GAMES = 5
+
+# Live box score statistics -> PlayerGameLog columns (minutes are parsed separately)
+LIVE_COLUMNS = {
+    'points': 'PTS',
+    'reboundsTotal': 'REB',
+    'reboundsOffensive': 'OREB',
+    'reboundsDefensive': 'DREB',
+    'assists': 'AST',
+    'steals': 'STL',
+    'blocks': 'BLK',
+    'turnovers': 'TOV',
+    'foulsPersonal': 'PF',
+    'fieldGoalsMade': 'FGM',
+    'fieldGoalsAttempted': 'FGA',
+    'threePointersMade': 'FG3M',
+    'threePointersAttempted': 'FG3A',
+    'freeThrowsMade': 'FTM',
+    'freeThrowsAttempted': 'FTA',
+    'plusMinusPoints': 'PLUS_MINUS',
+}
+
+# Columns summed into the running season and career totals, in display order
+TOTAL_COLUMNS = ('PTS', 'REB', 'AST', 'STL', 'BLK', 'TOV', 'FGM', 'FGA', 'FG3M', 'FG3A', 'FTM', 'FTA',
+                 'OREB', 'DREB', 'PF', 'PLUS_MINUS', 'MIN')
+
+# Per-game averages shown after a game is folded into the totals
+AVERAGE_COLUMNS = ('PTS', 'REB', 'AST', 'STL', 'BLK', 'MIN')
+
+# Live gameStatus values
+GAME_SCHEDULED, GAME_LIVE, GAME_FINAL = 1, 2, 3
+
+# One game's line for the player: `final` lines are folded into the totals
+GameUpdate = namedtuple('GameUpdate', ['game_id', 'label', 'line', 'final'])
+
+_DURATION = re.compile(r'PT(?:(\d+)M)?(?:([\d.]+)S)?')
+
+
+def parse_duration(value):
+    """Parse a live ISO 8601 duration such as 'PT25M01.00S' into minutes"""
+    match = _DURATION.fullmatch(value or '')
+    if not match:
+        return 0.0
+    minutes, seconds = match.groups()
+    return int(minutes or 0) + float(seconds or 0) / 60
+
+
+def live_line(player):
+    """Return a live box score player's statistics as a PlayerGameLog-style line"""
+    statistics = player.get('statistics', {})
+    line = {column: statistics.get(key, 0) for key, column in LIVE_COLUMNS.items()}
+    line['MIN'] = round(parse_duration(statistics.get('minutes')), 1)
+    return line
+
+
+def _number(value):
+    return value if isinstance(value, (int, float)) and value == value else 0
+
+
+class PlayerWatch:
+    """Running season, career and recent-game aggregates for one player, updated incrementally.
+
+    The season totals are summed once from the player's GameLog; after that
+    every finished game is added to them (and to the career totals) rather
+    than recomputing anything. `update_live` diffs a live line against the
+    previous snapshot so only changed stats are re-rendered.
+    """
+
+    def __init__(self, name, games, career_totals=None, recent=RECENT_GAMES):
+        self.name = name
+        arrays = games.arrays(TOTAL_COLUMNS)
+        self.season = {'GP': len(arrays)}
+        self.season.update(zip(TOTAL_COLUMNS, np.nansum(arrays.values, axis=0).tolist()))
+        self.career = None
+        if career_totals:
+            self.career = {column: _number(career_totals.get(column)) for column in ('GP',) + TOTAL_COLUMNS
+                           if column in career_totals}
+        # Lines of the last `recent` games, oldest first
+        self.recent = deque(({column: _number(value) for column, value in zip(TOTAL_COLUMNS, row)}
+                             for row in arrays.last(recent).values.tolist()), maxlen=recent)
+        self.counted = set(games['Game_ID']) if 'Game_ID' in games.headers else set()
+        self.live = {}
+
+    def update_live(self, game_id, line):
+        """Replace the live snapshot of `game_id`; returns {column: (old, new)} for the stats that changed"""
+        previous = self.live.get(game_id, {})
+        changed = {column: (previous.get(column, 0), value) for column, value in line.items()
+                   if value != previous.get(column, 0)}
+        self.live[game_id] = dict(line)
+        return changed
+
+    def add_game(self, game_id, line):
+        """Add a finished game to the season, career and recent aggregates; False if it was already counted"""
+        if game_id in self.counted:
+            return False
+        self.counted.add(game_id)
+        self.live.pop(game_id, None)
+        for totals in (self.season, self.career):
+            if totals is None:
+                continue
+            totals['GP'] += 1
+            for column in totals.keys() - {'GP'}:
+                totals[column] += _number(line.get(column))
+        self.recent.append({column: _number(line.get(column)) for column in TOTAL_COLUMNS})
+        return True
+
+    def averages(self, totals):
+        """Per-game averages of AVERAGE_COLUMNS for season or career `totals`"""
+        games = totals['GP']
+        return {column: totals[column] / games if games else 0.0 for column in AVERAGE_COLUMNS if column in totals}
+
+    def recent_averages(self):
+        """Per-game averages of AVERAGE_COLUMNS over the recent games"""
+        games = len(self.recent)
+        return {column: sum(line[column] for line in self.recent) / games if games else 0.0
+                for column in AVERAGE_COLUMNS}
+
+    def apply(self, update):
+        """Apply one GameUpdate; returns the output lines describing what changed"""
+        changed = self.update_live(update.game_id, update.line)
+        lines = []
+        if changed:
+            stats = '  '.join(_format_change(column, old, new) for column, (old, new) in
+                              sorted(changed.items(), key=lambda item: _column_order(item[0])))
+            lines.append(f'{update.label} {self.name}: {stats}')
+        if update.final and self.add_game(update.game_id, update.line):
+            lines.append(f"  Season ({self.season['GP']} games): {_format_averages(self.averages(self.season))}")
+            lines.append(f'  Last {len(self.recent)}: {_format_averages(self.recent_averages())}')
+            if self.career is not None:
+                lines.append(f"  Career ({self.career['GP']} games): {_format_averages(self.averages(self.career))}")
+        return lines
+
+    def summary(self):
+        """Output lines with the current season (and career) averages"""
+        lines = [f"{self.name} season ({self.season['GP']} games): {_format_averages(self.averages(self.season))}"]
+        if self.career is not None:
+            lines.append(f"{self.name} career ({self.career['GP']} games): "
+                         f"{_format_averages(self.averages(self.career))}")
+        return lines
+
+
+def _column_order(column):
+    return TOTAL_COLUMNS.index(column) if column in TOTAL_COLUMNS else len(TOTAL_COLUMNS)
+
+
+def _format_change(column, old, new):
+    delta = new - old
+    return f'{column} {new:g} ({delta:+g})'
+
+
+def _format_averages(averages):
+    return '  '.join(f'{value:.1f} {column}' for column, value in averages.items())
+
+
+class LiveSource:
+    """Poll cdn.nba.com's scoreboard for the team's game, then that game's box score.
+
+    Both files are requested conditionally (ETag / Last-Modified), so an
+    unchanged scoreboard or box score costs an empty 304. The box score of a
+    finished game is not requested again.
+    """
+
+    name = 'live box score'
+
+    def __init__(self, player_id, team_name):
+        self.player_id = player_id
+        self.team_name = team_name
+        self.game = None
+        self.finished = set()
+        self._validators = {}
+
+    def poll(self):
+        """Return the player's GameUpdates since the last poll"""
+        scoreboard = nba_transport.request_live(SCOREBOARD, self._validators.setdefault(SCOREBOARD, {}))
+        if scoreboard is not None:
+            self.game = next((game for game in scoreboard['scoreboard']['games']
+                              if self.team_name in (game['homeTeam']['teamName'], game['awayTeam']['teamName'])),
+                             None)
+        game = self.game
+        if game is None or game['gameStatus'] == GAME_SCHEDULED or game['gameId'] in self.finished:
+            return []
+
+        endpoint = BOXSCORE.format(game_id=game['gameId'])
+        boxscore = nba_transport.request_live(endpoint, self._validators.setdefault(endpoint, {}))
+        if boxscore is None:
+            return []
+        game = boxscore['game']
+        final = game['gameStatus'] == GAME_FINAL
+        if final:
+            self.finished.add(game['gameId'])
+        for team in (game['homeTeam'], game['awayTeam']):
+            for player in team.get('players', []):
+                if player['personId'] == self.player_id and player.get('played') == '1':
+                    return [GameUpdate(game['gameId'], _game_label(game), live_line(player), final)]
+        return []
+
+
+def _game_label(game):
+    home, away = game['homeTeam'], game['awayTeam']
+    score = f"{away['teamTricode']} {away['score']}-{home['score']} {home['teamTricode']}"
+    if game['gameStatus'] == GAME_FINAL:
+        return f'[Final {score}]'
+    seconds = round(parse_duration(game.get('gameClock')) * 60)
+    return f"[Q{game['period']} {seconds // 60}:{seconds % 60:02d} {score}]"
+
+
+class GameLogSource:
+    """Poll PlayerGameLog for games played after the last known one.
+
+    `games` is the GameLog already known. `fetch_games(date_from)` returns a
+    GameLog of the games on or after a datetime64 day (every game of the
+    season when None). stats.nba.com has no conditional requests, so this
+    source relies on the backoff between polls to stay cheap.
+    """
+
+    name = 'game log'
+
+    def __init__(self, fetch_games, games):
+        self.fetch_games = fetch_games
+        self.last_game_date = _last_game_date(games)
+
+    def poll(self):
+        """Return a final GameUpdate per newly logged game, oldest first"""
+        games = self.fetch_games(None if np.isnat(self.last_game_date) else self.last_game_date + 1)
+        updates = []
+        for game in reversed(list(games)):
+            line = {column: game.get(column) for column in TOTAL_COLUMNS}
+            updates.append(GameUpdate(game['Game_ID'], f"[{game['GAME_DATE']} {game['MATCHUP']} {game['WL']}]",
+                                      line, True))
+        if len(games):
+            self.last_game_date = _last_game_date(games)
+        return updates
+
+
+def _last_game_date(games):
+    return games.arrays(()).game_dates.max() if len(games) else np.datetime64('NaT', 'D')
+
+
+def watch(player, source, out=None, interval=DEFAULT_INTERVAL, max_interval=DEFAULT_MAX_INTERVAL,
+          polls=None, sleep=time.sleep):
+    """Poll `source` until interrupted (or `polls` times), writing only what changed for `player`.
+
+    The delay between polls doubles, up to `max_interval`, while nothing
+    changes and is reset to `interval` when something does. Returns the
+    number of polls.
+    """
+    out = out or sys.stdout
+    delay = interval
+    count = 0
+    while polls is None or count < polls:
+        if count:
+            sleep(delay)
+        count += 1
+        try:
+            updates = source.poll()
+        except Exception as e:
+            # Kept out of `out`, which only carries the watch output
+            print(f'Error polling the {source.name}: {str(e)}', file=sys.stderr)
+            updates = []
+        lines = [line for update in updates for line in player.apply(update)]
+        metrics.increment('watch_polls_total', result='changed' if lines else 'unchanged')
+        if lines:
+            out.write('\n'.join(lines) + '\n')
+            out.flush()
+            delay = interval
+        else:
+            delay = min(delay * 2, max_interval)
+    return count
@@ -0,0 +1,40 @@
+"""Sample stats.nba.com rows and get_player_stats dicts shared by the tests"""
+
+
+def sample_stats(name, points=30.0, career=True, player_id=2544):
+    """A get_player_stats dict with one recent game, recent averages and (optionally) career totals"""
+    return {
+        'info': {'name': name, 'team': 'Lakers', 'position': 'Forward', 'height': '6-9', 'weight': '250',
+                 'country': 'USA', 'experience': 21, 'draft_year': '2003', 'jersey': '23', 'player_id': player_id},
+        'recent_games': [{
+            'GAME_DATE': 'DEC 25, 2023', 'PTS': 30, 'REB': 10, 'AST': 8, 'STL': 2, 'BLK': 1, 'MIN': '36',
+            'FGM': 12, 'FGA': 20, 'FG_PCT': 0.6, 'FG3M': 2, 'FG3A': 5, 'FG3_PCT': 0.4, 'FTM': 4, 'FTA': 5,
+            'FT_PCT': 0.8,
+        }],
+        'recent_averages': {'points': points, 'rebounds': 10.0, 'assists': 8.0, 'steals': 2.0, 'blocks': 1.0,
+                            'fg_pct': 0.6, 'fg3_pct': None, 'ft_pct': 0.8, 'ts_pct': 0.65, 'efg_pct': 0.62},
+        'season_by_season': [],
+        'career_totals': {
+            'GP': 100, 'PTS': 2500, 'REB': 700, 'AST': 600, 'STL': 100, 'BLK': 50, 'MIN': 3600,
+            'FGM': 900, 'FGA': 1800, 'FG_PCT': 0.5, 'FG3M': 100, 'FG3A': 300, 'FG3_PCT': 0.333,
+            'FTM': 600, 'FTA': 800, 'FT_PCT': 0.75,
+        } if career else None,
+    }
+
+
+def game(date, pts, game_id='001', season_id='22023', reb=5, fgm=5, fga=10, fg3m=1, fg3a=3, ftm=4, fta=5):
+    """A PlayerGameLog row of player 2544"""
+    return {'SEASON_ID': season_id, 'Player_ID': 2544, 'Game_ID': game_id, 'GAME_DATE': date,
+            'MATCHUP': 'LAL vs. GSW', 'WL': 'W', 'MIN': 35, 'PTS': pts, 'REB': reb, 'AST': 3, 'STL': 1, 'BLK': 0,
+            'FGM': fgm, 'FGA': fga, 'FG_PCT': fgm / fga if fga else 0.0,
+            'FG3M': fg3m, 'FG3A': fg3a, 'FG3_PCT': fg3m / fg3a if fg3a else 0.0,
+            'FTM': ftm, 'FTA': fta, 'FT_PCT': ftm / fta if fta else 0.0}
+
+
+def season_totals(season_id, team='LAL', gp=70, pts=1900, player_id=2544, **overrides):
+    """A PlayerCareerStats SeasonTotalsRegularSeason row (the career row with season_id and team None)"""
+    row = {'PLAYER_ID': player_id, 'SEASON_ID': season_id, 'TEAM_ABBREVIATION': team, 'GP': gp, 'MIN': 2600,
+           'PTS': pts, 'REB': 500, 'OREB': 80, 'DREB': 420, 'AST': 500, 'STL': 90, 'BLK': 50, 'TOV': 240,
+           'PF': 130, 'FGM': 700, 'FGA': 1400, 'FG3M': 120, 'FG3A': 350, 'FTM': 380, 'FTA': 500}
+    row.update(overrides)
+    return row
@@ -0,0 +1,105 @@
+"""Local stand-in for stats.nba.com serving canned responses, for offline tests"""
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+def result_sets(**sets):
+    """Encode {name: [row dicts]} as a stats.nba.com resultSets body"""
+    encoded = []
+    for name, rows in sets.items():
+        headers = list(rows[0]) if rows else []
+        encoded.append({'name': name, 'headers': headers, 'rowSet': [[row.get(h) for h in headers] for row in rows]})
+    return json.dumps({'resultSets': encoded})
+
+
+class StubStatsServer:
+    """Threaded HTTP server answering /stats/<endpoint> from `responses`.
+
+    `responses` maps an endpoint name to a body string or to a function of
+    the query parameters ({name: value}) returning one. `latency` seconds are
+    slept before each answer; bodies are gzipped for clients that accept it.
+    Every answer carries an ETag, and a request whose If-None-Match matches
+    it gets an empty 304. `hits` counts requests per endpoint and `encodings`
+    the Content-Encoding of each answer.
+    """
+
+    def __init__(self, responses, latency=0.0):
+        self.responses = responses
+        self.latency = latency
+        self.hits = Counter()
+        self.encodings = Counter()
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                endpoint = url.path.rstrip('/').rsplit('/', 1)[-1]
+                with stub._lock:
+                    stub.hits[endpoint] += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                response = stub.responses.get(endpoint)
+                if response is None:
+                    self._send(404, '{}')
+                    return
+                if callable(response):
+                    response = response({k: v[0] for k, v in parse_qs(url.query, keep_blank_values=True).items()})
+                etag = '"%s"' % hashlib.md5(response.encode()).hexdigest()
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                self._send(200, response, etag)
+
+            def _send(self, status, body, etag=None):
+                payload = body.encode()
+                encoding = 'gzip' if 'gzip' in self.headers.get('Accept-Encoding', '') else 'identity'
+                with stub._lock:
+                    stub.encodings[encoding] += 1
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                if etag:
+                    self.send_header('ETag', etag)
+                if encoding == 'gzip':
+                    payload = gzip.compress(payload)
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        """URL template for nba_transport.configure_transport(base_url=...)"""
+        host, port = self._server.server_address
+        return f'http://{host}:{port}/stats/{{endpoint}}'
+
+    @property
+    def live_base_url(self):
+        """URL template for nba_transport.configure_transport(live_base_url=...); files are keyed by name"""
+        host, port = self._server.server_address
+        return f'http://{host}:{port}/live/{{endpoint}}'
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,68 @@
+import unittest
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from nba_aggregate import aggregate_league
+from nba_warehouse import StatsWarehouse
+from tests.sample_data import season_totals
+
+# (season, team, games, points) per player. Player 3 was traded in 2001-02:
+# the TOT row counts, the team rows do not
+CAREERS = {
+    1: [('1999-00', 'LAL', 82, 2050), ('2000-01', 'LAL', 80, 1600), ('2001-02', 'LAL', 70, 1400)],
+    2: [('2000-01', 'LAL', 60, 1800)],
+    3: [('2000-01', 'LAL', 81, 1620), ('2001-02', 'TOT', 75, 2250), ('2001-02', 'BOS', 40, 1300),
+        ('2001-02', 'NYK', 35, 950), ('2002-03', 'LAL', 82, 2378)],
+    4: [('2001-02', 'LAL', 10, 90)],
+    5: [('1998-99', 'LAL', 50, 1000), ('1999-00', 'LAL', 82, 2296)],
+}
+
+class TestAggregateLeague(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'warehouse.sqlite3')
+        warehouse = StatsWarehouse(self.path)
+        for player_id, seasons in CAREERS.items():
+            rows = [season_totals(season_id, team, gp=gp, pts=pts, player_id=player_id)
+                    for season_id, team, gp, pts in seasons]
+            warehouse.store_career(player_id, rows, None)
+        warehouse.close()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_leaders_and_totals(self):
+        """Test career and season leaderboards, qualifying minimums and TOT handling"""
+        result = aggregate_league(self.path, k=2, processes=1, career_min_games=200, season_min_games=58)
+        self.assertEqual(list(result.player_ids), [1, 2, 3, 4, 5])
+        self.assertEqual(result.leaders['career_totals']['points'], [(6248.0, 3, None), (5050.0, 1, None)])
+        self.assertEqual(result.leaders['career_per_game']['points'], [(6248 / 238, 3, None), (5050 / 232, 1, None)])
+        self.assertEqual(result.leaders['season_totals']['points'], [(2378.0, 3, '2002-03'), (2296.0, 5, '1999-00')])
+        self.assertEqual(result.leaders['season_per_game']['points'], [(30.0, 3, '2001-02'), (30.0, 2, '2000-01')])
+        self.assertEqual(result.leaders['career_totals']['games'], [(238.0, 3, None), (232.0, 1, None)])
+        self.assertNotIn('games', result.leaders['career_per_game'])
+        self.assertEqual(len(result.seasons), 10)
+
+        distribution = result.distributions()['points']
+        self.assertEqual(distribution['players'], 2)
+        self.assertAlmostEqual(distribution['mean'], (6248 / 238 + 5050 / 232) / 2)
+        self.assertAlmostEqual(distribution['p50'], distribution['mean'])
+
+    def test_worker_processes_match_one_process(self):
+        """Test that splitting players across worker processes and merging gives the same result"""
+        serial = aggregate_league(self.path, k=3, processes=1)
+        parallel = aggregate_league(self.path, k=3, processes=2, chunk_size=2)
+        self.assertEqual(parallel.leaders, serial.leaders)
+        np.testing.assert_array_equal(parallel.career, serial.career)
+        np.testing.assert_array_equal(parallel.seasons, serial.seasons)
+        np.testing.assert_array_equal(parallel.season_years, serial.season_years)
+
+if __name__ == '__main__':
+    unittest.main()
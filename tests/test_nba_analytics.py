@@ -0,0 +1,131 @@
+import unittest
+import os
+import sys
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from nba_analytics import (GameLogArrays, recent_averages, roster_window_summaries, ewm_weights,
+                           shooting_percentages, career_shooting, percentile_ranks, compare_totals)
+from tests.sample_data import game
+
+class TestGameLogArrays(unittest.TestCase):
+    def setUp(self):
+        """Set up a newest-first game log, as PlayerGameLog returns it"""
+        self.games = [
+            game('APR 05, 2024', 40),
+            game('APR 03, 2024', 30),
+            game('APR 01, 2024', 20),
+            game('MAR 30, 2024', 10),
+        ]
+        self.log = GameLogArrays.from_games(self.games)
+
+    def test_games_are_sorted_oldest_first(self):
+        """Test that games are loaded in chronological order"""
+        np.testing.assert_array_equal(self.log.column('PTS'), [10, 20, 30, 40])
+
+    def test_rolling_statistics(self):
+        """Test rolling mean, median and std across every window"""
+        np.testing.assert_allclose(self.log.rolling_mean(2)[:, self.log.columns.index('PTS')], [15, 25, 35])
+        np.testing.assert_allclose(self.log.rolling_median(3)[:, self.log.columns.index('PTS')], [20, 30])
+        np.testing.assert_allclose(self.log.rolling_std(2)[:, self.log.columns.index('PTS')], [5, 5, 5])
+        self.assertEqual(self.log.rolling_mean(10).shape, (0, len(self.log.columns)))
+
+    def test_rolling_mean_skips_missing_values(self):
+        """Test that a missing value only affects the windows that contain it"""
+        self.games[2]['REB'] = None
+        self.games[1]['REB'] = 9
+        log = GameLogArrays.from_games(self.games)
+        np.testing.assert_allclose(log.rolling_mean(2)[:, log.columns.index('REB')], [5, 9, 7])
+        np.testing.assert_allclose(log.rolling_mean(3)[:, log.columns.index('REB')], [7, 7])
+        np.testing.assert_allclose(log.rolling_mean(1)[:, log.columns.index('REB')], [5, np.nan, 9, 5])
+        np.testing.assert_allclose(log.rolling_mean(2)[:, log.columns.index('PTS')], [15, 25, 35])
+
+    def test_ewm_weights_favour_recent_games(self):
+        """Test that EWM weights sum to one and grow towards the newest game"""
+        weights = ewm_weights(5)
+        self.assertAlmostEqual(weights.sum(), 1.0)
+        self.assertTrue(np.all(np.diff(weights) > 0))
+        ewm = self.log.window_summary(4)['ewm']['PTS']
+        self.assertGreater(ewm, 25)
+
+    def test_recent_averages_view(self):
+        """Test that the recent_averages dict is the mean of the latest games"""
+        averages = recent_averages(self.log, window=3)
+        self.assertEqual(averages['points'], 30)
+        self.assertEqual(averages['rebounds'], 5)
+        self.assertEqual(set(averages), {'points', 'rebounds', 'assists', 'steals', 'blocks',
+                                         'fg_pct', 'fg3_pct', 'ft_pct', 'ts_pct', 'efg_pct'})
+        self.assertIsNone(recent_averages(GameLogArrays.from_games([])))
+
+    def test_shooting_is_weighted_by_attempts(self):
+        """Test that window percentages come from summed makes and attempts"""
+        log = GameLogArrays.from_games([
+            game('JAN 01, 2024', 20, fgm=9, fga=10, fg3m=0, fg3a=0),
+            game('JAN 03, 2024', 20, fgm=1, fga=20, fg3m=3, fg3a=6),
+        ])
+        averages = recent_averages(log, window=2)
+        # Averaging per-game FG% would give 0.475
+        self.assertAlmostEqual(averages['fg_pct'], 10 / 30)
+        # A game without three-point attempts does not drag 3P% down
+        self.assertAlmostEqual(averages['fg3_pct'], 0.5)
+        self.assertAlmostEqual(averages['efg_pct'], (10 + 1.5) / 30)
+        self.assertAlmostEqual(averages['ts_pct'], 40 / (2 * (30 + 0.44 * 10)))
+
+    def test_no_attempts_gives_none(self):
+        """Test that percentages without attempts are None rather than zero"""
+        log = GameLogArrays.from_games([game('JAN 01, 2024', 0, fgm=0, fga=0, fg3m=0, fg3a=0, ftm=0, fta=0)])
+        averages = recent_averages(log, window=5)
+        self.assertIsNone(averages['fg_pct'])
+        self.assertIsNone(averages['ts_pct'])
+
+    def test_shooting_percentages_vectorized(self):
+        """Test that percentages are derived for arrays of totals at once"""
+        result = shooting_percentages({'PTS': [10, 0], 'FGM': [4, 0], 'FGA': [8, 0], 'FG3M': [2, 0],
+                                       'FG3A': [4, 0], 'FTM': [0, 0], 'FTA': [0, 0]})
+        np.testing.assert_allclose(result['fg_pct'], [0.5, np.nan])
+        np.testing.assert_allclose(result['efg_pct'], [0.625, np.nan])
+        self.assertEqual(career_shooting({'PTS': 10, 'FGM': 4, 'FGA': 8, 'FG3M': 2, 'FG3A': 4,
+                                          'FTM': 0, 'FTA': 0})['efg_pct'], 0.625)
+
+    def test_multiple_seasons(self):
+        """Test that several seasons can be loaded together and split again"""
+        older = [game('APR 10, 2023', 50, season_id='22022')]
+        log = GameLogArrays.from_games(self.games + older)
+        self.assertEqual(log.seasons(), ['22022', '22023'])
+        self.assertEqual(len(log.season('22023')), 4)
+        self.assertEqual(log.column('PTS')[0], 50)
+
+    def test_roster_window_summaries(self):
+        """Test summarizing several windows for several players"""
+        summaries = roster_window_summaries({1: self.log}, windows=(1, 5))
+        self.assertEqual(summaries[1][1]['mean']['PTS'], 40)
+        self.assertEqual(summaries[1][5]['games'], 4)
+
+    def test_percentile_ranks(self):
+        """Test column-wise percentile ranks with ties and missing values"""
+        ranks = percentile_ranks(np.array([[10, 1], [20, 1], [30, np.nan], [20, 2]], dtype=float))
+        np.testing.assert_allclose(ranks[:, 0], [0, 50, 100, 50])
+        np.testing.assert_allclose(ranks[:, 1], [25, 25, np.nan, 100])
+
+    def test_compare_totals(self):
+        """Test per-game, per-36 and ranks for many players at once, with a player lacking totals"""
+        rows = [
+            {'GP': 10, 'MIN': 360, 'PTS': 300, 'REB': 50, 'AST': 40, 'STL': 10, 'BLK': 5, 'TOV': 20,
+             'FGM': 100, 'FGA': 200, 'FG3M': 20, 'FG3A': 50, 'FTM': 80, 'FTA': 100},
+            None,
+            {'GP': 20, 'MIN': 480, 'PTS': 200, 'REB': 100, 'AST': 20, 'STL': 10, 'BLK': 10, 'TOV': 10,
+             'FGM': 80, 'FGA': 200, 'FG3M': 0, 'FG3A': 0, 'FTM': 40, 'FTA': 50},
+        ]
+        result = compare_totals(rows)
+        np.testing.assert_allclose(result['per_game']['points'], [30, np.nan, 10])
+        np.testing.assert_allclose(result['per_36']['rebounds'], [5, np.nan, 7.5])
+        self.assertTrue(np.isnan(result['shooting']['fg3_pct'][2]))
+        np.testing.assert_allclose(result['percentiles']['points'], [100, np.nan, 0])
+        np.testing.assert_allclose(result['percentiles']['fg_pct'], [100, np.nan, 0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -51,7 +51,7 @@ class TestNBAAnalyzerIntegration(unittest.TestCase):
 
     def test_network_failure(self):
         """Test handling of network failures"""
-        with patch('nba_api.stats.static.players.find_players_by_full_name', 
+        with patch('nba_analyzer.get_player_index',
                   side_effect=Exception('Network Error')):
             result = search_player('LeBron James')
             self.assertEqual(len(result), 0)
@@ -2,13 +2,25 @@ import unittest
 from unittest.mock import Mock, patch
 import os
 import sys
+import tempfile
 
 # Add the parent directory to the path so we can import nba_analyzer
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
-from nba_analyzer import search_player, get_player_stats, display_player_stats
+import nba_analyzer
+from nba_analyzer import (search_player, get_player_stats, display_player_stats, fetch_endpoint,
+                          configure_cache, get_many_player_stats, configure_warehouse, sync_player,
+                          load_player_stats, current_season, cli, stream_game_logs, parse_seasons)
+import io
+import json
+import subprocess
+from contextlib import ExitStack, redirect_stderr, redirect_stdout
+from datetime import datetime
+from nba_cache import CacheMissError
+from nba_metrics import metrics
+from nba_search import PlayerIndex
 
 class TestNBAAnalyzer(unittest.TestCase):
     def setUp(self):
@@ -47,19 +59,62 @@ class TestNBAAnalyzer(unittest.TestCase):
             ]
         }
 
-    @patch('nba_api.stats.static.players.find_players_by_full_name')
-    def test_search_player_valid_name(self, mock_find_players):
+        self.sample_info = {
+            'FIRST_NAME': 'LeBron', 'LAST_NAME': 'James', 'TEAM_NAME': 'Lakers',
+            'POSITION': 'Forward', 'HEIGHT': '6-9', 'WEIGHT': '250', 'COUNTRY': 'USA',
+            'SEASON_EXP': 21, 'DRAFT_YEAR': '2003', 'JERSEY': '23'
+        }
+        self.sample_career = {
+            'SeasonTotalsRegularSeason': [{'SEASON_ID': '2003-04', 'GP': 79, 'PTS': 1654}],
+            'CareerTotalsRegularSeason': [{
+                'GP': 79, 'PTS': 1654, 'REB': 100, 'AST': 100, 'STL': 10, 'BLK': 10, 'FGM': 600, 'FGA': 1200,
+                'FG_PCT': 0.5, 'FG3M': 50, 'FG3A': 150, 'FG3_PCT': 0.333, 'FTM': 400, 'FTA': 500, 'FT_PCT': 0.8,
+                'MIN': 3000
+            }]
+        }
+
+    def fake_fetch(self, failing=()):
+        """Build a fetch_endpoint replacement returning the sample data"""
+        responses = {
+            'commonplayerinfo': {'CommonPlayerInfo': [self.sample_info]},
+            'playergamelog': {'PlayerGameLog': self.sample_player_data['recent_games']},
+            'playercareerstats': self.sample_career,
+        }
+        def fetch(endpoint_class, **params):
+            if endpoint_class.endpoint in failing:
+                raise ConnectionError('Network Error')
+            return responses[endpoint_class.endpoint]
+        return fetch
+
+    def patch_fetch(self, fetch):
+        """Patch the analyzer's endpoint fetches to serve `fetch`'s normalized responses"""
+        def fetch_result_set(endpoint_class, name, **params):
+            rows = fetch(endpoint_class, **params)[name]
+            headers = list(rows[0]) if rows else []
+            return headers, [[row.get(h) for h in headers] for row in rows]
+        stack = ExitStack()
+        stack.enter_context(patch('nba_analyzer.fetch_endpoint', side_effect=fetch))
+        stack.enter_context(patch('nba_analyzer.fetch_result_set', side_effect=fetch_result_set))
+        return stack
+
+    def sample_index(self):
+        """Build a player index over a small fixed player list"""
+        return PlayerIndex([
+            {'id': 2544, 'full_name': 'LeBron James', 'first_name': 'LeBron', 'last_name': 'James', 'is_active': True},
+            {'id': 201939, 'full_name': 'Stephen Curry', 'first_name': 'Stephen', 'last_name': 'Curry', 'is_active': True},
+        ])
+
+    def test_search_player_valid_name(self):
         """Test searching for a valid player name"""
-        mock_find_players.return_value = [{'full_name': 'LeBron James', 'id': 2544}]
-        result = search_player('LeBron James')
+        with patch('nba_analyzer.get_player_index', return_value=self.sample_index()):
+            result = search_player('LeBron James')
         self.assertEqual(len(result), 1)
         self.assertEqual(result[0]['full_name'], 'LeBron James')
 
-    @patch('nba_api.stats.static.players.find_players_by_full_name')
-    def test_search_player_invalid_name(self, mock_find_players):
+    def test_search_player_invalid_name(self):
         """Test searching for an invalid player name"""
-        mock_find_players.return_value = []
-        result = search_player('Invalid Player')
+        with patch('nba_analyzer.get_player_index', return_value=self.sample_index()):
+            result = search_player('Invalid Player')
         self.assertEqual(len(result), 0)
 
     def test_error_handling_empty_name(self):
@@ -72,5 +127,288 @@ class TestNBAAnalyzer(unittest.TestCase):
         result = search_player('!@#$%')
         self.assertEqual(len(result), 0)
 
+    def test_get_player_stats_sections(self):
+        """Test that get_player_stats assembles all sections from the three endpoints"""
+        with self.patch_fetch(self.fake_fetch()):
+            stats = get_player_stats(2544)
+        self.assertEqual(stats['info']['name'], 'LeBron James')
+        self.assertEqual(len(stats['recent_games']), 1)
+        self.assertEqual(stats['recent_averages']['points'], 30)
+        self.assertEqual(stats['career_totals']['GP'], 79)
+
+    def test_display_player_stats(self):
+        """Test that the text report includes the derived shooting percentages"""
+        with self.patch_fetch(self.fake_fetch()):
+            stats = get_player_stats(2544)
+        buffer = io.StringIO()
+        display_player_stats(stats, out=buffer)
+        output = buffer.getvalue()
+        self.assertIn('FG%: 60.0%', output)
+        self.assertIn('eFG%: 65.0%', output)
+        self.assertIn('Points: 30.0', output)
+
+    def test_get_player_stats_partial_failure(self):
+        """Test that a failed career fetch only blanks the career section"""
+        with self.patch_fetch(self.fake_fetch(failing=('playercareerstats',))):
+            stats = get_player_stats(2544)
+        self.assertEqual(stats['info']['name'], 'LeBron James')
+        self.assertEqual(stats['recent_averages']['points'], 30)
+        self.assertEqual(stats['season_by_season'], [])
+        self.assertIsNone(stats['career_totals'])
+
+    def test_get_player_stats_info_failure(self):
+        """Test that stats are unavailable without the player info"""
+        with self.patch_fetch(self.fake_fetch(failing=('commonplayerinfo',))):
+            self.assertIsNone(get_player_stats(2544))
+
+    def test_get_many_player_stats_streams_results(self):
+        """Test that batch lookups yield one result per player"""
+        with patch('nba_analyzer.get_player_stats', side_effect=lambda player_id: {'id': player_id}):
+            results = dict(get_many_player_stats([1, 2, 3], max_workers=2))
+        self.assertEqual(results, {1: {'id': 1}, 2: {'id': 2}, 3: {'id': 3}})
+
+        with patch('nba_analyzer.get_player_stats', side_effect=lambda player_id: {'id': player_id}) as lookup:
+            results = get_many_player_stats(range(100), max_workers=2)
+            next(results)
+            # Lookups are submitted as results are consumed, not all up front
+            self.assertLessEqual(lookup.call_count, 3)
+            self.assertEqual(len(list(results)), 99)
+
+    def fake_season_fetch(self, requests):
+        """Build a fetch_endpoint replacement serving one game per (season, season type) log"""
+        def fetch(endpoint_class, **params):
+            if endpoint_class.endpoint == 'commonplayerinfo':
+                return {'CommonPlayerInfo': [self.sample_info], 'AvailableSeasons': [
+                    {'SEASON_ID': season_id} for season_id in ('22021', '22022', '42022', '52021', '22022')]}
+            season_type = params.get('season_type_all_star', 'Regular Season')
+            requests.append((params['season'], season_type))
+            if params['season'] == current_season():
+                return {'PlayerGameLog': []}
+            game = dict(self.sample_player_data['recent_games'][0], SEASON_ID=params['season'], TYPE=season_type)
+            return {'PlayerGameLog': [game]}
+        return fetch
+
+    def test_stream_game_logs_career(self):
+        """Test that a career log requests every season the player has games of each type in"""
+        requests = []
+        with self.patch_fetch(self.fake_season_fetch(requests)):
+            logs = list(stream_game_logs(2544, season_types=('regular', 'playoffs', 'playin'), max_workers=2))
+        expected = {('2021-22', 'Regular Season'), ('2022-23', 'Regular Season'), ('2022-23', 'Playoffs'),
+                    ('2021-22', 'PlayIn')}
+        self.assertEqual(sorted(requests), sorted(expected))
+        self.assertEqual({(season, games[0]['TYPE']) for season, _, games in logs}, expected)
+
+    def test_stream_game_logs_fetches_ahead_boundedly(self):
+        """Test that only `max_workers` seasons are fetched ahead of the consumer"""
+        requests = []
+        seasons = parse_seasons(['2000-01:2019-20'])
+        with self.patch_fetch(self.fake_season_fetch(requests)):
+            logs = stream_game_logs(2544, seasons=seasons, max_workers=2)
+            for consumed in range(1, 11):
+                next(logs)
+                self.assertLessEqual(len(requests), consumed + 2)
+            self.assertEqual(len(list(logs)), 10)
+        self.assertEqual(sorted(season for season, _ in requests), seasons)
+
+    def test_parse_seasons(self):
+        """Test that season arguments expand ranges inclusively"""
+        self.assertEqual(parse_seasons(['2019-20:2021-22', '2023-24']), ['2019-20', '2020-21', '2021-22', '2023-24'])
+        self.assertEqual(parse_seasons(['1999-00:2000-01']), ['1999-00', '2000-01'])
+
+    def test_get_player_stats_latest_season(self):
+        """Test that recent games fall back to the last season played before a season starts"""
+        requests = []
+        with self.patch_fetch(self.fake_season_fetch(requests)):
+            stats = get_player_stats(2544)
+            self.assertEqual(requests, [(current_season(), 'Regular Season'), ('2022-23', 'Regular Season')])
+            self.assertEqual(stats['recent_games'][0]['SEASON_ID'], '2022-23')
+            requests.clear()
+            get_player_stats(2544, season='2021-22', season_type='playoffs')
+            self.assertEqual(requests, [('2021-22', 'Playoffs')])
+
+    def test_cli_games_ndjson(self):
+        """Test that the games command streams one NDJSON record per game across seasons"""
+        requests = []
+        buffer = io.StringIO()
+        with self.patch_fetch(self.fake_season_fetch(requests)), \
+                redirect_stdout(buffer), redirect_stderr(io.StringIO()):
+            status = cli(['games', '2544', '--seasons', '2019-20:2021-22', '--season-type', 'regular', 'playoffs'])
+        self.assertEqual(status, 0)
+        records = [json.loads(line) for line in buffer.getvalue().splitlines()]
+        self.assertEqual(len(records), 6)
+        self.assertEqual(len(requests), 6)
+
+    def test_current_season(self):
+        """Test that the season rolls over in October"""
+        self.assertEqual(current_season(datetime(2024, 9, 30)), '2023-24')
+        self.assertEqual(current_season(datetime(2024, 10, 1)), '2024-25')
+
+    def test_sync_player_is_incremental(self):
+        """Test that a second sync only asks for games after the newest stored one"""
+        game = dict(self.sample_player_data['recent_games'][0], SEASON_ID='22023', Player_ID=2544, Game_ID='001')
+        calls = []
+        fetch = self.fake_fetch()
+        def recording_fetch(endpoint_class, **params):
+            calls.append((endpoint_class.endpoint, params))
+            if endpoint_class.endpoint == 'playergamelog':
+                return {'PlayerGameLog': [] if 'date_from_nullable' in params else [game]}
+            return fetch(endpoint_class, **params)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            warehouse = configure_warehouse(os.path.join(tmpdir, 'warehouse.sqlite3'))
+            try:
+                with patch('nba_analyzer.fetch_endpoint', side_effect=recording_fetch):
+                    self.assertEqual(sync_player(2544, season='2023-24'), 1)
+                    self.assertEqual(sync_player(2544, season='2023-24'), 0)
+
+                log_calls = [params for endpoint, params in calls if endpoint == 'playergamelog']
+                self.assertNotIn('date_from_nullable', log_calls[0])
+                self.assertEqual(log_calls[1]['date_from_nullable'], '12/26/2023')
+                # Career totals are not refetched when no new games arrived
+                self.assertEqual(sum(1 for endpoint, _ in calls if endpoint == 'playercareerstats'), 1)
+
+                stats = load_player_stats(2544)
+                self.assertEqual(stats['info']['name'], 'LeBron James')
+                self.assertEqual(stats['recent_averages']['points'], 30)
+                self.assertEqual(stats['career_totals']['GP'], 79)
+                self.assertIsNone(load_player_stats(201939))
+            finally:
+                warehouse.close()
+
+    def test_sync_player_refetches_cached_career(self):
+        """Test that syncs fetch new games and career totals past the response cache"""
+        games = [dict(self.sample_player_data['recent_games'][0], SEASON_ID='22023', Player_ID=2544, Game_ID='001')]
+        career = self.sample_career['CareerTotalsRegularSeason'][0]
+        responses = {
+            'commonplayerinfo': lambda: {'CommonPlayerInfo': [self.sample_info]},
+            'playergamelog': lambda: {'PlayerGameLog': games},
+            'playercareerstats': lambda: {'SeasonTotalsRegularSeason': [dict(career, SEASON_ID='2023-24')],
+                                          'CareerTotalsRegularSeason': [career]},
+        }
+        def request_endpoint(endpoint_class, **params):
+            result_sets = [{'name': name, 'headers': list(rows[0]) if rows else [],
+                            'rowSet': [list(row.values()) for row in rows]}
+                           for name, rows in responses[endpoint_class.endpoint]().items()]
+            return json.dumps({'resultSets': result_sets})
+
+        with tempfile.TemporaryDirectory() as tmpdir, \
+                patch('nba_transport.request_endpoint', side_effect=request_endpoint):
+            configure_cache(os.path.join(tmpdir, 'cache.sqlite3'))
+            warehouse = configure_warehouse(os.path.join(tmpdir, 'warehouse.sqlite3'))
+            try:
+                self.assertEqual(sync_player(2544, season='2023-24'), 1)
+                # Nothing new before tonight's game, then the same request again after it
+                new_game, games = dict(games[0], Game_ID='002', GAME_DATE='DEC 28, 2023'), []
+                self.assertEqual(sync_player(2544, season='2023-24'), 0)
+                games = [new_game]
+                career = dict(career, GP=80, PTS=1684)
+                self.assertEqual(sync_player(2544, season='2023-24'), 1)
+                self.assertEqual(warehouse.career_totals(2544)['GP'], 80)
+                self.assertEqual(warehouse.season_totals(2544)[0]['PTS'], 1684)
+            finally:
+                warehouse.close()
+                configure_cache(enabled=False)
+                nba_analyzer._cache_disabled = False
+
+    def test_import_is_lazy(self):
+        """Test that importing the module does not load nba_api endpoints, numpy or matplotlib"""
+        code = ('import sys, nba_analyzer; '
+                'print([m for m in ("matplotlib", "numpy", "nba_api.stats.endpoints") if m in sys.modules])')
+        output = subprocess.run([sys.executable, '-c', code], cwd=parent_dir, capture_output=True, text=True, check=True)
+        self.assertEqual(output.stdout.strip(), '[]')
+
+    def test_cli_search_json(self):
+        """Test the non-interactive search command"""
+        buffer = io.StringIO()
+        with patch('nba_analyzer.get_player_index', return_value=self.sample_index()), redirect_stdout(buffer):
+            status = cli(['search', 'curry', '--json'])
+        self.assertEqual(status, 0)
+        self.assertEqual([p['id'] for p in json.loads(buffer.getvalue())], [201939])
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with patch('nba_analyzer.get_player_index', return_value=self.sample_index()), redirect_stdout(stdout), \
+                redirect_stderr(stderr):
+            cli(['search', 'nobody', '--json'])
+        self.assertEqual(json.loads(stdout.getvalue()), [])
+        self.assertIn('Error searching for player', stderr.getvalue())
+
+    def test_cli_stats_json(self):
+        """Test the non-interactive stats command"""
+        buffer = io.StringIO()
+        with self.patch_fetch(self.fake_fetch()), redirect_stdout(buffer):
+            status = cli(['stats', '2544', '--json'])
+        self.assertEqual(status, 0)
+        self.assertEqual(json.loads(buffer.getvalue())[0]['player']['name'], 'LeBron James')
+
+    def test_cli_stats_json_section_error(self):
+        """Test that a failing section is reported on stderr, keeping stdout valid JSON"""
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with self.patch_fetch(self.fake_fetch(failing=('playergamelog',))), redirect_stdout(stdout), \
+                redirect_stderr(stderr):
+            status = cli(['stats', '2544', '--json'])
+        self.assertEqual(status, 0)
+        self.assertIsNone(json.loads(stdout.getvalue())[0]['recent_averages'])
+        self.assertIn('Error getting game log: Network Error', stderr.getvalue())
+
+    def test_cli_stats_ndjson_many(self):
+        """Test that a batch of players streams one NDJSON record per player with stats"""
+        buffer = io.StringIO()
+        with self.patch_fetch(self.fake_fetch()), redirect_stdout(buffer), \
+                redirect_stderr(io.StringIO()):
+            status = cli(['stats', '2544', '201939', '--format', 'ndjson'])
+        self.assertEqual(status, 0)
+        records = [json.loads(line) for line in buffer.getvalue().splitlines()]
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0]['recent_averages']['points'], 30)
+
+    def test_cli_compare_many(self):
+        """Test that several players are compared in one table, columns in argument order"""
+        buffer = io.StringIO()
+        with self.patch_fetch(self.fake_fetch()), redirect_stdout(buffer):
+            status = cli(['compare', '2544', '201939', '203999', '--format', 'json'])
+        self.assertEqual(status, 0)
+        report = json.loads(buffer.getvalue())
+        self.assertEqual(len(report['players']), 3)
+        self.assertEqual(report['career']['games_played'], [79, 79, 79])
+
+    def test_cli_profile_and_metrics(self):
+        """Test that --profile and --metrics report stage timings on stderr, leaving stdout alone"""
+        metrics.reset()
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with self.patch_fetch(self.fake_fetch()), redirect_stdout(stdout), \
+                redirect_stderr(stderr):
+            status = cli(['--profile', '--metrics', '-', 'stats', '2544', '--json'])
+        self.assertEqual(status, 0)
+        self.assertEqual(json.loads(stdout.getvalue())[0]['player']['name'], 'LeBron James')
+        report = stderr.getvalue()
+        for stage in ('get_player_stats', 'compute.recent_averages'):
+            self.assertIn(f'\n{stage} ', report)
+        self.assertIn('nba_analyzer_stage_calls_total{stage="get_player_stats"} 1\n', report)
+
+    def test_fetch_endpoint_uses_cache(self):
+        """Test that a repeated endpoint fetch is served from the response cache"""
+        body = '{"resultSets": [{"name": "CommonPlayerInfo", "headers": ["PERSON_ID"], "rowSet": [[2544]]}]}'
+        endpoint_class = Mock(endpoint='commonplayerinfo')
+
+        with tempfile.TemporaryDirectory() as tmpdir, \
+                patch('nba_transport.request_endpoint', return_value=body) as mock_request:
+            configure_cache(os.path.join(tmpdir, 'cache.sqlite3'))
+            metrics.reset()
+            try:
+                first = fetch_endpoint(endpoint_class, player_id=2544)
+                second = fetch_endpoint(endpoint_class, player_id=2544)
+                self.assertEqual(first, {'CommonPlayerInfo': [{'PERSON_ID': 2544}]})
+                self.assertEqual(first, second)
+                self.assertEqual(mock_request.call_count, 1)
+                self.assertEqual(metrics.counter('cache_requests_total', endpoint='commonplayerinfo'), 2)
+                self.assertEqual(metrics.counter('cache_hit_bytes_total'), len(body))
+
+                configure_cache(os.path.join(tmpdir, 'cache.sqlite3'), offline=True)
+                with self.assertRaises(CacheMissError):
+                    fetch_endpoint(endpoint_class, player_id=201939)
+            finally:
+                configure_cache(enabled=False)
+                nba_analyzer._cache_disabled = False
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,81 @@
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from nba_cache import ResponseCache, CacheMissError, game_night_expiry, cache_key
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        """Set up a throwaway cache file"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'responses.sqlite3')
+        self.cache = ResponseCache(self.path)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmpdir.cleanup()
+
+    def test_miss_then_hit(self):
+        """Test that a stored response is served and counted as a hit"""
+        params = {'player_id': 2544}
+        self.assertIsNone(self.cache.get('commonplayerinfo', params))
+        self.cache.put('commonplayerinfo', params, '{"resultSets": []}')
+        self.assertEqual(self.cache.get('commonplayerinfo', params), '{"resultSets": []}')
+        stats = self.cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['entries'], 1)
+
+    def test_key_ignores_parameter_order(self):
+        """Test that parameter order does not change the cache key"""
+        self.assertEqual(cache_key('x', {'a': 1, 'b': 2}), cache_key('x', {'b': 2, 'a': 1}))
+
+    def test_expired_entry_is_a_miss(self):
+        """Test that entries past their TTL are not served online"""
+        self.cache.ttls['commonplayerinfo'] = 60
+        with patch('nba_cache.time.time', return_value=1000.0):
+            self.cache.put('commonplayerinfo', {'player_id': 1}, 'body')
+        with patch('nba_cache.time.time', return_value=1061.0):
+            self.assertIsNone(self.cache.get('commonplayerinfo', {'player_id': 1}))
+
+    def test_offline_serves_stale_and_raises_on_missing(self):
+        """Test that offline mode serves stale entries and raises on a miss"""
+        self.cache.ttls['commonplayerinfo'] = 60
+        with patch('nba_cache.time.time', return_value=1000.0):
+            self.cache.put('commonplayerinfo', {'player_id': 1}, 'body')
+        self.cache.offline = True
+        self.assertEqual(self.cache.get('commonplayerinfo', {'player_id': 1}), 'body')
+        with self.assertRaises(CacheMissError):
+            self.cache.get('commonplayerinfo', {'player_id': 2})
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted over the size bound"""
+        self.cache.max_bytes = 10
+        with patch('nba_cache.time.time', return_value=1.0):
+            self.cache.put('playercareerstats', {'player_id': 1}, 'aaaa')
+        with patch('nba_cache.time.time', return_value=2.0):
+            self.cache.put('playercareerstats', {'player_id': 2}, 'bbbb')
+        with patch('nba_cache.time.time', return_value=3.0):
+            self.cache.get('playercareerstats', {'player_id': 1})
+        with patch('nba_cache.time.time', return_value=4.0):
+            self.cache.put('playercareerstats', {'player_id': 3}, 'cccc')
+        with patch('nba_cache.time.time', return_value=5.0):
+            self.assertIsNone(self.cache.get('playercareerstats', {'player_id': 2}))
+            self.assertEqual(self.cache.get('playercareerstats', {'player_id': 1}), 'aaaa')
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+    def test_game_night_expiry(self):
+        """Test that game logs expire at the next rollover hour"""
+        # 2024-01-01 03:00 UTC rolls over at 10:00 the same day
+        self.assertEqual(game_night_expiry(1704078000.0), 1704103200.0)
+        # 2024-01-01 12:00 UTC rolls over at 10:00 the next day
+        self.assertEqual(game_night_expiry(1704110400.0), 1704189600.0)
+
+if __name__ == '__main__':
+    unittest.main()
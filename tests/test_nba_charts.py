@@ -0,0 +1,60 @@
+import unittest
+import os
+import sys
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from nba_charts import render_player_charts, render_comparison_charts, render_many_player_charts
+from tests.sample_data import sample_stats
+
+class TestCharts(unittest.TestCase):
+    def test_render_to_memory(self):
+        """Test that charts render to PNG and SVG bytes without touching the disk"""
+        charts = render_player_charts(sample_stats('LeBron James'))
+        self.assertTrue(charts['counts'].startswith(b'\x89PNG'))
+        self.assertTrue(charts['percentages'].startswith(b'\x89PNG'))
+        svg = render_player_charts(sample_stats('LeBron James'), fmt='svg')
+        self.assertIn(b'<svg', svg['counts'])
+
+    def test_render_to_directory(self):
+        """Test that chart files are written to the requested directory"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_dir = os.path.join(tmpdir, 'charts')
+            charts = render_comparison_charts([sample_stats('LeBron James'), sample_stats('Stephen Curry')], output_dir)
+            self.assertEqual(charts['counts'],
+                             os.path.join(output_dir, 'lebron_james_vs_stephen_curry_counts_comparison.png'))
+            self.assertTrue(os.path.isfile(charts['percentages']))
+
+            # Larger comparisons with the same first player write to different files
+            first = [sample_stats(name, player_id=i) for i, name in enumerate(('LeBron James', 'A', 'B', 'C'))]
+            second = [sample_stats(name, player_id=i) for i, name in enumerate(('LeBron James', 'A', 'B', 'D'), 10)]
+            first_counts = render_comparison_charts(first, output_dir)['counts']
+            self.assertNotEqual(first_counts, render_comparison_charts(second, output_dir)['counts'])
+            self.assertTrue(os.path.basename(first_counts).startswith('lebron_james_and_3_others_'))
+
+    def test_render_many_way_comparison(self):
+        """Test that a comparison of many players renders one grouped chart"""
+        stats_list = [sample_stats(f'Player {i}', points=10.0 + i) for i in range(12)]
+        charts = render_comparison_charts(stats_list)
+        self.assertTrue(charts['counts'].startswith(b'\x89PNG'))
+
+    def test_unsupported_format(self):
+        """Test that unknown image formats are rejected"""
+        with self.assertRaises(ValueError):
+            render_player_charts(sample_stats('LeBron James'), fmt='gif')
+
+    def test_render_many_keeps_order(self):
+        """Test that batch rendering yields one result per player, in order"""
+        stats_list = [sample_stats('Player One'), None, sample_stats('Player Two', points=12.0)]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            results = list(render_many_player_charts(stats_list, tmpdir, max_workers=2))
+            self.assertIsNone(results[1])
+            self.assertEqual(os.path.basename(results[0]['counts']), 'player_one_recent_averages_counts.png')
+            self.assertEqual(os.path.basename(results[2]['counts']), 'player_two_recent_averages_counts.png')
+            self.assertTrue(all(os.path.isfile(r['percentages']) for r in results if r))
+
+if __name__ == '__main__':
+    unittest.main()
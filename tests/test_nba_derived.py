@@ -0,0 +1,75 @@
+import unittest
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from nba_derived import DEFAULT_PACE, DerivedTables, DerivedTablesCache
+from tests.sample_data import season_totals
+
+SEASONS = [season_totals('2021-22'), season_totals('2022-23', 'TOT', pts=2100), season_totals('2022-23', 'CLE', gp=30),
+           season_totals('2022-23', 'MIA', gp=40)]
+CAREER = season_totals(None, None, gp=140, pts=4000)
+
+class TestDerivedTables(unittest.TestCase):
+    def test_rates_and_advanced_metrics(self):
+        """Test the per-game, per-36, per-100 and advanced values of one season"""
+        tables = DerivedTables.from_totals(SEASONS, CAREER)
+        self.assertEqual(tables.season_ids, ['2021-22', '2022-23', 'Career'])
+        row = tables.row('2021-22')
+        self.assertEqual(row['games'], 70)
+        self.assertAlmostEqual(row['per_game']['PTS'], 1900 / 70)
+        self.assertAlmostEqual(row['per_game']['MIN'], 2600 / 70)
+        self.assertAlmostEqual(row['per_36']['REB'], 500 * 36 / 2600)
+        self.assertAlmostEqual(row['per_100']['AST'], 500 * 100 / (2600 * DEFAULT_PACE / 48))
+        self.assertAlmostEqual(row['advanced']['ts_pct'], 1900 / (2 * (1400 + 0.44 * 500)))
+        self.assertAlmostEqual(row['advanced']['usage_pct'], (1400 + 0.44 * 500 + 240) / (2600 * DEFAULT_PACE / 48))
+        game_score = 1900 + 0.4 * 700 - 0.7 * 1400 - 0.4 * 120 + 0.7 * 80 + 0.3 * 420 + 90 + 0.7 * 500 + 0.7 * 50 \
+            - 0.4 * 130 - 240
+        self.assertAlmostEqual(row['advanced']['game_score'], game_score / 70)
+        # A traded player's season is the TOT row
+        self.assertAlmostEqual(tables.row('2022-23')['per_game']['PTS'], 30.0)
+        self.assertEqual(tables.row()['per_game']['PTS'], 4000 / 140)
+        self.assertEqual([season_id for season_id, _ in tables.seasons()], ['2021-22', '2022-23'])
+
+    def test_missing_totals(self):
+        """Test that missing columns and a missing career read back as None"""
+        tables = DerivedTables.from_totals([{'SEASON_ID': '2003-04', 'GP': 79, 'PTS': 1654}], None)
+        self.assertAlmostEqual(tables.row('2003-04')['per_game']['PTS'], 1654 / 79)
+        self.assertIsNone(tables.row('2003-04')['per_36']['PTS'])
+        self.assertIsNone(tables.row()['games'])
+
+class TestDerivedTablesCache(unittest.TestCase):
+    def test_recomputed_only_when_totals_change(self):
+        """Test that unchanged totals hit the cache and changed totals replace the entry"""
+        cache = DerivedTablesCache(max_players=2)
+        first = cache.get(2544, SEASONS, CAREER)
+        self.assertIs(cache.get(2544, SEASONS, CAREER), first)
+        self.assertIs(first.seasons(), first.seasons())
+        self.assertIs(cache.get(2544, [dict(row) for row in SEASONS], dict(CAREER)), first)
+        updated = cache.get(2544, SEASONS + [season_totals('2023-24')], season_totals(None, None, gp=210, pts=5900))
+        self.assertIsNot(updated, first)
+        self.assertEqual(updated.row()['games'], 210)
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+        cache.get(1, SEASONS, CAREER)
+        cache.get(2, SEASONS, CAREER)
+        changed = season_totals(None, None, gp=210, pts=5900)
+        self.assertIsNot(cache.get(2544, SEASONS + [season_totals('2023-24')], changed), updated)
+
+    def test_rows_edited_in_place_miss(self):
+        """Test that editing the same season or career dicts in place recomputes the tables"""
+        cache = DerivedTablesCache()
+        seasons, career = [dict(row) for row in SEASONS], dict(CAREER)
+        first = cache.get(2544, seasons, career)
+        career['GP'] += 10
+        second = cache.get(2544, seasons, career)
+        self.assertIsNot(second, first)
+        self.assertEqual(second.row()['games'], CAREER['GP'] + 10)
+        seasons[0]['PTS'] += 100
+        self.assertIsNot(cache.get(2544, seasons, career), second)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from nba_analytics import GameLogArrays
+from nba_gamelog import GameLog, build_column
+
+HEADERS = ['SEASON_ID', 'Player_ID', 'Game_ID', 'GAME_DATE', 'MATCHUP', 'WL', 'MIN', 'FGM', 'FGA', 'FG_PCT',
+           'FG3M', 'FG3A', 'FG3_PCT', 'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST', 'STL', 'BLK',
+           'TOV', 'PF', 'PTS', 'PLUS_MINUS', 'VIDEO_AVAILABLE']
+MONTHS = ['NOV', 'DEC', 'JAN', 'FEB', 'MAR']
+
+def season_rows(start_year, games=80):
+    """PlayerGameLog rows for one season, newest game first"""
+    rows = []
+    for i in range(games):
+        month = MONTHS[i // 16]
+        year = start_year if month in ('NOV', 'DEC') else start_year + 1
+        fgm, fga = 5 + i % 7, 12 + i % 9
+        rows.append([f'2{start_year}', 2544, f'00{start_year % 100:02d}{i:05d}', f'{month} {i % 16 + 1:02d}, {year}',
+                     f"LAL {'vs.' if i % 2 else '@'} {['GSW', 'BOS', 'DEN', 'PHX'][i % 4]}", 'WL'[i % 2], 30 + i % 9,
+                     fgm, fga, round(fgm / fga, 3), 1, 4, 0.25, 4, 5, 0.8, 1, 6, 7, 8, 1, 1, 3, 2,
+                     2 * fgm + 5, i % 21 - 10, 1])
+    return rows[::-1]
+
+class TestGameLog(unittest.TestCase):
+    def setUp(self):
+        self.rows = season_rows(2023)
+        self.log = GameLog.from_result_set(HEADERS, self.rows)
+
+    def test_rows_read_back_as_python_values(self):
+        """Test that row views hold the original values with their Python types"""
+        for row, view in zip(self.rows, self.log):
+            self.assertEqual(dict(view), dict(zip(HEADERS, row)))
+        last_game = self.log[0]
+        self.assertIsInstance(last_game['PTS'], int)
+        self.assertEqual(last_game['FG_PCT'], self.rows[0][HEADERS.index('FG_PCT')])
+        self.assertEqual(last_game.get('MISSING', 'N/A'), 'N/A')
+        self.assertEqual(json.loads(json.dumps(dict(self.log[-1])))['MATCHUP'], self.rows[-1][4])
+        with self.assertRaises(AttributeError):
+            last_game.extra = 1
+
+    def test_columns_and_slices(self):
+        """Test column access, narrow dtypes and slicing"""
+        np.testing.assert_array_equal(self.log['PTS'], [row[HEADERS.index('PTS')] for row in self.rows])
+        self.assertEqual(self.log['PTS'].dtype, np.int8)
+        self.assertEqual(self.log['GAME_DATE'][0], self.rows[0][3])
+        recent = self.log[:5]
+        self.assertEqual(len(recent), 5)
+        self.assertEqual(recent[0], self.log[0])
+
+    def test_missing_values(self):
+        """Test that None survives in numeric and text columns"""
+        values, categories = build_column([3, None, 5])
+        self.assertEqual(values.dtype, np.float64)
+        log = GameLog.from_games([{'PTS': 3, 'WL': 'W'}, {'PTS': None, 'WL': None}])
+        self.assertEqual([dict(row) for row in log], [{'PTS': 3, 'WL': 'W'}, {'PTS': None, 'WL': None}])
+
+    def test_arrays_match_dict_rows(self):
+        """Test that the float arrays equal those built from one dict per game"""
+        games = [dict(zip(HEADERS, row)) for row in self.rows]
+        expected, actual = GameLogArrays.from_games(games), self.log.arrays()
+        np.testing.assert_array_equal(actual.values, expected.values)
+        np.testing.assert_array_equal(actual.game_dates, expected.game_dates)
+        np.testing.assert_array_equal(actual.season_ids, expected.season_ids)
+
+    def test_concat_seasons(self):
+        """Test that seasons join into one log with shared interned text columns"""
+        logs = [GameLog.from_result_set(HEADERS, season_rows(year)) for year in (2021, 2022, 2023)]
+        career = GameLog.concat(logs)
+        self.assertEqual(len(career), 240)
+        self.assertEqual(dict(career[80]), dict(logs[1][0]))
+        self.assertEqual(sorted(set(career['MATCHUP'])), sorted(set(logs[0]['MATCHUP'])))
+        self.assertEqual(career.arrays().seasons(), ['22021', '22022', '22023'])
+
+    def test_memory_per_game(self):
+        """Test that a multi-season log takes a tenth of the memory of one dict per game"""
+        body = json.dumps({'headers': HEADERS, 'rowSet': [row for year in range(2010, 2024) for row in season_rows(year)]})
+
+        def traced(build):
+            gc.collect()
+            tracemalloc.start()
+            try:
+                result = build(json.loads(body))
+                return tracemalloc.get_traced_memory()[0], result
+            finally:
+                tracemalloc.stop()
+
+        dict_bytes, games = traced(lambda data: [dict(zip(data['headers'], row)) for row in data['rowSet']])
+        log_bytes, log = traced(lambda data: GameLog.from_result_set(data['headers'], data['rowSet']))
+        self.assertEqual(len(log), len(games))
+        self.assertLess(log_bytes * 10, dict_bytes)
+
+if __name__ == '__main__':
+    unittest.main()
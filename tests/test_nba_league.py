@@ -0,0 +1,59 @@
+import unittest
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from nba_league import LeagueIndex, league_index_path
+
+def league_row(player_id, pts, gp=50, fga=100):
+    return {'PLAYER_ID': player_id, 'GP': gp, 'MIN': gp * 30, 'PTS': pts * gp, 'REB': 5 * gp, 'AST': 3 * gp,
+            'STL': gp, 'BLK': gp, 'TOV': 2 * gp, 'FGM': fga // 2, 'FGA': fga, 'FG3M': 0, 'FG3A': 0,
+            'FTM': 10, 'FTA': 20}
+
+class TestLeagueIndex(unittest.TestCase):
+    def setUp(self):
+        rows = [league_row(i, pts) for i, pts in enumerate((10, 20, 20, 30), start=1)]
+        rows.append(league_row(99, 50, gp=3))
+        self.index = LeagueIndex.from_rows('2023-24', rows)
+
+    def test_players_below_min_games_are_excluded(self):
+        """Test that small samples do not enter the distributions"""
+        self.assertEqual(len(self.index), 4)
+        self.assertNotIn(99, self.index)
+        np.testing.assert_array_equal(self.index.sorted['points'], [10, 20, 20, 30])
+
+    def test_percentile_and_zscore(self):
+        """Test binary-search percentiles with ties, scalar and vectorized, and z-scores"""
+        self.assertEqual(self.index.percentile('points', 20), 50.0)
+        self.assertEqual(self.index.percentile('points', 40), 100.0)
+        np.testing.assert_allclose(self.index.percentile('points', np.array([5, 10, 30])), [0, 12.5, 87.5])
+        self.assertAlmostEqual(self.index.zscore('points', 30), 10 / np.std([10, 20, 20, 30]))
+        # No 3-point attempts anywhere: there is no distribution to rank against
+        self.assertIsNone(self.index.percentile('fg3_pct', 0.4))
+
+    def test_player_ranks(self):
+        """Test the per-player view of values, percentiles and z-scores"""
+        ranks = self.index.player(4)
+        self.assertEqual(ranks['points']['value'], 30)
+        self.assertEqual(ranks['points']['percentile'], 87.5)
+        self.assertIsNone(ranks['fg3_pct']['value'])
+        self.assertIsNone(self.index.player(99))
+
+    def test_save_and_load(self):
+        """Test that a saved index loads with the same distributions"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = league_index_path('2023-24', tmpdir)
+            self.index.save(path)
+            loaded = LeagueIndex.load(path)
+        self.assertEqual(loaded.season, '2023-24')
+        self.assertEqual(loaded.percentile('points', 20), 50.0)
+        self.assertEqual(loaded.player(4)['points']['value'], 30)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import os
+import sys
+import threading
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from nba_metrics import Metrics
+
+class TestMetrics(unittest.TestCase):
+    def test_counters_by_label(self):
+        """Test that counters add up per label set and in total"""
+        metrics = Metrics()
+        metrics.increment('upstream_requests_total', endpoint='playergamelog', status='200')
+        metrics.increment('upstream_requests_total', endpoint='playergamelog', status='429')
+        metrics.increment('upstream_requests_total', 3, endpoint='commonplayerinfo', status='200')
+        self.assertEqual(metrics.counter('upstream_requests_total'), 5)
+        self.assertEqual(metrics.counter('upstream_requests_total', status='200'), 4)
+        self.assertEqual(metrics.counter('upstream_requests_total', endpoint='playergamelog'), 2)
+        self.assertEqual(metrics.counter('cache_requests_total'), 0)
+
+    def test_concurrent_increments(self):
+        """Test that increments from many threads are not lost"""
+        metrics = Metrics()
+        def work():
+            for _ in range(1000):
+                metrics.increment('cache_requests_total', result='hit')
+                metrics.observe('fetch.playergamelog', 0.001)
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(metrics.counter('cache_requests_total'), 8000)
+        self.assertEqual(metrics.stages()['fetch.playergamelog']['calls'], 8000)
+
+    def test_render_prometheus(self):
+        """Test the Prometheus text exposition of counters and stage timings"""
+        metrics = Metrics()
+        metrics.increment('upstream_response_bytes_total', 1024, endpoint='playergamelog')
+        metrics.increment('service_requests_total', status=200)
+        metrics.observe('display.format', 0.25)
+        metrics.observe('display.format', 0.5)
+        lines = metrics.render_prometheus().splitlines()
+        self.assertIn('# TYPE nba_analyzer_upstream_response_bytes_total counter', lines)
+        self.assertIn('nba_analyzer_upstream_response_bytes_total{endpoint="playergamelog"} 1024', lines)
+        self.assertIn('nba_analyzer_service_requests_total{status="200"} 1', lines)
+        self.assertIn('nba_analyzer_stage_calls_total{stage="display.format"} 2', lines)
+        self.assertIn('nba_analyzer_stage_seconds_total{stage="display.format"} 0.75', lines)
+        self.assertEqual(Metrics().render_prometheus(), '')
+
+    def test_stage_report(self):
+        """Test that the stage breakdown lists the slowest stage first"""
+        metrics = Metrics()
+        metrics.observe('display.write', 0.001)
+        metrics.observe('fetch.playercareerstats', 0.3)
+        metrics.observe('fetch.playercareerstats', 0.1)
+        rows = [line.split() for line in metrics.stage_report().splitlines()[1:]]
+        self.assertEqual([row[0] for row in rows], ['fetch.playercareerstats', 'display.write'])
+        self.assertEqual(rows[0][1:], ['2', '0.400', '200.00', '300.00'])
+
+if __name__ == '__main__':
+    unittest.main()
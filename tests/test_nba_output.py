@@ -0,0 +1,130 @@
+import unittest
+import csv
+import io
+import json
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from nba_league import LeagueIndex
+from nba_output import (CSV_COLUMNS, comparison_report, player_report, render_comparison_text, render_text,
+                        write_comparison, write_reports)
+from tests.sample_data import sample_stats
+
+class TestOutput(unittest.TestCase):
+    def test_player_report_sections(self):
+        """Test that the report holds per-game career averages and derived percentages"""
+        report = player_report(sample_stats('LeBron James'))
+        self.assertEqual(report['player']['player_id'], 2544)
+        self.assertEqual(report['last_game']['points'], 30)
+        self.assertEqual(report['career_averages']['points'], 25.0)
+        self.assertAlmostEqual(report['career_averages']['efg_pct'], 0.5277, places=3)
+        self.assertIsNone(player_report(sample_stats('LeBron James', career=False))['career_totals'])
+
+    def test_report_follows_totals_edited_in_place(self):
+        """Test that a second report of the same stats dict sees totals edited in between"""
+        stats = sample_stats('LeBron James')
+        stats['season_by_season'] = [{'SEASON_ID': '2003-04', 'GP': 79, 'MIN': 3122, 'PTS': 1654}]
+        player_report(stats)
+        stats['career_totals']['PTS'] = 5000
+        report = player_report(stats)
+        self.assertEqual(report['career_totals']['points'], 5000)
+        self.assertEqual(report['career_averages']['points'], 50.0)
+
+    def test_season_tables_and_advanced(self):
+        """Test that season rows become a per-game table and the career gets advanced rates"""
+        stats = sample_stats('LeBron James')
+        stats['season_by_season'] = [{'SEASON_ID': '2003-04', 'GP': 79, 'MIN': 3122, 'PTS': 1654, 'REB': 432,
+                                      'AST': 465, 'FGA': 1492, 'FTA': 460, 'TOV': 273}]
+        report = player_report(stats)
+        self.assertEqual(report['seasons'][0]['season'], '2003-04')
+        self.assertAlmostEqual(report['seasons'][0]['points'], 1654 / 79)
+        self.assertAlmostEqual(report['career_advanced']['points_per_36'], 25.0)
+        self.assertIn('Season by Season (Per Game):', render_text(report))
+
+    def test_render_text(self):
+        """Test that the text renderer prints the familiar tables"""
+        text = render_text(player_report(sample_stats('LeBron James')))
+        self.assertIn('Name: LeBron James\n', text)
+        self.assertIn('3P%: N/A\n', text)
+        self.assertIn('FG: 12/20 (60.0%)\n', text)
+        self.assertIn('Total Points: 2500\n', text)
+
+    def test_render_comparison_text(self):
+        """Test that comparison columns line up for any number of players"""
+        stats_list = [sample_stats(name) for name in ('LeBron James', 'Stephen Curry', 'Nikola Jokic')]
+        lines = render_comparison_text(comparison_report(stats_list)).splitlines()
+        self.assertIn('=' * 95, lines)
+        points = next(line for line in lines if line.startswith('Points'))
+        self.assertEqual(points, f"{'Points':<20} " + ' '.join(f"{30.0:>6.1f}{' ':>19}" for _ in range(3)))
+        # A player without career totals gets N/A cells instead of hiding the table
+        stats_list[1] = sample_stats('Stephen Curry', career=False)
+        text = render_comparison_text(comparison_report(stats_list))
+        self.assertIn(f"{'Total Points':<20} {2500:>6}{' ':>19} {'N/A':>6}{' ':>19} {2500:>6}{' ':>19}", text)
+
+    def test_comparison_report(self):
+        """Test the column-wise comparison model and its per-player CSV rows"""
+        stats_list = [sample_stats('LeBron James', 30.0), sample_stats('Stephen Curry', 25.0, career=False)]
+        report = comparison_report(stats_list)
+        self.assertEqual(report['recent_averages']['points'], [30.0, 25.0])
+        self.assertEqual(report['career']['per_36']['points'], [25.0, None])
+        self.assertEqual(report['career']['totals']['points'], [2500, None])
+        self.assertEqual(report['career']['percentiles']['points'], [100.0, None])
+        json.dumps(report)
+
+        out = io.StringIO()
+        write_comparison(report, out, 'csv')
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        self.assertEqual([row['player.name'] for row in rows], ['LeBron James', 'Stephen Curry'])
+        self.assertEqual(rows[0]['career_per_game.points'], '25.0')
+
+    def test_league_ranks(self):
+        """Test that a league index adds percentile sections to reports and comparisons"""
+        league = LeagueIndex('2023-24', [2544, 1], [[30.0] * 12, [10.0] * 12])
+        report = player_report(sample_stats('LeBron James'), league)
+        self.assertEqual(report['league']['points']['percentile'], 75.0)
+        self.assertIn('League Ranks (2023-24):', render_text(report))
+        self.assertIsNone(player_report(sample_stats('LeBron James'))['league'])
+
+        comparison = comparison_report([sample_stats('LeBron James'), sample_stats('Stephen Curry')], league)
+        self.assertEqual(comparison['league']['percentiles']['points'], [75.0, 75.0])
+        self.assertIn('League Percentiles (2023-24):', render_comparison_text(comparison))
+
+    def test_write_ndjson_streams(self):
+        """Test that NDJSON is written one record per write as the input is consumed"""
+        writes = []
+        class Recorder:
+            def write(self, text):
+                writes.append(text)
+        consumed = []
+        def reports():
+            for name in ('LeBron James', 'Stephen Curry'):
+                consumed.append(name)
+                yield player_report(sample_stats(name))
+                self.assertEqual(len(writes), len(consumed))
+        self.assertEqual(write_reports(reports(), Recorder(), 'ndjson'), 2)
+        self.assertEqual([json.loads(line)['player']['name'] for line in writes], ['LeBron James', 'Stephen Curry'])
+
+    def test_write_json_and_csv(self):
+        """Test the JSON array and flat CSV serializers"""
+        reports = [player_report(sample_stats('LeBron James')), player_report(sample_stats('Stephen Curry', 25.5, False))]
+        out = io.StringIO()
+        write_reports(reports, out, 'json')
+        self.assertEqual(json.loads(out.getvalue())[1]['recent_averages']['points'], 25.5)
+
+        out = io.StringIO()
+        write_reports(reports, out, 'csv')
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        self.assertEqual(list(rows[0]), CSV_COLUMNS)
+        self.assertEqual(rows[1]['player.name'], 'Stephen Curry')
+        self.assertEqual(rows[1]['recent_averages.fg3_pct'], '')
+        self.assertEqual(rows[1]['career_totals.points'], '')
+
+        with self.assertRaises(ValueError):
+            write_reports(reports, io.StringIO(), 'xml')
+
+if __name__ == '__main__':
+    unittest.main()
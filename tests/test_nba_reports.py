@@ -0,0 +1,75 @@
+import unittest
+import os
+import sys
+import tempfile
+import threading
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from nba_reports import build_report
+from tests.sample_data import sample_stats
+
+PLAYER_IDS = [11, 12, 13, 14, 15]
+
+class TestBuildReport(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'report.html')
+        self.fetched = []
+        self.lock = threading.Lock()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def fetch(self, failing=()):
+        def fetch(player_id):
+            with self.lock:
+                self.fetched.append(player_id)
+            if player_id in failing:
+                raise ConnectionError('Network Error')
+            return sample_stats(f'Player {player_id}', points=float(player_id))
+        return fetch
+
+    def read_report(self):
+        with open(self.path, encoding='utf-8') as f:
+            return f.read()
+
+    def test_report_has_every_player_in_order(self):
+        """Test that one HTML file holds each player's tables and embedded charts, in roster order"""
+        progress = []
+        result = build_report(PLAYER_IDS, self.path, self.fetch(), title='Test <Team>', render_workers=1,
+                              fetch_workers=3, queue_size=2, progress=lambda *player: progress.append(player))
+        self.assertEqual(result, {'players': 5, 'rendered': 5, 'resumed': 0, 'failed': {}})
+        page = self.read_report()
+        self.assertIn('<title>Test &lt;Team&gt;</title>', page)
+        positions = [page.index(f'<section id="player-{player_id}">') for player_id in PLAYER_IDS]
+        self.assertEqual(positions, sorted(positions))
+        self.assertEqual(page.count('src="data:image/svg+xml;base64,'), 10)
+        self.assertIn('Career Averages', page)
+        self.assertEqual(sorted(player_id for player_id, _ in progress), PLAYER_IDS)
+        self.assertFalse(os.path.exists(self.path + '.parts'))
+
+    def test_resume_from_checkpoint(self):
+        """Test that a rerun after failures only fetches the missing players"""
+        result = build_report(PLAYER_IDS, self.path, self.fetch(failing={13, 15}), render_workers=1)
+        self.assertEqual(sorted(result['failed']), [13, 15])
+        self.assertTrue(os.path.exists(self.path + '.parts'))
+        self.assertNotIn('player-13', self.read_report())
+
+        self.fetched.clear()
+        result = build_report(PLAYER_IDS, self.path, self.fetch(), render_workers=1)
+        self.assertEqual(sorted(self.fetched), [13, 15])
+        self.assertEqual((result['resumed'], result['rendered'], result['failed']), (3, 2, {}))
+        self.assertEqual(self.read_report().count('<section id="player-'), 5)
+        self.assertFalse(os.path.exists(self.path + '.parts'))
+
+        # A different roster does not reuse another run's checkpoint
+        build_report(PLAYER_IDS[:2], self.path, self.fetch(failing={12}), render_workers=1)
+        self.fetched.clear()
+        build_report(PLAYER_IDS[:3], self.path, self.fetch(), render_workers=1)
+        self.assertEqual(sorted(self.fetched), PLAYER_IDS[:3])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from nba_search import PlayerIndex, fold_name
+
+def player(player_id, full_name, is_active=True):
+    first_name, _, last_name = full_name.partition(' ')
+    return {'id': player_id, 'full_name': full_name, 'first_name': first_name,
+            'last_name': last_name, 'is_active': is_active}
+
+class TestPlayerIndex(unittest.TestCase):
+    def setUp(self):
+        """Set up an index over a handful of players"""
+        self.index = PlayerIndex([
+            player(1, 'LeBron James'),
+            player(2, 'James Harden'),
+            player(3, 'Nikola Jokić'),
+            player(4, 'Stephen Curry'),
+            player(5, 'Eddie Jones', is_active=False),
+            player(6, 'James Jones', is_active=False),
+            player(7, "Shaquille O'Neal", is_active=False),
+        ])
+
+    def names(self, query, **kwargs):
+        return [p['full_name'] for p in self.index.search(query, **kwargs)]
+
+    def test_fold_name(self):
+        """Test that names are accent-folded, lowercased and stripped of punctuation"""
+        self.assertEqual(fold_name('  Nikola  Jokić '), 'nikola jokic')
+        self.assertEqual(fold_name("Shaquille O'Neal"), 'shaquille oneal')
+
+    def test_accent_insensitive(self):
+        """Test that unaccented queries find accented names"""
+        self.assertEqual(self.names('Jokic'), ['Nikola Jokić'])
+
+    def test_ranking(self):
+        """Test that active players come first, then names starting with the query"""
+        self.assertEqual(self.names('James'), ['James Harden', 'LeBron James', 'James Jones'])
+        self.assertEqual(self.names('Jones'), ['Eddie Jones', 'James Jones'])
+
+    def test_whole_word_ranks_above_prefix(self):
+        """Test that a query matching a whole name word beats longer words it prefixes"""
+        index = PlayerIndex([player(1, 'Jay Huff'), player(2, 'Ja Morant'), player(3, 'Jaden Ivey')])
+        self.assertEqual([p['full_name'] for p in index.search('ja')], ['Ja Morant', 'Jay Huff', 'Jaden Ivey'])
+
+    def test_active_players_first(self):
+        """Test that an active whole-word match beats inactive names starting with the query"""
+        index = PlayerIndex([player(1, 'James Lang', is_active=False), player(2, 'James Davis', is_active=False),
+                             player(3, 'LeBron James')])
+        self.assertEqual([p['full_name'] for p in index.search('james', limit=2)], ['LeBron James', 'James Lang'])
+
+    def test_word_prefixes(self):
+        """Test that every query word may be a prefix of a name word"""
+        self.assertEqual(self.names('steph cur'), ['Stephen Curry'])
+        self.assertEqual(self.names('oneal'), ["Shaquille O'Neal"])
+
+    def test_substring(self):
+        """Test that substrings inside a name still match"""
+        self.assertEqual(self.names('arde'), ['James Harden'])
+
+    def test_fuzzy(self):
+        """Test that typos fall back to fuzzy matching"""
+        self.assertEqual(self.names('stephen curyy'), ['Stephen Curry'])
+        self.assertEqual(self.names('lebron jmaes'), ['LeBron James'])
+        self.assertEqual(self.names('zzzzzz'), [])
+
+    def test_limit(self):
+        """Test that the result count can be capped"""
+        self.assertEqual(self.names('James', limit=1), ['James Harden'])
+
+if __name__ == '__main__':
+    unittest.main()
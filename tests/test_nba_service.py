@@ -0,0 +1,138 @@
+import unittest
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from unittest.mock import patch
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+import nba_analyzer
+import nba_transport
+from nba_metrics import metrics
+from nba_search import PlayerIndex
+from nba_service import StatsService
+from tests.stub_stats_server import StubStatsServer, result_sets
+
+def player_info(params):
+    player_id = int(params['PlayerID'])
+    return result_sets(CommonPlayerInfo=[{
+        'PERSON_ID': player_id, 'FIRST_NAME': 'Player', 'LAST_NAME': str(player_id), 'TEAM_NAME': 'Lakers',
+        'POSITION': 'Forward', 'HEIGHT': '6-9', 'WEIGHT': '250', 'COUNTRY': 'USA', 'SEASON_EXP': 21,
+        'DRAFT_YEAR': '2003', 'JERSEY': '23',
+    }])
+
+GAME_LOG = result_sets(PlayerGameLog=[{
+    'SEASON_ID': '22023', 'Player_ID': 2544, 'Game_ID': '001', 'GAME_DATE': 'DEC 25, 2023', 'MIN': 36,
+    'PTS': 30, 'REB': 10, 'AST': 8, 'STL': 2, 'BLK': 1, 'TOV': 3, 'FGM': 12, 'FGA': 20, 'FG_PCT': 0.6,
+    'FG3M': 2, 'FG3A': 5, 'FG3_PCT': 0.4, 'FTM': 4, 'FTA': 5, 'FT_PCT': 0.8,
+}])
+
+CAREER = result_sets(
+    SeasonTotalsRegularSeason=[{'PLAYER_ID': 2544, 'SEASON_ID': '2023-24', 'GP': 71, 'PTS': 1822}],
+    CareerTotalsRegularSeason=[{
+        'PLAYER_ID': 2544, 'GP': 100, 'MIN': 3600, 'PTS': 2500, 'REB': 700, 'AST': 600, 'STL': 100, 'BLK': 50,
+        'TOV': 300, 'FGM': 900, 'FGA': 1800, 'FG_PCT': 0.5, 'FG3M': 100, 'FG3A': 300, 'FG3_PCT': 0.333,
+        'FTM': 600, 'FTA': 800, 'FT_PCT': 0.75,
+    }],
+)
+
+async def get(port, path):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n'.encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(body)
+
+class TestStatsService(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.stub = StubStatsServer({
+            'commonplayerinfo': player_info, 'playergamelog': GAME_LOG, 'playercareerstats': CAREER,
+        }, latency=0.2)
+        self.stub.__enter__()
+        nba_analyzer.configure_cache(enabled=False)
+        nba_transport.configure_transport(requests_per_second=1000, burst=1000, base_url=self.stub.base_url)
+        self.league_dir = tempfile.TemporaryDirectory()
+        self.env = patch.dict(os.environ, {'NBA_ANALYZER_LEAGUE_DIR': self.league_dir.name})
+        self.env.start()
+        metrics.reset()
+        self.service = StatsService(request_timeout=5)
+        self.server = await self.service.start(port=0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.service.close()
+        self.env.stop()
+        self.league_dir.cleanup()
+        nba_transport.configure_transport()
+        self.stub.__exit__(None, None, None)
+
+    async def test_concurrent_requests_are_coalesced(self):
+        """Test that 50 simultaneous requests for one player make one upstream fetch per endpoint"""
+        responses = await asyncio.gather(*(get(self.port, '/players/2544/stats') for _ in range(50)))
+        self.assertEqual({status for status, _ in responses}, {200})
+        self.assertEqual(responses[0][1]['player']['name'], 'Player 2544')
+        self.assertEqual(responses[0][1]['career_averages']['points'], 25.0)
+        self.assertEqual(dict(self.stub.hits), {'commonplayerinfo': 1, 'playergamelog': 1, 'playercareerstats': 1})
+        self.assertEqual(self.service.coalesced, 49 * 2)
+
+    async def test_compare(self):
+        """Test the comparison endpoint and its validation"""
+        status, body = await get(self.port, '/compare?ids=2544,201939,203999')
+        self.assertEqual(status, 200)
+        self.assertEqual([p['name'] for p in body['players']], ['Player 2544', 'Player 201939', 'Player 203999'])
+        self.assertEqual(self.stub.hits['commonplayerinfo'], 3)
+        status, body = await get(self.port, '/compare?ids=2544')
+        self.assertEqual(status, 400)
+
+    async def test_search_and_errors(self):
+        """Test search, unknown routes and bad parameters"""
+        index = PlayerIndex([{'id': 201939, 'full_name': 'Stephen Curry', 'is_active': True}])
+        with patch('nba_analyzer.get_player_index', return_value=index):
+            status, body = await get(self.port, '/search?q=curry')
+        self.assertEqual((status, [p['id'] for p in body['players']]), (200, [201939]))
+        self.assertEqual((await get(self.port, '/players/abc/stats'))[0], 400)
+        self.assertEqual((await get(self.port, '/nothing'))[0], 404)
+
+    async def test_request_timeout(self):
+        """Test that a slow upstream answers 504 without failing later requests"""
+        self.service.request_timeout = 0.05
+        status, _ = await get(self.port, '/players/2544/stats')
+        self.assertEqual(status, 504)
+        self.service.request_timeout = 5
+        status, _ = await get(self.port, '/players/2544/stats')
+        self.assertEqual(status, 200)
+
+    async def test_metrics(self):
+        """Test that /metrics exports upstream and service counters as Prometheus text"""
+        await get(self.port, '/players/2544/stats')
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        writer.write(b'GET /metrics HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n')
+        await writer.drain()
+        head, _, body = (await reader.read()).partition(b'\r\n\r\n')
+        writer.close()
+        self.assertIn(b'Content-Type: text/plain; version=0.0.4', head)
+        lines = body.decode().splitlines()
+        self.assertIn('nba_analyzer_upstream_requests_total{endpoint="playergamelog",status="200"} 1', lines)
+        self.assertIn('nba_analyzer_service_requests_total{status="200"} 1', lines)
+
+    async def test_keep_alive(self):
+        """Test that one connection serves several requests"""
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        for _ in range(2):
+            writer.write(b'GET /health HTTP/1.1\r\nHost: localhost\r\n\r\n')
+            await writer.drain()
+            head = await reader.readuntil(b'\r\n\r\n')
+            length = int(next(line.split(b':')[1] for line in head.split(b'\r\n') if line.startswith(b'Content-Length')))
+            self.assertEqual(json.loads(await reader.readexactly(length))['status'], 'ok')
+        writer.close()
+
+if __name__ == '__main__':
+    unittest.main()
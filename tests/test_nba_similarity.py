@@ -0,0 +1,95 @@
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+import nba_analyzer
+from nba_analytics import COMPARISON_TOTAL_COLUMNS
+from nba_similarity import SimilarityIndex, similarity_index_path, sum_season_totals
+
+def season_row(player_id, pts, reb, ast, gp=60, minutes=30, **extra):
+    """LeagueDashPlayerStats-style totals row with per-game averages pts/reb/ast"""
+    return dict({'PLAYER_ID': player_id, 'PLAYER_NAME': f'Player {player_id}', 'GP': gp, 'MIN': minutes * gp,
+                 'PTS': pts * gp, 'REB': reb * gp, 'AST': ast * gp, 'STL': gp, 'BLK': gp // 2, 'TOV': 2 * gp,
+                 'FGM': 8 * gp, 'FGA': 17 * gp, 'FG3M': 2 * gp, 'FG3A': 5 * gp, 'FTM': 4 * gp, 'FTA': 5 * gp},
+                **extra)
+
+ROWS = [
+    season_row(1, 28, 7, 7), season_row(1, 26, 8, 8),     # scorers
+    season_row(2, 27, 7, 8),
+    season_row(3, 10, 12, 2), season_row(4, 9, 13, 1),     # rebounders
+    season_row(5, 8, 3, 9), season_row(6, 20, 5, 5, gp=10),
+]
+
+class TestSimilarityIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = SimilarityIndex.from_season_totals(ROWS, seasons=('2022-23', '2023-24'))
+
+    def test_season_totals_are_summed_per_player(self):
+        """Test that seasons add up to career totals and traded players count their TOT row only"""
+        player_ids, _, totals = sum_season_totals(ROWS)
+        self.assertEqual(player_ids[:2], [1, 2])
+        self.assertEqual(totals[0, 0], 120)
+        traded = [season_row(7, 20, 5, 5, SEASON_ID='2021-22', TEAM_ABBREVIATION=team, gp=gp)
+                  for team, gp in (('TOT', 60), ('LAL', 20), ('MIA', 40))]
+        _, _, totals = sum_season_totals(traded + [season_row(7, 20, 5, 5, SEASON_ID='2022-23')])
+        self.assertEqual(totals[0, 0], 120)
+        # Player 6 is below the minimum games
+        self.assertEqual(len(self.index), 5)
+        self.assertNotIn(6, self.index)
+
+    def test_nearest_players(self):
+        """Test that cosine and Euclidean queries rank the closest careers first, never the player"""
+        self.assertEqual(self.index.similar(1, limit=1)[0][0], 2)
+        self.assertEqual(self.index.similar(3, limit=1, metric='euclidean')[0][:2], (4, 'Player 4'))
+        self.assertEqual(len(self.index.similar(1, limit=10)), 4)
+        cosine = [score for _, _, score in self.index.similar(1, limit=4)]
+        self.assertEqual(cosine, sorted(cosine, reverse=True))
+        with self.assertRaises(KeyError):
+            self.index.similar(99)
+        with self.assertRaises(ValueError):
+            self.index.similar(1, metric='manhattan')
+
+    def test_query_by_totals(self):
+        """Test that a player outside the index is placed by their career totals"""
+        _, _, totals = sum_season_totals([season_row(99, 10, 12, 2)])
+        totals = dict(zip(COMPARISON_TOTAL_COLUMNS, totals[0]))
+        self.assertEqual(self.index.similar(99, limit=1, totals=totals)[0][0], 3)
+
+    def test_save_and_load(self):
+        """Test that a saved index answers queries the same way"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = similarity_index_path(tmpdir)
+            self.index.save(path)
+            loaded = SimilarityIndex.load(path)
+        self.assertEqual(loaded.seasons, ('2022-23', '2023-24'))
+        self.assertEqual(loaded.similar(1, limit=4), self.index.similar(1, limit=4))
+        np.testing.assert_array_equal(loaded.vectors, self.index.vectors)
+
+    def test_build_from_league_totals(self):
+        """Test that the analyzer builds the index with one league request per season and saves it"""
+        seasons = []
+        def fetch(endpoint_class, **params):
+            seasons.append(params['season'])
+            rows = ROWS[:3] if params['season'] == '2022-23' else ROWS[3:]
+            return {'LeagueDashPlayerStats': rows}
+        with tempfile.TemporaryDirectory() as tmpdir, \
+                patch.dict(os.environ, {'NBA_ANALYZER_LEAGUE_DIR': tmpdir}), \
+                patch('nba_analyzer.fetch_endpoint', side_effect=fetch), \
+                patch('nba_analyzer._similarity_index', None):
+            index = nba_analyzer.build_similarity_index('2022-23', '2023-24')
+            self.assertEqual(sorted(seasons), ['2022-23', '2023-24'])
+            self.assertTrue(os.path.exists(similarity_index_path()))
+            self.assertEqual(len(index), 5)
+            found = nba_analyzer.find_similar_players(3, limit=1, metric='euclidean')
+        self.assertEqual(found, [{'player_id': 4, 'name': 'Player 4', 'score': found[0]['score']}])
+
+if __name__ == '__main__':
+    unittest.main()
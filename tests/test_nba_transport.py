@@ -0,0 +1,111 @@
+import unittest
+from unittest.mock import Mock, patch
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+import nba_transport
+from nba_transport import LatencyStats, TokenBucket, backoff_delay, request_endpoint, transport_stats
+from nba_api.stats.endpoints import commonplayerinfo
+from tests.stub_stats_server import StubStatsServer, result_sets
+
+def make_response(status_code, text='{}', headers=None):
+    response = Mock(status_code=status_code, text=text, content=text.encode())
+    response.headers = headers or {}
+    return response
+
+class TestTokenBucket(unittest.TestCase):
+    def test_acquire_waits_when_empty(self):
+        """Test that the bucket sleeps for the refill time once the burst is spent"""
+        clock = [0.0]
+        sleeps = []
+        def sleep(seconds):
+            sleeps.append(seconds)
+            clock[0] += seconds
+        bucket = TokenBucket(rate=2.0, capacity=2, clock=lambda: clock[0], sleep=sleep)
+        bucket.acquire()
+        bucket.acquire()
+        self.assertEqual(sleeps, [])
+        bucket.acquire()
+        self.assertEqual(sleeps, [0.5])
+
+class TestRequestEndpoint(unittest.TestCase):
+    def setUp(self):
+        nba_transport.configure_transport(requests_per_second=1000, burst=1000, max_retries=2)
+
+    def tearDown(self):
+        nba_transport.configure_transport()
+
+    def test_backoff_delay_is_bounded(self):
+        """Test that jittered backoff stays within the exponential envelope"""
+        for attempt in range(10):
+            self.assertLessEqual(backoff_delay(attempt, base=1.0, cap=30.0), min(30.0, 2 ** attempt))
+
+    @patch('nba_transport.time.sleep')
+    def test_retries_throttled_requests(self, mock_sleep):
+        """Test that HTTP 429 is retried, honouring Retry-After"""
+        session = Mock()
+        session.get.side_effect = [make_response(429, headers={'Retry-After': '5'}), make_response(200, '{"ok": 1}')]
+        with patch('nba_transport.NBAStatsHTTP.get_session', return_value=session):
+            body = request_endpoint(commonplayerinfo.CommonPlayerInfo, player_id=2544)
+        self.assertEqual(body, '{"ok": 1}')
+        self.assertEqual(session.get.call_count, 2)
+        self.assertGreaterEqual(mock_sleep.call_args[0][0], 5)
+        self.assertIn(('PlayerID', 2544), session.get.call_args.kwargs['params'])
+
+    @patch('nba_transport.time.sleep')
+    def test_gives_up_after_max_retries(self, mock_sleep):
+        """Test that timeouts are retried up to the configured limit"""
+        session = Mock()
+        session.get.side_effect = requests.Timeout('timed out')
+        with patch('nba_transport.NBAStatsHTTP.get_session', return_value=session):
+            with self.assertRaises(requests.Timeout):
+                request_endpoint(commonplayerinfo.CommonPlayerInfo, player_id=2544)
+        self.assertEqual(session.get.call_count, 3)
+
+    def test_client_errors_are_not_retried(self):
+        """Test that a 404 fails immediately"""
+        session = Mock()
+        session.get.return_value = make_response(404)
+        with patch('nba_transport.NBAStatsHTTP.get_session', return_value=session):
+            with self.assertRaises(requests.HTTPError):
+                request_endpoint(commonplayerinfo.CommonPlayerInfo, player_id=2544)
+        self.assertEqual(session.get.call_count, 1)
+
+class TestSharedSession(unittest.TestCase):
+    def tearDown(self):
+        nba_transport.configure_transport()
+
+    def test_latency_percentiles(self):
+        """Test per-endpoint counts and nearest-rank percentiles"""
+        stats = LatencyStats()
+        for ms in range(1, 101):
+            stats.record('playergamelog', ms / 1000, error=ms > 98)
+        summary = stats.summary()['playergamelog']
+        self.assertEqual((summary['requests'], summary['errors']), (100, 2))
+        self.assertEqual((summary['p50'], summary['p95'], summary['max']), (0.05, 0.095, 0.1))
+
+    def test_bulk_requests_reuse_connections(self):
+        """Test that concurrent fetches share a few keep-alive connections and negotiate gzip"""
+        body = result_sets(CommonPlayerInfo=[{'PERSON_ID': 2544}])
+        with StubStatsServer({'commonplayerinfo': body}, latency=0.01) as stub:
+            nba_transport.configure_transport(requests_per_second=1000, burst=1000, max_concurrent_requests=4,
+                                              base_url=stub.base_url)
+            nba_transport.latency.reset()
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                bodies = list(executor.map(lambda i: request_endpoint(commonplayerinfo.CommonPlayerInfo, player_id=i),
+                                           range(40)))
+        self.assertEqual(bodies[0], body)
+        stats = transport_stats()
+        self.assertLessEqual(stats['connections_opened'], 4)
+        self.assertEqual(stats['endpoints']['commonplayerinfo']['requests'], 40)
+        self.assertEqual(stub.encodings['gzip'], 40)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from nba_warehouse import StatsWarehouse
+from tests.sample_data import game
+
+class TestStatsWarehouse(unittest.TestCase):
+    def setUp(self):
+        """Set up a throwaway warehouse"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.warehouse = StatsWarehouse(os.path.join(self.tmpdir.name, 'warehouse.sqlite3'))
+
+    def tearDown(self):
+        self.warehouse.close()
+        self.tmpdir.cleanup()
+
+    def test_games_round_trip(self):
+        """Test that stored games come back newest first and as columnar arrays"""
+        self.warehouse.store_games([game('JAN 02, 2024', 20, '001'), game('JAN 05, 2024', 30, '002')])
+        # Re-storing a game updates it instead of duplicating it
+        self.warehouse.store_games([game('JAN 05, 2024', 31, '002')])
+
+        games = self.warehouse.games(2544)
+        self.assertEqual([g['Game_ID'] for g in games], ['002', '001'])
+        self.assertEqual(games[0]['PTS'], 31)
+        self.assertEqual(self.warehouse.latest_game_date(2544), np.datetime64('2024-01-05'))
+        self.assertIsNone(self.warehouse.latest_game_date(2544, season_id='22022'))
+
+        log = self.warehouse.game_log_arrays(2544)
+        np.testing.assert_array_equal(log.column('PTS'), [20, 31])
+        self.assertEqual(log.seasons(), ['22023'])
+
+    def test_career_is_replaced(self):
+        """Test that storing a career replaces the previous season rows"""
+        self.warehouse.store_career(2544, [{'PLAYER_ID': 2544, 'SEASON_ID': '2003-04', 'GP': 79}], {'PLAYER_ID': 2544, 'GP': 79})
+        self.warehouse.store_career(2544, [{'PLAYER_ID': 2544, 'SEASON_ID': '2003-04', 'GP': 79},
+                                           {'PLAYER_ID': 2544, 'SEASON_ID': '2004-05', 'GP': 80}],
+                                    {'PLAYER_ID': 2544, 'GP': 159})
+        self.assertEqual([row['SEASON_ID'] for row in self.warehouse.season_totals(2544)], ['2003-04', '2004-05'])
+        self.assertEqual(self.warehouse.career_totals(2544)['GP'], 159)
+
+    def test_player_info(self):
+        """Test that player info is stored per player"""
+        self.assertIsNone(self.warehouse.player_info(2544))
+        self.warehouse.store_player_info(2544, {'FIRST_NAME': 'LeBron'})
+        self.assertEqual(self.warehouse.player_info(2544), {'FIRST_NAME': 'LeBron'})
+        self.assertEqual(self.warehouse.player_ids(), [2544])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+import io
+import json
+import os
+import sys
+from contextlib import redirect_stderr, redirect_stdout
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+import nba_transport
+from nba_gamelog import GameLog
+from nba_metrics import metrics
+from nba_watch import TOTAL_COLUMNS, GameLogSource, LiveSource, PlayerWatch, parse_duration, watch
+from tests.stub_stats_server import StubStatsServer
+from tests.test_nba_gamelog import HEADERS, season_rows
+
+CAREER = {'GP': 1000, 'MIN': 38000.0, 'PTS': 27000, 'REB': 7500, 'AST': 7300, 'STL': 1500, 'BLK': 700}
+
+def box_score(status, points, minutes='PT30M00.00S', played='1', clock='PT05M32.00S'):
+    player = {'personId': 2544, 'played': played,
+              'statistics': {'points': points, 'reboundsTotal': 8, 'assists': 9, 'minutes': minutes}}
+    return json.dumps({'game': {
+        'gameId': '0022400500', 'gameStatus': status, 'period': 3, 'gameClock': clock,
+        'homeTeam': {'teamName': 'Lakers', 'teamTricode': 'LAL', 'score': 80, 'players': [player]},
+        'awayTeam': {'teamName': 'Warriors', 'teamTricode': 'GSW', 'score': 78, 'players': []},
+    }})
+
+def scoreboard(status):
+    return json.dumps({'scoreboard': {'games': [{
+        'gameId': '0022400500', 'gameStatus': status,
+        'homeTeam': {'teamName': 'Lakers'}, 'awayTeam': {'teamName': 'Warriors'},
+    }]}})
+
+class TestPlayerWatch(unittest.TestCase):
+    def setUp(self):
+        self.rows = season_rows(2023, games=20)
+        self.player = PlayerWatch('LeBron James', GameLog.from_result_set(HEADERS, self.rows[1:]), CAREER)
+
+    def test_add_game_updates_totals_incrementally(self):
+        """Test that folding in a game gives the totals of recomputing them from every game"""
+        game = dict(zip(HEADERS, self.rows[0]))
+        self.assertTrue(self.player.add_game(game['Game_ID'], game))
+        self.assertFalse(self.player.add_game(game['Game_ID'], game))
+        expected = np.nansum(GameLog.from_result_set(HEADERS, self.rows).arrays(TOTAL_COLUMNS).values, axis=0)
+        self.assertEqual(self.player.season['GP'], 20)
+        np.testing.assert_allclose([self.player.season[column] for column in TOTAL_COLUMNS], expected)
+        self.assertEqual(self.player.career['GP'], 1001)
+        self.assertEqual(self.player.career['PTS'], 27000 + game['PTS'])
+        self.assertEqual(self.player.recent[-1]['PTS'], game['PTS'])
+        self.assertEqual(len(self.player.recent), 5)
+
+    def test_update_live_returns_only_changes(self):
+        """Test that a live snapshot is diffed against the previous one"""
+        self.assertEqual(self.player.update_live('g1', {'PTS': 2, 'AST': 0}), {'PTS': (0, 2)})
+        self.assertEqual(self.player.update_live('g1', {'PTS': 2, 'AST': 0}), {})
+        self.assertEqual(self.player.update_live('g1', {'PTS': 5, 'AST': 1}), {'PTS': (2, 5), 'AST': (0, 1)})
+        self.assertAlmostEqual(parse_duration('PT25M01.20S'), 25.02)
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        self.player = PlayerWatch('LeBron James', GameLog.from_result_set(HEADERS, season_rows(2023, games=10)), CAREER)
+        self.sleeps = []
+
+    def tearDown(self):
+        nba_transport.configure_transport()
+
+    def test_live_polls_are_conditional(self):
+        """Test that unchanged live files cost a 304 and are not re-rendered, and a final game is folded in"""
+        responses = {'todaysScoreboard_00.json': scoreboard(2), 'boxscore_0022400500.json': box_score(2, 10)}
+        out = io.StringIO()
+        with StubStatsServer(responses) as stub:
+            nba_transport.configure_transport(requests_per_second=1000, burst=1000, live_base_url=stub.live_base_url)
+            source = LiveSource(2544, 'Lakers')
+            watch(self.player, source, out, interval=20, max_interval=60, polls=3, sleep=self.sleeps.append)
+            self.assertEqual(out.getvalue().count('\n'), 1)
+            self.assertIn('[Q3 5:32 GSW 78-80 LAL] LeBron James: PTS 10 (+10)', out.getvalue())
+            self.assertEqual(self.sleeps, [20, 40])
+            not_modified = metrics.counter('upstream_requests_total', endpoint='boxscore', status='304')
+
+            responses['boxscore_0022400500.json'] = box_score(3, 14, 'PT34M00.00S')
+            responses['todaysScoreboard_00.json'] = scoreboard(3)
+            watch(self.player, source, out, polls=2, sleep=self.sleeps.append)
+            self.assertEqual(stub.hits['boxscore_0022400500.json'], 4)
+        self.assertEqual(metrics.counter('upstream_requests_total', endpoint='boxscore', status='304'), not_modified)
+        self.assertGreaterEqual(not_modified, 2)
+        lines = out.getvalue().splitlines()
+        self.assertIn('[Final GSW 78-80 LAL] LeBron James: PTS 14 (+4)  MIN 34 (+4)', lines[1])
+        self.assertIn('Season (11 games)', lines[2])
+        self.assertIn('Career (1001 games)', lines[4])
+        self.assertEqual(self.player.season['GP'], 11)
+
+    def test_live_clock_rounds_to_whole_seconds(self):
+        """Test that a clock just short of a minute is labelled with the next whole minute"""
+        responses = {'todaysScoreboard_00.json': scoreboard(2),
+                     'boxscore_0022400500.json': box_score(2, 10, clock='PT04M59.70S')}
+        out = io.StringIO()
+        with StubStatsServer(responses) as stub:
+            nba_transport.configure_transport(requests_per_second=1000, burst=1000, live_base_url=stub.live_base_url)
+            watch(self.player, LiveSource(2544, 'Lakers'), out, polls=1, sleep=self.sleeps.append)
+        self.assertIn('[Q3 5:00 GSW 78-80 LAL]', out.getvalue())
+
+    def test_game_log_source(self):
+        """Test that new game log rows are requested after the last known game and folded in once"""
+        requested = []
+        new_games = GameLog.from_result_set(HEADERS, season_rows(2024, games=2))
+        def fetch_games(date_from):
+            requested.append(date_from)
+            if len(requested) == 3:
+                raise ConnectionError('Network Error')
+            return new_games if len(requested) == 2 else GameLog.from_games([])
+        out, stdout, stderr = io.StringIO(), io.StringIO(), io.StringIO()
+        source = GameLogSource(fetch_games, GameLog.from_result_set(HEADERS, season_rows(2023, games=10)))
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            watch(self.player, source, out, interval=10, max_interval=100, polls=4, sleep=self.sleeps.append)
+        # A failed poll is reported on stderr and leaves the watch output alone
+        self.assertIn('Network Error', stderr.getvalue())
+        self.assertEqual(stdout.getvalue(), '')
+        self.assertNotIn('Network Error', out.getvalue())
+        self.assertEqual(requested[0], np.datetime64('2023-11-11'))
+        self.assertEqual(requested[2], np.datetime64('2024-11-03'))
+        self.assertEqual(self.sleeps, [20, 10, 20])
+        self.assertEqual(self.player.season['GP'], 12)
+        self.assertEqual(out.getvalue().count('Season ('), 2)
+
+if __name__ == '__main__':
+    unittest.main()